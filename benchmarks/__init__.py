@@ -0,0 +1 @@
+"""Benchmarks for the TOC interface updater, run with `python -m benchmarks`."""
@@ -0,0 +1,175 @@
+"""Command line interface for generating trees, running benchmarks and comparing results."""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from .generator import TreeOptions, write_tree
+from .suite import (
+    BENCHMARKS,
+    DEFAULT_REPEATS,
+    DEFAULT_SIZES,
+    DEFAULT_THRESHOLD,
+    RESULTS_DIR,
+    BenchmarkResult,
+    compare_results,
+    current_commit,
+    load_results,
+    results_path,
+    run_suite,
+    save_results,
+)
+
+
+def sizes_type(value):
+    """Convert a comma-separated list of sizes, e.g. "1k,10k", to numbers."""
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        multiplier = 1000 if part.endswith("k") else 1
+        try:
+            size = int(part.rstrip("k")) * multiplier
+        except ValueError:
+            size = 0
+        if size < 1:
+            raise argparse.ArgumentTypeError(f"Invalid size: {part}")
+        sizes.append(size)
+    return sizes
+
+
+def format_result(result: BenchmarkResult) -> str:
+    return (
+        f"{result.name:<26} {result.size:>7}  best {result.best:8.3f}s"
+        f"  median {result.median:8.3f}s  {result.throughput:>11,.0f} files/s"
+        f"  peak {result.peak_memory / (1024 * 1024):8.2f} MiB"
+    )
+
+
+def resolve_results(value: str, results_dir: str) -> str:
+    """Get a results file from a path, or from a commit stored in the results directory."""
+    if os.path.exists(value):
+        return value
+    return results_path(value, results_dir)
+
+
+def generate_main(args: argparse.Namespace) -> None:
+    options = TreeOptions(
+        args.files, args.current_share, args.crlf_share, seed=args.seed
+    )
+    paths = write_tree(args.output, options)
+    print(f"Generated {len(paths)} TOC files in {args.output}")
+
+
+def run_main(args: argparse.Namespace) -> None:
+    results = run_suite(
+        args.sizes,
+        args.repeats,
+        args.benchmark,
+        report=lambda result: print(format_result(result), flush=True),
+    )
+    commit = current_commit()
+    output = args.output or results_path(commit, args.results_dir)
+    save_results(results, output, commit)
+    print(f"Results written to {output}")
+
+
+def compare_main(args: argparse.Namespace) -> None:
+    current = args.current or current_commit()
+    try:
+        baseline_results = load_results(
+            resolve_results(args.baseline, args.results_dir)
+        )
+        current_results = load_results(resolve_results(current, args.results_dir))
+    except (OSError, ValueError) as e:
+        sys.exit(f"Unable to load benchmark results: {e}")
+
+    regressions = 0
+    for comparison in compare_results(baseline_results, current_results):
+        regressed = comparison.is_regression(args.threshold)
+        regressions += regressed
+        print(
+            f"{comparison.name:<26} {comparison.size:>7}"
+            f"  {comparison.baseline:>11,.0f} -> {comparison.current:>11,.0f} files/s"
+            f"  {comparison.change:+7.1%}{'  REGRESSION' if regressed else ''}"
+        )
+
+    if regressions:
+        sys.exit(
+            f"{regressions} benchmarks regressed by more than {args.threshold:.0%}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="TOC updater benchmarks"
+    )
+    parser.add_argument(
+        "--results-dir",
+        default=RESULTS_DIR,
+        help=f"Directory results are stored in by commit (default: {RESULTS_DIR})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write a synthetic addon tree")
+    generate.add_argument("output", help="Directory to write the tree to")
+    generate.add_argument("-n", "--files", type=int, default=1000)
+    generate.add_argument(
+        "--current-share",
+        type=float,
+        default=TreeOptions.current_share,
+        help="Share of files that are already up to date",
+    )
+    generate.add_argument(
+        "--crlf-share",
+        type=float,
+        default=TreeOptions.crlf_share,
+        help="Share of addons with CRLF line endings",
+    )
+    generate.add_argument("--seed", type=int, default=TreeOptions.seed)
+    generate.set_defaults(func=generate_main)
+
+    run = commands.add_parser("run", help="Run the benchmarks and store the results")
+    run.add_argument(
+        "--sizes",
+        type=sizes_type,
+        default=list(DEFAULT_SIZES),
+        help="Comma-separated numbers of files, e.g. 1k,10k (default: 1k,10k,100k)",
+    )
+    run.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run.add_argument(
+        "--benchmark",
+        action="append",
+        choices=list(BENCHMARKS),
+        help="Only run this benchmark, may be repeated",
+    )
+    run.add_argument(
+        "-o",
+        "--output",
+        help="Results file (default: the results directory, named by commit)",
+    )
+    run.set_defaults(func=run_main)
+
+    compare = commands.add_parser(
+        "compare", help="Compare throughput against a baseline, failing on regressions"
+    )
+    compare.add_argument("baseline", help="Results file or commit")
+    compare.add_argument(
+        "current",
+        nargs="?",
+        help="Results file or commit (default: the current commit)",
+    )
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Throughput drop reported as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    compare.set_defaults(func=compare_main)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
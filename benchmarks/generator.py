@@ -0,0 +1,142 @@
+"""Generator for synthetic addon monorepos resembling real TOC trees."""
+
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+from toc_interface_updater.constants import InterfaceDirective, TocSuffix
+from toc_interface_updater.types import FullProduct, InterfaceVersion
+
+# Versions the benchmarks resolve against, so runs never touch the network
+CURRENT_VERSIONS: Dict[FullProduct, InterfaceVersion] = {
+    "wow": InterfaceVersion(110205),
+    "wow_classic": InterfaceVersion(50501),
+    "wow_classic_era": InterfaceVersion(11507),
+}
+
+# Versions written to files that should be outdated
+OUTDATED_VERSIONS: Dict[FullProduct, InterfaceVersion] = {
+    "wow": InterfaceVersion(110100),
+    "wow_classic": InterfaceVersion(50500),
+    "wow_classic_era": InterfaceVersion(11506),
+}
+
+# Layouts of the TOC files in an addon and how often they're picked:
+# unsuffixed with one version, unsuffixed with one directive per flavor,
+# unsuffixed with comma-separated versions, and one suffixed file per flavor
+LAYOUTS = {
+    "single": 4,
+    "multi_line": 2,
+    "single_line_multi": 2,
+    "suffixed": 2,
+}
+
+# Suffixed files written for the "suffixed" layout, with the product each one is for
+SUFFIXED_FILES: List[Tuple[str, FullProduct]] = [
+    (f"_{TocSuffix.MAINLINE}", "wow"),
+    (f"_{TocSuffix.VANILLA}", "wow_classic_era"),
+    (f"_{TocSuffix.MISTS}", "wow_classic"),
+    (f"-{TocSuffix.CLASSIC}", "wow_classic"),
+]
+
+
+@dataclass
+class TreeOptions:
+    """How a generated tree is made up."""
+
+    files: int
+    # Share of files whose interface versions are already current
+    current_share: float = 0.25
+    # Share of addons written with CRLF line endings
+    crlf_share: float = 0.2
+    # Source files listed after the header of each TOC file
+    body_lines: int = 8
+    seed: int = 0
+
+
+def _header(rng: random.Random, name: str, interface_lines: List[str]) -> List[str]:
+    """Build a metadata header with the interface directives among other metadata."""
+    metadata = [
+        f"## Title: {name}",
+        f"## Notes: Generated addon {name}",
+        "## Author: Benchmark",
+        f"## Version: {rng.randint(1, 20)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}",
+        f"## SavedVariables: {name}DB",
+        "## X-Category: Interface Enhancements",
+    ]
+    # Interface directives usually come first, but not always
+    position = 0 if rng.random() < 0.7 else rng.randint(1, len(metadata))
+    return metadata[:position] + interface_lines + metadata[position:]
+
+
+def _body(name: str, lines: int) -> List[str]:
+    return ["", *(f"{name}\\Module{index:02}.lua" for index in range(lines))]
+
+
+def _versions(current: bool) -> Dict[FullProduct, InterfaceVersion]:
+    return CURRENT_VERSIONS if current else OUTDATED_VERSIONS
+
+
+def generate_addon(
+    rng: random.Random, name: str, options: TreeOptions
+) -> List[Tuple[str, str]]:
+    """Generate the (file name, content) pairs of one addon's TOC files."""
+    layout = rng.choices(list(LAYOUTS), weights=list(LAYOUTS.values()))[0]
+    newline = "\r\n" if rng.random() < options.crlf_share else "\n"
+
+    def toc(file_name: str, interface_lines: List[str]) -> Tuple[str, str]:
+        lines = _header(rng, name, interface_lines) + _body(name, options.body_lines)
+        return file_name, newline.join(lines) + newline
+
+    if layout == "suffixed":
+        tocs = []
+        for suffix, product in SUFFIXED_FILES:
+            version = _versions(rng.random() < options.current_share)[product]
+            tocs.append(
+                toc(f"{name}{suffix}.toc", [f"{InterfaceDirective.BASE} {version}"])
+            )
+        return tocs
+
+    versions = _versions(rng.random() < options.current_share)
+    if layout == "single":
+        interface_lines = [f"{InterfaceDirective.BASE} {versions['wow']}"]
+    elif layout == "multi_line":
+        interface_lines = [
+            f"{InterfaceDirective.BASE} {versions['wow']}",
+            f"{InterfaceDirective.VANILLA} {versions['wow_classic_era']}",
+            f"{InterfaceDirective.CURRENT_CLASSIC} {versions['wow_classic']}",
+        ]
+    else:
+        values = ", ".join(str(version) for version in sorted(versions.values()))
+        interface_lines = [f"{InterfaceDirective.BASE} {values}"]
+    return [toc(f"{name}.toc", interface_lines)]
+
+
+def generate_tocs(options: TreeOptions) -> Iterator[Tuple[str, str]]:
+    """
+    Generate exactly options.files (relative path, content) pairs, grouped into
+    addon directories. The same options always generate the same tree.
+    """
+    rng = random.Random(options.seed)
+    remaining = options.files
+    index = 0
+    while remaining > 0:
+        name = f"Addon{index:06}"
+        for file_name, content in generate_addon(rng, name, options)[:remaining]:
+            yield f"{name}/{file_name}", content
+            remaining -= 1
+        index += 1
+
+
+def write_tree(root: str, options: TreeOptions) -> List[str]:
+    """Write a generated tree under root, returning the paths of its TOC files."""
+    paths = []
+    for rel_path, content in generate_tocs(options):
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Bytes keep the generated line endings as they are
+        with open(path, "wb") as f:
+            f.write(content.encode("utf-8"))
+        paths.append(path)
+    return paths
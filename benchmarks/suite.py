@@ -0,0 +1,287 @@
+"""Repeatable timing and memory benchmarks, and comparison of stored results."""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from toc_interface_updater.console import QUIET, Console, set_console
+from toc_interface_updater.constants import TocSuffix
+from toc_interface_updater.content_updater import update_interface_content
+from toc_interface_updater.file_processor import get_file_passes, process_files
+from toc_interface_updater.types import VersionCache
+from toc_interface_updater.update import clear_update_cache
+from toc_interface_updater.version_resolver import (
+    clear_interface_cache,
+    detect_existing_versions,
+    resolve_interface,
+)
+
+from .generator import CURRENT_VERSIONS, TreeOptions, generate_tocs, write_tree
+
+RESULTS_FORMAT_VERSION = 1
+
+# Where results are stored, one file per commit
+RESULTS_DIR = ".benchmarks"
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEATS = 3
+# Throughput drop, as a share of the baseline, reported as a regression
+DEFAULT_THRESHOLD = 0.1
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark at one size."""
+
+    name: str
+    size: int
+    repeats: int
+    # Seconds taken by the fastest and the median repeat
+    best: float
+    median: float
+    # Files processed per second in the fastest repeat
+    throughput: float
+    # Peak bytes allocated during a separate traced run
+    peak_memory: int
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.name, self.size
+
+
+# Prepares a benchmark's input and returns the function to time
+Setup = Callable[[], Callable[[], None]]
+
+
+def measure(name: str, size: int, setup: Setup, repeats: int) -> BenchmarkResult:
+    """
+    Time a benchmark, setting it up afresh before each repeat, then run it once
+    more under tracemalloc for its peak memory.
+    Garbage collection is disabled while timing, as timeit does.
+    """
+    timings = []
+    for _ in range(repeats):
+        run = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    run = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return BenchmarkResult(
+        name,
+        size,
+        repeats,
+        best,
+        statistics.median(timings),
+        size / best if best else 0.0,
+        peak_memory,
+    )
+
+
+def benchmark_version_cache() -> VersionCache:
+    return dict(CURRENT_VERSIONS)
+
+
+def clear_caches() -> None:
+    """Forget memoized results so every repeat starts cold."""
+    clear_interface_cache()
+    clear_update_cache()
+
+
+def process_files_setup(size: int, root: str) -> Setup:
+    """Benchmark updating a freshly generated tree of TOC files."""
+
+    def setup() -> Callable[[], None]:
+        shutil.rmtree(root, ignore_errors=True)
+        files = write_tree(root, TreeOptions(size))
+        clear_caches()
+        version_cache = benchmark_version_cache()
+        return lambda: process_files("wow", False, False, version_cache, files)
+
+    return setup
+
+
+def content_passes(size: int) -> List[Tuple[str, list]]:
+    """Generate (content, passes) pairs for the in-memory benchmarks."""
+    pattern = TocSuffix.get_pattern()
+    return [
+        (content, get_file_passes(path, pattern, "wow"))
+        for path, content in generate_tocs(TreeOptions(size))
+    ]
+
+
+def detect_setup(size: int) -> Setup:
+    """Benchmark detecting the existing versions of every pass over each file."""
+    samples = content_passes(size)
+
+    def setup() -> Callable[[], None]:
+        def run() -> None:
+            for content, passes in samples:
+                for product, multi in passes:
+                    detect_existing_versions(content, product, multi)
+
+        return run
+
+    return setup
+
+
+def update_content_setup(size: int) -> Setup:
+    """Benchmark rewriting the interface directives of every pass over each file."""
+    version_cache = benchmark_version_cache()
+    samples = []
+    # Resolve outside the timed loop, so only the rewriting is measured
+    for content, passes in content_passes(size):
+        for product, multi in passes:
+            detected, single_line_multi = detect_existing_versions(
+                content, product, multi
+            )
+            interface = resolve_interface(
+                product, frozenset(detected), False, False, version_cache
+            )
+            samples.append((content, product, interface, multi, single_line_multi))
+
+    def setup() -> Callable[[], None]:
+        def run() -> None:
+            for sample in samples:
+                update_interface_content(*sample)
+
+        return run
+
+    return setup
+
+
+# Benchmarks by name, each building its setup for a size and a scratch directory
+BENCHMARKS: Dict[str, Callable[[int, str], Setup]] = {
+    "process_files": process_files_setup,
+    "update_interface_content": lambda size, root: update_content_setup(size),
+    "detect_existing_versions": lambda size, root: detect_setup(size),
+}
+
+
+def run_suite(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    repeats: int = DEFAULT_REPEATS,
+    names: Optional[Sequence[str]] = None,
+    report: Optional[Callable[[BenchmarkResult], None]] = None,
+) -> List[BenchmarkResult]:
+    """Run the named benchmarks, or all of them, at every size."""
+    results = []
+    # Per-file output would dominate the timings
+    previous_console = set_console(Console(QUIET))
+    try:
+        with tempfile.TemporaryDirectory(prefix="toc-bench-") as scratch:
+            for name in names or BENCHMARKS:
+                for size in sizes:
+                    setup = BENCHMARKS[name](size, os.path.join(scratch, "tree"))
+                    result = measure(name, size, setup, repeats)
+                    results.append(result)
+                    if report is not None:
+                        report(result)
+    finally:
+        set_console(previous_console)
+    return results
+
+
+def current_commit() -> str:
+    """Get the short hash of the checked out commit, or "local" outside a git repo."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+    return output.stdout.strip() or "local"
+
+
+def results_path(commit: str, results_dir: str = RESULTS_DIR) -> str:
+    return os.path.join(results_dir, f"{commit}.json")
+
+
+def save_results(
+    results: List[BenchmarkResult], path: str, commit: Optional[str] = None
+) -> None:
+    """Write results along with the environment they were measured in."""
+    data = {
+        "format": RESULTS_FORMAT_VERSION,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.time(),
+        "results": [asdict(result) for result in results],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    """Read results written by save_results. Raises ValueError for other files."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != RESULTS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark results format in {path}")
+    return [BenchmarkResult(**result) for result in data["results"]]
+
+
+@dataclass
+class Comparison:
+    """Throughput of a benchmark in a baseline and a new run."""
+
+    name: str
+    size: int
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Get the relative change in throughput, negative when slower."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.change < -threshold
+
+
+def compare_results(
+    baseline: List[BenchmarkResult], current: List[BenchmarkResult]
+) -> List[Comparison]:
+    """Pair up the benchmarks measured in both runs."""
+    baseline_by_key = {result.key: result for result in baseline}
+    return [
+        Comparison(
+            result.name,
+            result.size,
+            baseline_by_key[result.key].throughput,
+            result.throughput,
+        )
+        for result in current
+        if result.key in baseline_by_key
+    ]
@@ -0,0 +1,129 @@
+"""Buffered, level-controlled console output shared by every part of the updater."""
+
+import os
+import sys
+import threading
+from typing import List, Optional, TextIO
+
+# Output levels, each including everything from the levels below it
+QUIET = 0  # errors and warnings only
+NORMAL = 1  # changed files and the end of run summary
+VERBOSE = 2  # every file checked
+DEBUG = 3  # version lookups and cache details
+
+# ANSI escape sequences for colors and formatting
+RESET = "\033[0m"
+BOLD = "\033[1m"
+RED = "\033[31m"
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+LIGHT_BLUE = "\033[94m"
+
+# Lines collected before they are written out together
+BUFFER_LINES = 64
+
+
+def supports_color(stream: TextIO) -> bool:
+    """Check whether a stream is a terminal and color hasn't been disabled with $NO_COLOR."""
+    if os.environ.get("NO_COLOR"):
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
+class Console:
+    """
+    Writes messages at or below its level, buffering lines so large trees don't
+    make one write per file. Errors and warnings are written out straight away.
+    """
+
+    def __init__(
+        self,
+        level: int = NORMAL,
+        stream: Optional[TextIO] = None,
+        color: Optional[bool] = None,
+    ):
+        self.level = level
+        # None writes to whatever sys.stdout is at the time
+        self.stream = stream
+        self.color = color
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def _get_stream(self) -> TextIO:
+        return self.stream or sys.stdout
+
+    def style(self, text: str, *codes: str) -> str:
+        """Wrap text in ANSI codes, unless color is disabled."""
+        if self.color is None:
+            self.color = supports_color(self._get_stream())
+        if not self.color or not codes:
+            return text
+        return f"{''.join(codes)}{text}{RESET}"
+
+    def enabled(self, level: int) -> bool:
+        """Check whether messages at a level are shown."""
+        return level <= self.level
+
+    def write(self, line: str, level: int = NORMAL, flush: bool = False) -> None:
+        """Buffer a line if its level is shown."""
+        if level > self.level:
+            return
+        with self._lock:
+            self._buffer.append(line)
+            if flush or len(self._buffer) >= BUFFER_LINES:
+                self._flush_locked()
+
+    def error(self, message: str) -> None:
+        self.write(self.style(message, RED), QUIET, flush=True)
+
+    def warning(self, message: str) -> None:
+        self.write(self.style(message, YELLOW), QUIET, flush=True)
+
+    def info(self, message: str) -> None:
+        self.write(message, NORMAL)
+
+    def verbose(self, message: str) -> None:
+        self.write(message, VERBOSE)
+
+    def debug(self, message: str) -> None:
+        self.write(message, DEBUG)
+
+    def flush(self) -> None:
+        """Write out all buffered lines."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        stream = self._get_stream()
+        stream.write("\n".join(self._buffer) + "\n")
+        stream.flush()
+        self._buffer.clear()
+
+
+_console: Optional[Console] = None
+_console_lock = threading.Lock()
+
+
+def get_console() -> Console:
+    """Get the console all output goes through, creating it on first use."""
+    global _console
+    with _console_lock:
+        if _console is None:
+            _console = Console()
+        return _console
+
+
+def set_console(console: Optional[Console]) -> Optional[Console]:
+    """Replace the shared console, returning the previous one."""
+    global _console
+    with _console_lock:
+        previous, _console = _console, console
+        return previous
+
+
+def output_level(verbose: int, quiet: int) -> int:
+    """Get the output level for the number of -v and -q flags given."""
+    return max(QUIET, min(DEBUG, NORMAL + verbose - quiet))
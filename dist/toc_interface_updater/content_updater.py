@@ -1,9 +1,20 @@
 """Content updating functions for TOC files."""
 
-import re
-
-from .constants import InterfaceDirective
+from .toc_document import TocDocument
 from .types import FullProduct
+from .version_resolver import get_product_directives
+
+
+def update_document(
+    document: TocDocument,
+    product: FullProduct,
+    interface: str,
+    multi: bool,
+    single_line_multi: bool,
+) -> None:
+    """Update the interface version directives of a product in a document."""
+    for directive in get_product_directives(product, multi and not single_line_multi):
+        document.set(directive, interface)
 
 
 def update_interface_content(
@@ -14,39 +25,6 @@ def update_interface_content(
     single_line_multi: bool,
 ) -> str:
     """Update the interface version in the content based on product and format."""
-    if multi and not single_line_multi:
-        if product == "wow_classic":
-            # Update Current Classic directive
-            content = re.sub(
-                InterfaceDirective.get_directive_pattern(
-                    InterfaceDirective.CURRENT_CLASSIC
-                ),
-                f"{InterfaceDirective.CURRENT_CLASSIC} {interface}",
-                content,
-                flags=re.MULTILINE,
-            )
-            # Update Classic directive
-            content = re.sub(
-                InterfaceDirective.get_directive_pattern(InterfaceDirective.CLASSIC),
-                f"{InterfaceDirective.CLASSIC} {interface}",
-                content,
-                flags=re.MULTILINE,
-            )
-        elif product == "wow_classic_era":
-            # Update Vanilla directive
-            content = re.sub(
-                InterfaceDirective.get_directive_pattern(InterfaceDirective.VANILLA),
-                f"{InterfaceDirective.VANILLA} {interface}",
-                content,
-                flags=re.MULTILINE,
-            )
-    else:
-        # Update base interface directive
-        content = re.sub(
-            InterfaceDirective.get_directive_pattern(InterfaceDirective.BASE),
-            f"{InterfaceDirective.BASE} {interface}",
-            content,
-            flags=re.MULTILINE,
-        )
-
-    return content
+    document = TocDocument(content)
+    update_document(document, product, interface, multi, single_line_multi)
+    return document.text()
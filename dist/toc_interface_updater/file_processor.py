@@ -2,43 +2,26 @@
 
 import os
 import re
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from .constants import TocSuffix
-from .types import FullProduct, VersionCache
+from .console import NORMAL, VERBOSE, get_console
+from .constants import InterfaceDirective, TocSuffix
+from .profiler import phase
+from .state import FileState, StateManifest
+from .toc_document import TocDocument
+from .types import ExecutorKind, FileResult, FullProduct, Product, VersionCache
+from .walker import ExcludeRules, walk_toc_files
 
-# ANSI escape sequences for colors and formatting
-RESET = "\033[0m"
-BOLD = "\033[1m"
-LIGHT_BLUE = "\033[94m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
+# Bytes read at a time while looking for the end of a TOC header
+HEADER_READ_SIZE = 8192
 
-line_ending = "\n"
-
-
-def write_file_if_changed(
-    file_path: str,
-    original_content: str,
-    updated_content: str,
-    modified_files: List[str],
-) -> None:
-    """Write the file only if content has changed, preserving original line endings."""
-    if updated_content != original_content:
-        # Restore the original line endings before writing back to the file
-        updated_content_with_original_line_endings = updated_content.replace(
-            "\n", line_ending
-        )
-
-        with open(
-            file_path, "w", newline=""
-        ) as f:  # Ensure the newline='' to allow custom line endings
-            f.write(updated_content_with_original_line_endings)
-
-        modified_files.append(file_path)
-        print(f"{GREEN}Updated{RESET}")
-    else:
-        print(f"{YELLOW}No change{RESET}")
+UTF8_BOM = b"\xef\xbb\xbf"
+# TOC files are UTF-8, any other bytes are carried through unchanged
+ENCODING = "utf-8"
+ENCODING_ERRORS = "surrogateescape"
 
 
 def get_product_for_file(
@@ -63,50 +46,320 @@ def get_product_for_file(
     return default_flavor, False
 
 
+def split_terminator(line: bytes) -> Tuple[bytes, bytes]:
+    """Split a raw line into its content and line terminator."""
+    if line.endswith(b"\r\n"):
+        return line[:-2], b"\r\n"
+    if line.endswith((b"\n", b"\r")):
+        return line[:-1], line[-1:]
+    return line, b""
+
+
+def split_header(data: bytes, final: bool) -> Optional[List[bytes]]:
+    """
+    Get the raw lines of the metadata header at the start of data, the lines before
+    the first one that isn't blank or a comment.
+    Returns None if the header may continue past the data, unless it is final.
+    """
+    lines: List[bytes] = []
+    for line in data.splitlines(keepends=True):
+        content, terminator = split_terminator(line)
+        if content.strip() and not content.startswith(b"#"):
+            return lines
+        if not final and terminator in (b"", b"\r"):
+            # The line, or its \r\n terminator, may continue in the next read
+            return None
+        lines.append(line)
+    return lines if final else None
+
+
+@dataclass
+class TocHeader:
+    """The raw metadata header of a TOC file, along with whatever was read past it."""
+
+    bom: bytes
+    lines: List[bytes]
+    rest: bytes = b""
+    # Whether rest is the remainder of the file
+    complete: bool = True
+    # Size and modification time of the file when it was read
+    file_size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        """Get the size of the header in bytes, including any BOM."""
+        return len(self.bom) + sum(len(line) for line in self.lines)
+
+    @property
+    def read_size(self) -> int:
+        """Get the number of bytes read from the file, including any read past the header."""
+        return self.size + len(self.rest)
+
+    def is_current(self, file_path: str) -> bool:
+        """Check whether the file still has the size and mtime it was read with."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return stat.st_size == self.file_size and stat.st_mtime_ns == self.mtime_ns
+
+    def text(self) -> str:
+        """Decode the header with normalized line endings."""
+        parts: List[str] = []
+        for line in self.lines:
+            content, terminator = split_terminator(line)
+            parts.append(content.decode(ENCODING, ENCODING_ERRORS))
+            if terminator:
+                parts.append("\n")
+        return "".join(parts)
+
+    def splice(self, text: str) -> List[bytes]:
+        """
+        Encode updated header text back into raw lines.
+        Unchanged lines keep their original bytes and every line keeps its terminator.
+        """
+        lines: List[bytes] = []
+        # Directives are updated in place, so the lines still correspond
+        for line, updated in zip(self.lines, text.split("\n"), strict=False):
+            content, terminator = split_terminator(line)
+            if updated != content.decode(ENCODING, ENCODING_ERRORS):
+                line = updated.encode(ENCODING, ENCODING_ERRORS) + terminator
+            lines.append(line)
+        return lines
+
+
+def read_toc_header(file_path: str) -> TocHeader:
+    """Read a TOC file up to the end of its metadata header."""
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read(HEADER_READ_SIZE)
+        complete = len(data) < HEADER_READ_SIZE
+        bom = UTF8_BOM if data.startswith(UTF8_BOM) else b""
+        lines = split_header(data[len(bom) :], complete)
+        while lines is None:
+            chunk = f.read(HEADER_READ_SIZE)
+            complete = len(chunk) < HEADER_READ_SIZE
+            data += chunk
+            lines = split_header(data[len(bom) :], complete)
+
+    header = TocHeader(
+        bom,
+        lines,
+        complete=complete,
+        file_size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    header.rest = data[header.size :]
+    return header
+
+
+def write_toc_header(file_path: str, header: TocHeader, lines: List[bytes]) -> int:
+    """
+    Write updated header lines over the original ones, returning the number of
+    bytes written, which is 0 if nothing changed.
+    The rest of the file is only rewritten when the header changes size.
+    """
+    if lines == header.lines:
+        return 0
+
+    start = len(header.bom)
+    data = b"".join(lines)
+    with open(file_path, "r+b") as f:
+        if len(data) == header.size - start:
+            f.seek(start)
+            f.write(data)
+            return len(data)
+
+        if not header.complete:
+            # Read the remainder of the file after what was already read past the header
+            f.seek(header.read_size)
+            header.rest += f.read()
+            header.complete = True
+        f.seek(start)
+        f.write(data)
+        f.write(header.rest)
+        f.truncate()
+    return len(data) + len(header.rest)
+
+
+def find_toc_files(root: str = ".", rules: Optional[ExcludeRules] = None) -> List[str]:
+    """Find all .toc files in a directory and its subdirectories, skipping excluded ones."""
+    return walk_toc_files(root, rules)
+
+
+def get_file_passes(
+    file_path: str, pattern: re.Pattern, default_flavor: str
+) -> List[tuple[FullProduct, bool]]:
+    """
+    Get the (product, is_multi_line) updates to apply to a file.
+    Unsuffixed files get the default flavor plus the multi-line classic directives.
+    """
+    if not pattern.search(file_path):
+        return [
+            (default_flavor, False),
+            ("wow_classic", True),
+            ("wow_classic_era", True),
+        ]
+    return [get_product_for_file(file_path, pattern, default_flavor)]
+
+
+def plan_file_products(
+    file_path: str, pattern: re.Pattern, flavor: str, beta: bool, test: bool
+) -> Tuple[Set[Product], TocHeader]:
+    """
+    Scan a TOC file and work out exactly which products it needs.
+    Returns the products and the header read, so updating needn't read it again.
+    """
+    from .version_resolver import get_needed_products
+
+    # Interface directives are part of the metadata header
+    with phase("read"):
+        header = read_toc_header(file_path)
+    with phase("normalize"):
+        content = header.text()
+    products: Set[Product] = set()
+    if InterfaceDirective.PREFIX not in content:
+        return products, header
+    with phase("detect"):
+        document = TocDocument(content)
+        for product, multi in get_file_passes(file_path, pattern, flavor):
+            products |= get_needed_products(document, product, multi, beta, test)
+    return products, header
+
+
+def plan_files(
+    files: List[str],
+    flavor: str,
+    beta: bool,
+    test: bool,
+    state: Optional[StateManifest] = None,
+) -> Tuple[Dict[str, Set[Product]], Dict[str, FileState], Dict[str, TocHeader]]:
+    """
+    Work out the products each file needs, reusing the recorded products of
+    files the state shows are unchanged so they aren't read.
+    Returns (products per file, previous state of unchanged files, headers of
+    the files that were read).
+    """
+    pattern = TocSuffix.get_pattern()
+    file_products: Dict[str, Set[Product]] = {}
+    unchanged: Dict[str, FileState] = {}
+    headers: Dict[str, TocHeader] = {}
+
+    for file_path in files:
+        previous = state.check(file_path) if state is not None else None
+        if previous is not None:
+            unchanged[file_path] = previous
+            file_products[file_path] = set(previous.versions)
+        else:
+            file_products[file_path], headers[file_path] = plan_file_products(
+                file_path, pattern, flavor, beta, test
+            )
+
+    return file_products, unchanged, headers
+
+
+def resolve_jobs(jobs: int, executor: ExecutorKind) -> int:
+    """Get the number of workers to use, where 0 means one per available CPU."""
+    if jobs > 0:
+        return jobs
+    cpus = os.cpu_count() or 1
+    if executor == ExecutorKind.PROCESS:
+        return cpus
+    # Threads mostly wait on file I/O, so use more of them than CPUs
+    return min(32, cpus + 4)
+
+
+def _update_planned(
+    update: Callable[..., FileResult],
+    file_path: str,
+    passes: List[tuple[FullProduct, bool]],
+    header: Optional[TocHeader],
+) -> FileResult:
+    """Update a file, given its header if it was read while planning."""
+    return update(file_path, passes, header=header)
+
+
 def process_files(
-    flavor: str, beta: bool, test: bool, version_cache: VersionCache
-) -> List[str]:
-    """Process all .toc files in the current directory and subdirectories."""
-    from .update import update_versions  # Import here to avoid circular imports
+    flavor: str,
+    beta: bool,
+    test: bool,
+    version_cache: VersionCache,
+    files: Optional[List[str]] = None,
+    jobs: int = 1,
+    executor: ExecutorKind = ExecutorKind.THREAD,
+    on_result: Optional[Callable[[FileResult], None]] = None,
+    write: bool = True,
+    fail_fast: bool = False,
+    headers: Optional[Dict[str, TocHeader]] = None,
+) -> List[FileResult]:
+    """
+    Process the given .toc files, or all in the current directory and subdirectories.
+    With more than one job, files are updated on a worker pool while results are
+    still reported in file order.
+    Files that changed or had products skipped are reported, others only when verbose.
+    on_result is called with each result as soon as it is reported.
+    Files are only checked when write is False, and with fail_fast processing
+    stops at the first file that needs updating.
+    Headers already read while planning are reused for files that haven't changed since.
+    """
+    from .update import (  # Import here to avoid circular imports
+        format_file_result,
+        update_file,
+    )
 
-    modified_files: List[str] = []
+    console = get_console()
+    file_results: List[FileResult] = []
     pattern = TocSuffix.get_pattern()
 
-    for root, _, files in os.walk("."):
-        for file in files:
-            if not file.endswith(".toc"):
-                continue
-
-            file_path = os.path.join(root, file)
-
-            if not pattern.search(file_path):
-                # Process with default flavor and all product types
-                update_versions(
-                    file_path, flavor, False, beta, test, version_cache, modified_files
-                )
-                update_versions(
-                    file_path,
-                    "wow_classic",
-                    True,
-                    beta,
-                    test,
-                    version_cache,
-                    modified_files,
-                )
-                update_versions(
-                    file_path,
-                    "wow_classic_era",
-                    True,
-                    beta,
-                    test,
-                    version_cache,
-                    modified_files,
-                )
-            else:
-                # Process specific product based on file name
-                product, multi = get_product_for_file(file_path, pattern, flavor)
-                update_versions(
-                    file_path, product, multi, beta, test, version_cache, modified_files
-                )
-
-    return modified_files
+    if files is None:
+        files = find_toc_files()
+
+    passes = [get_file_passes(file_path, pattern, flavor) for file_path in files]
+    planned = [(headers or {}).get(file_path) for file_path in files]
+    update = partial(
+        _update_planned,
+        partial(
+            update_file, beta=beta, test=test, version_cache=version_cache, write=write
+        ),
+    )
+    jobs = min(resolve_jobs(jobs, executor), max(len(files), 1))
+
+    if jobs == 1:
+        results = map(update, files, passes, planned)
+        pool = None
+    elif executor == ExecutorKind.PROCESS:
+        # Imported here as multiprocessing is slow to import and rarely needed
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        # Batch files so the version cache isn't pickled once per file
+        results = pool.map(
+            update,
+            files,
+            passes,
+            planned,
+            chunksize=max(1, len(files) // (jobs * 4)),
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=jobs)
+        results = pool.map(update, files, passes, planned)
+
+    try:
+        # map() yields in submission order, keeping the output deterministic
+        for result in results:
+            level = NORMAL if result.modified or result.skipped else VERBOSE
+            if console.enabled(level):
+                console.write(format_file_result(result, console), level)
+            if on_result is not None:
+                on_result(result)
+            file_results.append(result)
+            if fail_fast and result.modified:
+                break
+    finally:
+        if pool is not None:
+            # Files queued after a fail fast stop are never started
+            pool.shutdown(cancel_futures=True)
+        console.flush()
+
+    return file_results
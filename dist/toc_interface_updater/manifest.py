@@ -0,0 +1,83 @@
+"""Version manifests for sharing resolved product versions between runs."""
+
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Dict
+
+from .types import InterfaceVersion, Product, VersionCache
+
+MANIFEST_FORMAT_VERSION = 1
+
+# Environment variable that can be used instead of --versions-from
+VERSIONS_FROM_ENV = "TOC_UPDATER_VERSIONS_FROM"
+
+
+class ManifestError(ValueError):
+    """Raised when a version manifest can't be read."""
+
+
+def _timestamp(seconds: float) -> str:
+    """Format an epoch timestamp as an ISO 8601 UTC string."""
+    return (
+        datetime.fromtimestamp(seconds, timezone.utc)
+        .isoformat(timespec="seconds")
+        .replace("+00:00", "Z")
+    )
+
+
+def build_manifest(
+    version_cache: VersionCache,
+    fetched_at: Dict[Product, float],
+    region: str,
+    generated_at: float,
+) -> dict:
+    """Build a manifest from resolved versions and their fetch times."""
+    return {
+        "format": MANIFEST_FORMAT_VERSION,
+        "region": region,
+        "generated_at": _timestamp(generated_at),
+        "products": {
+            product: {
+                "version": str(version),
+                "fetched_at": _timestamp(fetched_at.get(product, generated_at)),
+            }
+            for product, version in sorted(version_cache.items())
+            if version is not None
+        },
+    }
+
+
+def write_manifest(manifest: dict, path: str) -> None:
+    """Write a manifest to a file, or to stdout when the path is "-"."""
+    content = json.dumps(manifest, indent=2) + "\n"
+    if path == "-":
+        sys.stdout.write(content)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def load_manifest(path: str) -> VersionCache:
+    """Read a manifest file into a version cache."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Unable to read version manifest {path}: {e}") from e
+
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("format") != MANIFEST_FORMAT_VERSION
+        or not isinstance(manifest.get("products", {}), dict)
+    ):
+        raise ManifestError(f"Unsupported version manifest format in {path}")
+
+    version_cache: VersionCache = {}
+    for product, entry in manifest.get("products", {}).items():
+        version = entry.get("version") if isinstance(entry, dict) else None
+        if not isinstance(version, str) or not version.isdigit():
+            raise ManifestError(f"Invalid version for {product} in {path}")
+        version_cache[product] = InterfaceVersion.parse(version)
+
+    return version_cache
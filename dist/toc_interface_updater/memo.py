@@ -0,0 +1,40 @@
+"""Bounded memoization of results that depend on the resolved versions."""
+
+from typing import Dict, FrozenSet, Generic, Hashable, Optional, TypeVar
+
+from .types import VersionCache
+
+T = TypeVar("T")
+
+# Entries kept before a memo is cleared
+DEFAULT_MAX_SIZE = 4096
+
+
+def version_cache_fingerprint(version_cache: VersionCache) -> FrozenSet:
+    """
+    Get a hashable snapshot of a version cache, which changes with its content.
+    The cache is copied first, as worker threads may be adding to it.
+    """
+    return frozenset(version_cache.copy().items())
+
+
+class BoundedMemo(Generic[T]):
+    """Memoized results, cleared when max_size is reached to bound memory use."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._results: Dict[Hashable, T] = {}
+
+    def get(self, key: Hashable) -> Optional[T]:
+        return self._results.get(key)
+
+    def put(self, key: Hashable, result: T) -> None:
+        if len(self._results) >= self.max_size:
+            self._results.clear()
+        self._results[key] = result
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
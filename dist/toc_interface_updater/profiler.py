@@ -0,0 +1,171 @@
+"""Opt-in profiling of where a run spends its time, by phase."""
+
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Optional
+
+from .console import get_console
+
+# Phases in the order they're reported, others follow in name order
+PHASES = (
+    "walk",
+    "read",
+    "normalize",
+    "detect",
+    "resolve",
+    "http",
+    "render",
+    "write",
+)
+
+# Returned by disabled profilers so unprofiled runs only pay for a function call
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    """Context manager timing one call of a phase."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """
+    Accumulates wall time and call counts per phase, and named counters such
+    as cache hits. Phases may nest, e.g. "http" inside "resolve" when a version
+    is only fetched when first needed, and times from worker threads are summed.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # Phase name -> [calls, total seconds]
+        self.phases: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Time a block of code as a call of the named phase."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def add(self, name: str, elapsed: float) -> None:
+        """Record a call of a phase that took elapsed seconds."""
+        with self._lock:
+            stats = self.phases.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment a named counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(
+        self, elapsed: Optional[float] = None, peak_memory: Optional[int] = None
+    ) -> List[str]:
+        """Format the recorded phases and counters as table lines."""
+        order = {name: index for index, name in enumerate(PHASES)}
+        names = sorted(
+            self.phases,
+            key=lambda name: (order.get(name.split(" ")[0], len(PHASES)), name),
+        )
+        width = max([len("Phase"), *map(len, names), *map(len, self.counters)])
+
+        lines = [
+            f"{'Phase':<{width}}  {'Calls':>8}  {'Total (s)':>10}  {'Avg (ms)':>9}"
+        ]
+        for name in names:
+            calls, total = self.phases[name]
+            lines.append(
+                f"{name:<{width}}  {int(calls):>8}  {total:>10.4f}  {total / calls * 1000:>9.3f}"
+            )
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'Counter':<{width}}  {'Count':>8}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<{width}}  {value:>8}")
+        if elapsed is not None or peak_memory is not None:
+            lines.append("")
+        if elapsed is not None:
+            lines.append(f"Total time: {elapsed:.4f} s")
+        if peak_memory is not None:
+            lines.append(f"Peak memory: {peak_memory / (1024 * 1024):.2f} MiB")
+        return lines
+
+
+class ProfileSession:
+    """
+    Tracks the total time and peak memory of a profiled run, and optionally
+    collects cProfile stats of the main thread.
+    """
+
+    def __init__(self, profiler: Profiler, stats_path: Optional[str] = None):
+        self.profiler = profiler
+        self.stats_path = stats_path
+        self.stats = None
+        self.start_time = 0.0
+
+    def start(self) -> None:
+        tracemalloc.start()
+        if self.stats_path:
+            # Imported here as it's only needed for raw stats
+            import cProfile
+
+            self.stats = cProfile.Profile()
+            self.stats.enable()
+        self.start_time = time.perf_counter()
+
+    def finish(self) -> List[str]:
+        """Stop profiling, write any cProfile stats and get the report lines."""
+        elapsed = time.perf_counter() - self.start_time
+        if self.stats is not None:
+            self.stats.disable()
+            try:
+                self.stats.dump_stats(self.stats_path)
+            except OSError as e:
+                get_console().warning(
+                    f"Unable to write profile stats {self.stats_path}: {e}"
+                )
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return self.profiler.report(elapsed, peak_memory)
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """Get the profiler phases are recorded with."""
+    return _profiler
+
+
+def set_profiler(profiler: Profiler) -> Profiler:
+    """Replace the shared profiler, returning the previous one."""
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    return previous
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Time a block of code as a call of the named phase on the shared profiler."""
+    return _profiler.phase(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Increment a named counter on the shared profiler."""
+    _profiler.count(name, amount)
@@ -0,0 +1,164 @@
+"""Per-file state used to skip TOC files that can't have changed since the last run."""
+
+import hashlib
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+from .console import get_console
+from .json_file import (
+    Check,
+    is_int,
+    is_str,
+    load_record,
+    optional,
+    read_json_object,
+    write_json_atomic,
+)
+from .types import Product, VersionCache
+
+STATE_FORMAT_VERSION = 1
+
+
+def options_fingerprint(flavor: str, beta: bool, test: bool) -> str:
+    """Get a fingerprint of the options that affect how files are updated."""
+    return f"{flavor}:{int(beta)}:{int(test)}"
+
+
+def hash_file(path: str) -> str:
+    """Get the SHA-256 digest of a file's content."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+@dataclass
+class FileState:
+    """A file as it was left by the last run, and the versions it was updated with."""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    # Versions are stored as numbers, matching InterfaceVersion values
+    versions: Dict[Product, Optional[int]] = field(default_factory=dict)
+
+    def is_current(self, version_cache: VersionCache) -> bool:
+        """Check whether the file was last updated with the versions now resolved."""
+        return all(
+            product in version_cache and version_cache[product] == version
+            for product, version in self.versions.items()
+        )
+
+
+def _is_versions(value) -> bool:
+    return isinstance(value, dict) and all(map(optional(is_int), value.values()))
+
+
+# Types of the stored fields, entries with others are discarded
+ENTRY_CHECKS: Dict[str, Check] = {
+    "size": is_int,
+    "mtime_ns": is_int,
+    "sha256": is_str,
+    "versions": _is_versions,
+}
+
+
+def _key(path: str) -> str:
+    """Normalize a path, so files walked from a directory and given directly match."""
+    return os.path.normpath(path)
+
+
+class StateManifest:
+    """
+    JSON-backed record of the files seen by previous runs.
+    Entries recorded under different options are discarded when loading.
+    """
+
+    def __init__(self, path: str, options: str):
+        self.path = path
+        self.options = options
+        self.previous: Dict[str, FileState] = {}
+        self.files: Dict[str, FileState] = {}
+
+    @classmethod
+    def load(cls, path: str, options: str) -> "StateManifest":
+        """Load the state from disk, starting empty if it is missing, unreadable or stale."""
+        state = cls(path, options)
+
+        data = read_json_object(path, STATE_FORMAT_VERSION)
+        if data is None or data.get("options") != options:
+            return state
+        files = data.get("files")
+        if not isinstance(files, dict):
+            return state
+
+        # Malformed entries are discarded, so those files are processed again
+        for file_path, entry in files.items():
+            entry = load_record(FileState, entry, ENTRY_CHECKS)
+            if entry is not None:
+                state.previous[_key(file_path)] = entry
+
+        return state
+
+    def check(self, path: str) -> Optional[FileState]:
+        """
+        Get the previous state of a file if its content is unchanged.
+        Only the file's stat is needed unless its mtime changed without its size,
+        in which case the content hash decides.
+        """
+        previous = self.previous.get(_key(path))
+        if previous is None:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_size != previous.size:
+            return None
+        if stat.st_mtime_ns != previous.mtime_ns:
+            try:
+                if hash_file(path) != previous.sha256:
+                    return None
+            except OSError:
+                return None
+            # Touched but not modified, e.g. by a checkout
+            previous.mtime_ns = stat.st_mtime_ns
+        return previous
+
+    def keep(self, path: str, previous: FileState) -> None:
+        """Carry the previous state of an unchanged file over to this run."""
+        self.files[_key(path)] = previous
+
+    def record(self, path: str, versions: Dict[Product, Optional[int]]) -> None:
+        """Record a file as it is after being processed with the given versions."""
+        try:
+            stat = os.stat(path)
+            digest = hash_file(path)
+        except OSError:
+            return
+        self.files[_key(path)] = FileState(
+            stat.st_size, stat.st_mtime_ns, digest, dict(versions)
+        )
+
+    def save(self) -> None:
+        """
+        Atomically write the state of the files seen by this run.
+        Files from earlier runs that weren't visited, e.g. because only some
+        paths were given, are kept as long as they still exist.
+        """
+        files = dict(self.files)
+        for path, entry in self.previous.items():
+            if path not in files and os.path.exists(path):
+                files[path] = entry
+
+        data = {
+            "format": STATE_FORMAT_VERSION,
+            "options": self.options,
+            "files": {path: asdict(entry) for path, entry in sorted(files.items())},
+        }
+
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            get_console().warning(f"Unable to write state file {self.path}: {e}")
@@ -0,0 +1,68 @@
+"""Parsed TOC metadata with an index of its interface directives."""
+
+import re
+from typing import Dict, List, Union
+
+from .constants import InterfaceDirective
+
+# "## Interface...:" directive name and the value after it
+DIRECTIVE_LINE = re.compile(f"({re.escape(InterfaceDirective.PREFIX)}[^:]*:)(.*)")
+
+
+class TocDocument:
+    """
+    TOC content split into lines, indexing every interface directive once.
+    Directives are keyed by their full name including the colon, e.g. "## Interface:".
+    """
+
+    __slots__ = ("lines", "directives")
+
+    def __init__(self, content: str):
+        self.lines = content.split("\n")
+        # Directive name -> indexes of the lines it appears on, in order
+        self.directives: Dict[str, List[int]] = {}
+        for index, line in enumerate(self.lines):
+            if not line.startswith(InterfaceDirective.PREFIX):
+                continue
+            match = DIRECTIVE_LINE.match(line)
+            if match:
+                self.directives.setdefault(match.group(1), []).append(index)
+
+    def has(self, directive: str) -> bool:
+        """Check whether the directive appears in the document."""
+        return directive in self.directives
+
+    def value(self, directive: str, index: int) -> str:
+        """Get the raw value of a directive on the given line."""
+        return self.lines[index][len(directive) :]
+
+    def values(self, directive: str) -> List[str]:
+        """Get the comma-separated values of the first occurrence of a directive."""
+        indexes = self.directives.get(directive)
+        if not indexes:
+            return []
+        return [v.strip() for v in self.value(directive, indexes[0]).split(",")]
+
+    def first_multi_value(self, directive: str) -> List[str]:
+        """Get the values of the first occurrence of a directive with several values."""
+        for index in self.directives.get(directive, []):
+            value = self.value(directive, index)
+            if "," in value:
+                return [v.strip() for v in value.split(",")]
+        return []
+
+    def set(self, directive: str, value: str) -> None:
+        """Replace the value of every occurrence of a directive."""
+        for index in self.directives.get(directive, []):
+            self.lines[index] = f"{directive} {value}"
+
+    def text(self) -> str:
+        """Get the document content."""
+        return "\n".join(self.lines)
+
+
+def as_document(content: Union[str, TocDocument]) -> TocDocument:
+    """Parse content into a document, unless it already is one."""
+    if isinstance(content, TocDocument):
+        return content
+    return TocDocument(content)
@@ -0,0 +1,362 @@
+"""Shared HTTP transport used for all requests to the Battle.net version servers."""
+
+import abc
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5  # seconds, doubled on every attempt
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+# Consecutive connection failures or timeouts before no more requests are made
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Responses with these statuses are considered transient and retried
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Transport implementations selectable from the command line
+TRANSPORT_STDLIB = "stdlib"
+TRANSPORT_REQUESTS = "requests"
+TRANSPORTS = [TRANSPORT_STDLIB, TRANSPORT_REQUESTS]
+
+# Proxy schemes, as named by urllib.request.getproxies()
+PROXY_SCHEMES = ("http", "https", "all")
+# CA bundles used instead of the system certificates, as requests does
+CA_BUNDLE_VARIABLES = ("REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE")
+
+
+class TransportError(Exception):
+    """Raised when a request can't be completed, after all retries."""
+
+
+@dataclass
+class HttpResponse:
+    """Status, body and (case-insensitive) headers of a completed request."""
+
+    status: int
+    text: str
+    headers: Mapping[str, str]
+    reason: str = ""
+
+
+class Transport(abc.ABC):
+    """
+    Base HTTP client with retries and jittered exponential backoff.
+    A circuit breaker stops all requests after repeated connection failures, and
+    an optional deadline bounds the total time spent on the network.
+    Subclasses implement _send() for a single attempt.
+    """
+
+    def __init__(
+        self,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        deadline: Optional[float] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        # Deadline is given in seconds and starts counting at the first request,
+        # so work done before any version is needed doesn't use up the budget
+        self.deadline = deadline
+        self._deadline_at: Optional[float] = None
+
+        self._consecutive_failures = 0
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _send(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        timeout: Tuple[float, float],
+    ) -> HttpResponse:
+        """
+        Perform a single request attempt.
+        Raises OSError (e.g. ConnectionError, TimeoutError) for connection failures.
+        """
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Get the "full jitter" delay before retrying the given attempt."""
+        return random.uniform(0, self.backoff * 2**attempt)  # nosec B311
+
+    def remaining(self) -> Optional[float]:
+        """Get the seconds left before the deadline, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        if self._deadline_at is None:
+            return self.deadline
+        return self._deadline_at - time.monotonic()
+
+    def _start_deadline(self) -> None:
+        """Start the deadline clock, if it isn't already running."""
+        if self.deadline is None:
+            return
+        with self._lock:
+            if self._deadline_at is None:
+                self._deadline_at = time.monotonic() + self.deadline
+
+    @property
+    def circuit_open(self) -> bool:
+        """Whether repeated failures have stopped all further requests."""
+        with self._lock:
+            return 0 < self.failure_threshold <= self._consecutive_failures
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+
+    def _check_available(self) -> Tuple[float, float]:
+        """Get the timeouts for the next attempt, or raise if none may be made."""
+        if self.circuit_open:
+            raise TransportError(
+                f"Not contacting the server after {self.failure_threshold} consecutive failures"
+            )
+
+        remaining = self.remaining()
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        if remaining <= 0:
+            raise TransportError("Network deadline exceeded")
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def get(
+        self, url: str, headers: Optional[Mapping[str, str]] = None
+    ) -> HttpResponse:
+        """Perform a GET request, retrying transient failures."""
+        self._start_deadline()
+        attempt = 0
+        while True:
+            timeout = self._check_available()
+            try:
+                response = self._send(url, headers, timeout)
+            except OSError as e:
+                self._record_failure()
+                error = TransportError(str(e) or type(e).__name__)
+            else:
+                self._record_success()
+                if response.status not in RETRY_STATUSES:
+                    if response.status >= 400:
+                        raise TransportError(
+                            f"{response.status} {response.reason} for url: {url}"
+                        )
+                    return response
+                error = TransportError(
+                    f"{response.status} {response.reason} for url: {url}"
+                )
+
+            if attempt >= self.retries:
+                raise error
+            delay = self.backoff_delay(attempt)
+            remaining = self.remaining()
+            if remaining is not None and delay >= remaining:
+                raise error
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:  # noqa: B027 - nothing to release by default
+        """Close all pooled connections."""
+
+
+class HttpClientTransport(Transport):
+    """
+    Transport built on http.client, keeping connections alive per host.
+    It doesn't import the requests stack, so short runs start quickly.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ssl_context = None
+        self._idle: Dict[Tuple[str, str, Optional[int]], List] = {}
+        self._pool_lock = threading.Lock()
+
+    def _create_ssl_context(self):
+        import ssl
+
+        for name in CA_BUNDLE_VARIABLES:
+            if os.environ.get(name):
+                return ssl.create_default_context(cafile=os.environ[name])
+
+        context = ssl.create_default_context()
+        if not context.cert_store_stats()["x509_ca"]:
+            # No system certificates, use the bundled ones if available
+            try:
+                import certifi
+
+                context.load_verify_locations(certifi.where())
+            except ImportError:
+                pass
+        return context
+
+    def _acquire(self, scheme: str, host: str, port: Optional[int], timeout: float):
+        """Get an idle connection for the host or a new one, as (connection, reused)."""
+        import http.client
+
+        with self._pool_lock:
+            idle = self._idle.get((scheme, host, port))
+            if idle:
+                return idle.pop(), True
+            if scheme == "https" and self._ssl_context is None:
+                self._ssl_context = self._create_ssl_context()
+
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=self._ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        return connection, False
+
+    def _release(self, scheme: str, host: str, port: Optional[int], connection):
+        """Return a connection to the pool, closing it if the pool is full."""
+        with self._pool_lock:
+            idle = self._idle.setdefault((scheme, host, port), [])
+            if len(idle) < self.pool_size:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _send(self, url, headers, timeout):
+        import http.client
+
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        connect_timeout, read_timeout = timeout
+
+        while True:
+            connection, reused = self._acquire(
+                parts.scheme, parts.hostname, parts.port, connect_timeout
+            )
+            try:
+                if connection.sock is None:
+                    connection.timeout = connect_timeout
+                    connection.connect()
+                connection.sock.settimeout(read_timeout)
+                connection.request("GET", path, headers=dict(headers or {}))
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused and isinstance(
+                    e, (http.client.RemoteDisconnected, ConnectionResetError)
+                ):
+                    # The server dropped an idle keep-alive connection, reconnect
+                    continue
+                if isinstance(e, OSError):
+                    raise
+                raise ConnectionError(str(e)) from e
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(parts.scheme, parts.hostname, parts.port, connection)
+
+            charset = response.headers.get_content_charset() or "utf-8"
+            return HttpResponse(
+                response.status,
+                body.decode(charset, errors="replace"),
+                response.headers,
+                response.reason,
+            )
+
+    def close(self) -> None:
+        with self._pool_lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class RequestsTransport(Transport):
+    """Transport built on a pooled requests.Session, imported on first use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        # Retries are handled by Transport so they apply to statuses and errors alike
+        adapter = HTTPAdapter(pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _send(self, url, headers, timeout):
+        import requests
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ConnectionError(str(e)) from e
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        return HttpResponse(
+            response.status_code, response.text, response.headers, response.reason
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def proxy_configured() -> bool:
+    """Check whether the environment configures a proxy for version requests."""
+    from urllib.request import getproxies
+
+    proxies = getproxies()
+    return any(proxies.get(scheme) for scheme in PROXY_SCHEMES)
+
+
+def create_transport(kind: str = TRANSPORT_STDLIB, **options) -> Transport:
+    """
+    Create a transport of the given kind. The stdlib transport only makes direct
+    connections, so requests is used instead when a proxy is configured and
+    requests is installed.
+    """
+    if kind == TRANSPORT_REQUESTS:
+        return RequestsTransport(**options)
+    if proxy_configured():
+        try:
+            return RequestsTransport(**options)
+        except ImportError:
+            pass
+    return HttpClientTransport(**options)
+
+
+_default_transport: Optional[Transport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Get the transport shared by all product lookups, creating it on first use."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = create_transport()
+        return _default_transport
+
+
+def set_transport(transport: Optional[Transport]) -> Optional[Transport]:
+    """Replace the shared transport, returning the previous one."""
+    global _default_transport
+    with _default_transport_lock:
+        previous, _default_transport = _default_transport, transport
+        return previous
@@ -1,10 +1,19 @@
 """Version resolution logic for different WoW products."""
 
-import re
-from typing import List, Set
+from typing import FrozenSet, List, Set, Union, get_args
 
 from .constants import InterfaceDirective
-from .types import BetaProduct, FullProduct, TestProduct, VersionCache
+from .memo import BoundedMemo, version_cache_fingerprint
+from .profiler import count, phase
+from .toc_document import TocDocument, as_document
+from .types import (
+    BetaProduct,
+    FullProduct,
+    InterfaceVersion,
+    Product,
+    TestProduct,
+    VersionCache,
+)
 
 
 def get_beta_products(product: FullProduct) -> List[BetaProduct]:
@@ -27,141 +36,146 @@ def get_test_products(product: FullProduct) -> List[TestProduct]:
     return []
 
 
+def get_all_products() -> List[Product]:
+    """Get every known product."""
+    return [product for group in get_args(Product) for product in get_args(group)]
+
+
+def get_lookup_products(product: FullProduct, beta: bool, test: bool) -> List[Product]:
+    """Get the products looked up when resolving versions for a full product."""
+    products: List[Product] = [product]
+    if beta:
+        products.extend(get_beta_products(product))
+    if test:
+        products.extend(get_test_products(product))
+    return products
+
+
+def get_product_for_version(version: Union[str, InterfaceVersion]) -> FullProduct:
+    """Get the full product an interface version belongs to, by its major version."""
+    major = InterfaceVersion.parse(version).major
+    if major == 1:
+        return "wow_classic_era"
+    elif major < 11:
+        return "wow_classic"
+    return "wow"
+
+
+def get_product_directives(product: FullProduct, multi: bool) -> List[str]:
+    """Get the directives holding a product's versions in the multi-line format."""
+    if not multi:
+        return [InterfaceDirective.BASE]
+    if product == "wow_classic":
+        return [InterfaceDirective.CURRENT_CLASSIC, InterfaceDirective.CLASSIC]
+    elif product == "wow_classic_era":
+        return [InterfaceDirective.VANILLA]
+    return []
+
+
+def has_interface_directive(
+    content: Union[str, TocDocument],
+    product: FullProduct,
+    multi: bool,
+    single_line_multi: bool,
+) -> bool:
+    """Check whether the content has a directive that would be updated for the product."""
+    document = as_document(content)
+    return any(
+        document.has(directive)
+        for directive in get_product_directives(
+            product, multi and not single_line_multi
+        )
+    )
+
+
+def get_needed_products(
+    content: Union[str, TocDocument],
+    product: FullProduct,
+    multi: bool,
+    beta: bool,
+    test: bool,
+) -> Set[Product]:
+    """Get the products needed to update the content for a product without fetching."""
+    document = as_document(content)
+    detected_versions, single_line_multi = detect_existing_versions(
+        document, product, multi
+    )
+
+    if detected_versions:
+        return {
+            lookup_product
+            for version in detected_versions
+            for lookup_product in get_lookup_products(
+                get_product_for_version(version), beta, test
+            )
+        }
+
+    if has_interface_directive(document, product, multi, single_line_multi):
+        return set(get_lookup_products(product, beta, test))
+
+    return set()
+
+
 def detect_existing_versions(
-    content: str, product: FullProduct, multi: bool
+    content: Union[str, TocDocument], product: FullProduct, multi: bool
 ) -> tuple[Set[str], bool]:
     """
     Detect existing versions from the content and determine if it's single line multi.
     Returns (detected_versions, is_single_line_multi)
     """
+    document = as_document(content)
+
     # Check if it's single line multi-version format (comma-separated)
-    single_line_pattern = re.compile(
-        f"^({re.escape(InterfaceDirective.BASE)}).*\\,.*$", flags=re.MULTILINE
-    )
-    single_line_multi = bool(single_line_pattern.search(content))
-
-    if single_line_multi:
-        single_line_multi = not multi
-        if single_line_multi:
-            detected_version_strings = (
-                single_line_pattern.search(content)
-                .group(0)
-                .split(":")[1]
-                .strip()
-                .split(",")
-            )
-            return set(v.strip() for v in detected_version_strings), single_line_multi
+    single_line_versions = document.first_multi_value(InterfaceDirective.BASE)
+    if single_line_versions and not multi:
+        return set(v for v in single_line_versions if v), True
 
     # Handle multi-line detection for specific products
-    detected_version_strings = []
-    if product == "wow_classic":
-        # Check for Current Classic directive
-        current_classic_pattern = re.compile(
-            InterfaceDirective.get_directive_pattern(
-                InterfaceDirective.CURRENT_CLASSIC
-            ),
-            flags=re.MULTILINE,
-        )
-        classic_pattern = re.compile(
-            InterfaceDirective.get_directive_pattern(InterfaceDirective.CLASSIC),
-            flags=re.MULTILINE,
-        )
+    detected_version_strings: List[str] = []
+    if product in ("wow_classic", "wow_classic_era"):
+        for directive in get_product_directives(product, True):
+            detected_version_strings.extend(document.values(directive))
 
-        if current_classic_pattern.search(content):
-            detected_version_strings.extend(
-                current_classic_pattern.search(content)
-                .group(0)
-                .split(":")[1]
-                .strip()
-                .split(",")
-            )
-        if classic_pattern.search(content):
-            detected_version_strings.extend(
-                classic_pattern.search(content)
-                .group(0)
-                .split(":")[1]
-                .strip()
-                .split(",")
-            )
-    elif product == "wow_classic_era":
-        vanilla_pattern = re.compile(
-            InterfaceDirective.get_directive_pattern(InterfaceDirective.VANILLA),
-            flags=re.MULTILINE,
-        )
-        if vanilla_pattern.search(content):
-            detected_version_strings.extend(
-                vanilla_pattern.search(content)
-                .group(0)
-                .split(":")[1]
-                .strip()
-                .split(",")
-            )
-
-    return (
-        set(v.strip() for v in detected_version_strings if v.strip()),
-        single_line_multi,
-    )
+    return set(v for v in detected_version_strings if v), False
 
 
 def get_versions_from_detected(
     detected_versions: Set[str], beta: bool, test: bool, version_cache: VersionCache
-) -> Set[str]:
+) -> Set[InterfaceVersion]:
     """Convert detected version strings to actual versions with beta/test support."""
     from .version_client import product_version  # Import here to avoid circular imports
 
-    versions: Set[str] = set()
-
-    for d_version in detected_versions:
-        if d_version.strip() not in versions:
-            major = int(d_version.strip()[:-4])
-
-            if major == 1:
-                versions.add(product_version("wow_classic_era", version_cache))
-                if test:
-                    classic_era_ptr_version = product_version(
-                        "wow_classic_era_ptr", version_cache
-                    )
-                    if int(d_version) < int(classic_era_ptr_version):
-                        versions.add(classic_era_ptr_version)
-            elif major < 11:
-                versions.add(product_version("wow_classic", version_cache))
-                if beta:
-                    classic_beta_version = product_version(
-                        "wow_classic_beta", version_cache
-                    )
-                    if int(d_version) < int(classic_beta_version):
-                        versions.add(classic_beta_version)
-                if test:
-                    classic_ptr_version = product_version(
-                        "wow_classic_ptr", version_cache
-                    )
-                    if int(d_version) < int(classic_ptr_version):
-                        versions.add(classic_ptr_version)
-            else:
-                versions.add(product_version("wow", version_cache))
-                if beta:
-                    beta_version = product_version("wow_beta", version_cache)
-                    if int(d_version) < int(beta_version):
+    versions: Set[InterfaceVersion] = set()
+
+    # Lowest first, as versions already resolved are skipped and a set's
+    # order would otherwise make the result differ from run to run
+    for d_version in sorted(map(InterfaceVersion.parse, detected_versions)):
+        if d_version not in versions:
+            product = get_product_for_version(d_version)
+            versions.add(product_version(product, version_cache))
+
+            if beta:
+                for beta_product in get_beta_products(product):
+                    beta_version = product_version(beta_product, version_cache)
+                    if d_version < beta_version:
                         versions.add(beta_version)
-                if test:
-                    ptr_version = product_version("wowt", version_cache)
-                    if int(d_version) < int(ptr_version):
-                        versions.add(ptr_version)
-                    ptr_version = product_version("wowxptr", version_cache)
-                    if int(d_version) < int(ptr_version):
-                        versions.add(ptr_version)
+            if test:
+                for test_product in get_test_products(product):
+                    test_version = product_version(test_product, version_cache)
+                    if d_version < test_version:
+                        versions.add(test_version)
 
     return versions
 
 
 def collect_all_versions(
     product: FullProduct, beta: bool, test: bool, version_cache: VersionCache
-) -> Set[str]:
+) -> Set[InterfaceVersion]:
     """Collect all versions (base, beta, test) for a product."""
     from .version_client import product_version  # Import here to avoid circular imports
 
     base_version = product_version(product, version_cache)
-    versions: Set[str] = {base_version}
+    versions: Set[InterfaceVersion] = {base_version}
 
     # Handle beta versions
     if beta:
@@ -178,3 +192,54 @@ def collect_all_versions(
                 versions.add(test_version)
 
     return versions
+
+
+# Rendered interface strings by (product, detected versions, beta, test, version cache)
+_interface_cache: BoundedMemo[str] = BoundedMemo()
+
+
+def resolve_interface(
+    product: FullProduct,
+    detected_versions: FrozenSet[str],
+    beta: bool,
+    test: bool,
+    version_cache: VersionCache,
+) -> str:
+    """
+    Get the interface value for a product's directive, given the versions it has now.
+    Results are memoized, so files with the same versions share one resolution.
+    Raises VersionUnavailable if a needed version couldn't be fetched.
+    """
+    known_products = len(version_cache)
+    key = (
+        product,
+        detected_versions,
+        beta,
+        test,
+        version_cache_fingerprint(version_cache),
+    )
+    interface = _interface_cache.get(key)
+    if interface is not None:
+        count("interface cache hit")
+        return interface
+    count("interface cache miss")
+
+    with phase("resolve"):
+        if detected_versions:
+            versions = get_versions_from_detected(
+                set(detected_versions), beta, test, version_cache
+            )
+        else:
+            # Get all versions for this product
+            versions = collect_all_versions(product, beta, test, version_cache)
+        interface = ", ".join(map(str, sorted(versions)))
+
+    # Versions are only ever added, so if none were fetched the key still holds
+    if len(version_cache) == known_products:
+        _interface_cache.put(key, interface)
+    return interface
+
+
+def clear_interface_cache() -> None:
+    """Forget all memoized interface resolutions."""
+    _interface_cache.clear()
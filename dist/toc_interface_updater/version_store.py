@@ -0,0 +1,140 @@
+"""Persistent on-disk storage for product versions fetched from Battle.net."""
+
+import os
+import threading
+from concurrent.futures import Future, wait
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from .console import get_console
+from .json_file import (
+    Check,
+    is_digits,
+    is_number,
+    is_str,
+    load_record,
+    optional,
+    read_json_object,
+    write_json_atomic,
+)
+from .types import Product
+
+# Entries younger than this many seconds are used without any network access
+DEFAULT_TTL = 300
+# Expired entries are still served for this long while being revalidated
+DEFAULT_STALE_WHILE_REVALIDATE = 3600
+
+CACHE_FILE_NAME = "versions.json"
+CACHE_FORMAT_VERSION = 1
+
+
+def default_cache_dir() -> str:
+    """Get the cache directory, honouring $XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "toc-interface-updater")
+
+
+@dataclass
+class StoreEntry:
+    """A fetched product version along with its raw payload and validators."""
+
+    version: str
+    payload: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+# Types of the stored fields, entries with others are discarded
+ENTRY_CHECKS: Dict[str, Check] = {
+    "version": is_digits,
+    "payload": is_str,
+    "fetched_at": is_number,
+    "etag": optional(is_str),
+    "last_modified": optional(is_str),
+}
+
+
+class VersionStore:
+    """JSON-backed product version cache with TTL and stale-while-revalidate."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        stale_while_revalidate: float = DEFAULT_STALE_WHILE_REVALIDATE,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries: Dict[Product, StoreEntry] = {}
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        cache_dir: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        stale_while_revalidate: float = DEFAULT_STALE_WHILE_REVALIDATE,
+    ) -> "VersionStore":
+        """Load the store from disk, starting empty if it is missing or unreadable."""
+        path = os.path.join(cache_dir or default_cache_dir(), CACHE_FILE_NAME)
+        store = cls(path, ttl, stale_while_revalidate)
+
+        data = read_json_object(path, CACHE_FORMAT_VERSION)
+        products = data.get("products") if data is not None else None
+        if not isinstance(products, dict):
+            return store
+
+        # Malformed entries are discarded, so they're fetched again
+        for product, entry in products.items():
+            entry = load_record(StoreEntry, entry, ENTRY_CHECKS)
+            if entry is not None:
+                store._entries[product] = entry
+
+        return store
+
+    def get(self, product: Product) -> Optional[StoreEntry]:
+        """Get the stored entry for a product, if any."""
+        with self._lock:
+            return self._entries.get(product)
+
+    def put(self, product: Product, entry: StoreEntry) -> None:
+        """Store the entry for a product."""
+        with self._lock:
+            self._entries[product] = entry
+
+    def is_fresh(self, entry: StoreEntry, now: float) -> bool:
+        """Check whether an entry can be used without contacting the server."""
+        return now - entry.fetched_at < self.ttl
+
+    def is_revalidatable(self, entry: StoreEntry, now: float) -> bool:
+        """Check whether an expired entry can still be served while revalidating."""
+        return now - entry.fetched_at < self.ttl + self.stale_while_revalidate
+
+    def track(self, future: Future) -> None:
+        """Register a background revalidation that must finish before saving."""
+        with self._lock:
+            self._pending.append(future)
+
+    def save(self) -> None:
+        """Wait for background revalidations, then atomically write the store."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+
+        with self._lock:
+            data = {
+                "format": CACHE_FORMAT_VERSION,
+                "products": {
+                    product: asdict(entry) for product, entry in self._entries.items()
+                },
+            }
+
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            get_console().warning(f"Unable to write version cache {self.path}: {e}")
@@ -0,0 +1,164 @@
+"""Directory walker finding TOC files while skipping directories that can't hold addons."""
+
+import os
+import sys
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Directories never searched for TOC files unless default excludes are disabled
+DEFAULT_EXCLUDES = (
+    ".git",
+    ".hg",
+    ".svn",
+    ".release",
+    ".venv",
+    "__pycache__",
+    "node_modules",
+    "Libs",
+    "libs",
+)
+
+# Optional file in the root directory listing extra exclude patterns, one per line
+IGNORE_FILE = ".tocupdaterignore"
+
+
+class ExcludeRules:
+    """
+    Glob patterns matched against entry names, or against the path relative to
+    the root when the pattern contains a "/". A trailing "/" only matches directories.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.name_patterns: List[str] = []
+        self.path_patterns: List[str] = []
+        self.dir_name_patterns: List[str] = []
+        self.dir_path_patterns: List[str] = []
+
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if "/" in pattern:
+                target = self.dir_path_patterns if dir_only else self.path_patterns
+                target.append(pattern.lstrip("/"))
+            else:
+                target = self.dir_name_patterns if dir_only else self.name_patterns
+                target.append(pattern)
+
+    def excludes(self, name: str, rel_path: str, is_dir: bool) -> bool:
+        """Check whether an entry is excluded, given its name and relative path."""
+        name_patterns = self.name_patterns
+        path_patterns = self.path_patterns
+        if is_dir:
+            name_patterns = name_patterns + self.dir_name_patterns
+            path_patterns = path_patterns + self.dir_path_patterns
+        return any(fnmatchcase(name, p) for p in name_patterns) or any(
+            fnmatchcase(rel_path, p) for p in path_patterns
+        )
+
+
+def read_ignore_file(path: str) -> List[str]:
+    """Read exclude patterns from an ignore file, returning none if it doesn't exist."""
+    try:
+        with open(path, "r") as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def build_exclude_rules(
+    root: str = ".",
+    excludes: Optional[Sequence[str]] = None,
+    default_excludes: bool = True,
+    ignore_file: Optional[str] = IGNORE_FILE,
+) -> ExcludeRules:
+    """Combine the default excludes, the root's ignore file and extra patterns."""
+    patterns: List[str] = (
+        [f"{name}/" for name in DEFAULT_EXCLUDES] if default_excludes else []
+    )
+    if ignore_file:
+        patterns.extend(read_ignore_file(os.path.join(root, ignore_file)))
+    patterns.extend(excludes or [])
+    return ExcludeRules(patterns)
+
+
+def walk_toc_files(
+    root: str = ".", rules: Optional[ExcludeRules] = None, rel_root: str = ""
+) -> List[str]:
+    """
+    Find all .toc files under root, in sorted order.
+    Excluded directories are never entered, and only entries named *.toc are
+    checked beyond the type information returned by scandir.
+    Path patterns are matched against paths under rel_root, the root's path
+    relative to where the rules apply.
+    """
+    if rules is None:
+        rules = build_exclude_rules(root)
+
+    toc_files: List[str] = []
+    # (directory path, path relative to the rules' root) pairs still to be scanned
+    pending = [(root, rel_root)]
+    while pending:
+        dir_path, rel_dir = pending.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            # Unreadable or vanished directories are skipped, like os.walk does
+            continue
+
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if not rules.excludes(name, rel_path, True):
+                        pending.append((entry.path, rel_path))
+                elif name.endswith(".toc") and not rules.excludes(
+                    name, rel_path, False
+                ):
+                    toc_files.append(entry.path)
+
+    toc_files.sort()
+    return toc_files
+
+
+def read_file_list(path: str) -> List[str]:
+    """
+    Read a list of paths from a file, or from stdin when the path is "-".
+    Paths are NUL separated if the list contains a NUL, otherwise one per line.
+    """
+    if path == "-":
+        content = sys.stdin.read()
+    else:
+        with open(path, "r") as f:
+            content = f.read()
+    separator = "\0" if "\0" in content else "\n"
+    return [line.rstrip("\r") for line in content.split(separator) if line.strip()]
+
+
+def collect_toc_files(paths: Sequence[str], rules: ExcludeRules) -> List[str]:
+    """
+    Get the .toc files to process for explicit paths.
+    Directories are walked, while files are used as given if they are TOC files.
+    Raises FileNotFoundError for paths that don't exist.
+    """
+    toc_files: Dict[str, None] = {}
+    for path in paths:
+        if os.path.isdir(path):
+            # Exclude patterns are relative to the current directory
+            rel_root = os.path.normpath(os.path.relpath(path)).replace(os.sep, "/")
+            if rel_root == ".":
+                rel_root = ""
+            toc_files.update(dict.fromkeys(walk_toc_files(path, rules, rel_root)))
+        elif os.path.exists(path):
+            if path.endswith(".toc"):
+                toc_files[path] = None
+        else:
+            raise FileNotFoundError(path)
+    return list(toc_files)
@@ -1,5 +1,9 @@
+import os
+
 import pytest
 
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
 
 @pytest.fixture
 def toc_files(tmp_path):
@@ -22,8 +26,33 @@ def toc_files(tmp_path):
     return tmp_path
 
 
+@pytest.fixture(scope="session")
+def version_server_session():
+    from toc_interface_updater.version_server import VersionServer, load_fixtures
+
+    responses = load_fixtures(os.path.join(FIXTURES_DIR, "versions"))
+    with VersionServer(responses) as server:
+        yield server
+
+
+@pytest.fixture
+def version_server(version_server_session, monkeypatch):
+    """Point version lookups at a local server answering from the BPSV fixtures."""
+    from toc_interface_updater.transport import create_transport, set_transport
+    from toc_interface_updater.version_client import BASE_URL_ENV
+
+    monkeypatch.setenv(BASE_URL_ENV, version_server_session.url)
+    version_server_session.requests.clear()
+    # Start with a fresh transport, earlier failures may have opened the breaker
+    transport = create_transport()
+    previous = set_transport(transport)
+    yield version_server_session
+    set_transport(previous)
+    transport.close()
+
+
 @pytest.fixture
-def product_versions():
+def product_versions(version_server):
     from toc_interface_updater.version_client import product_version
 
     versions = {}
@@ -39,4 +68,34 @@ def product_versions():
     # The product exists but there is no version information for it
     # product_version("wow_classic_era_beta", versions)
 
-    return versions
+    # Expected file content is built from the version strings
+    return {product: str(version) for product, version in versions.items()}
+
+
+@pytest.fixture
+def use_transport(monkeypatch):
+    """Install a fake shared transport that answers requests with a handler."""
+    from toc_interface_updater import cli
+    from toc_interface_updater.transport import set_transport
+
+    class FakeTransport:
+        def __init__(self, handler):
+            self.handler = handler
+
+        def get(self, url, headers=None):
+            return self.handler(url, headers or {})
+
+        def close(self):
+            pass
+
+    previous = []
+
+    def install(handler):
+        transport = FakeTransport(handler)
+        previous.append(set_transport(transport))
+        # The CLI creates its own transport, hand it the fake instead
+        monkeypatch.setattr(cli, "create_transport", lambda *args, **kwargs: transport)
+
+    yield install
+    if previous:
+        set_transport(previous[0])
@@ -0,0 +1,81 @@
+"""Tests for the benchmark tree generator and result comparison."""
+
+from benchmarks.generator import (
+    CURRENT_VERSIONS,
+    TreeOptions,
+    generate_tocs,
+    write_tree,
+)
+from benchmarks.suite import (
+    BenchmarkResult,
+    compare_results,
+    load_results,
+    save_results,
+)
+from toc_interface_updater.console import QUIET, Console, set_console
+from toc_interface_updater.file_processor import process_files
+
+
+def make_result(name, size, throughput):
+    return BenchmarkResult(
+        name, size, 3, size / throughput, size / throughput, throughput, 0
+    )
+
+
+class TestGenerator:
+    """Test generating synthetic addon trees."""
+
+    def test_exact_and_repeatable(self):
+        """Test that the requested number of files is generated the same way each time."""
+        tocs = list(generate_tocs(TreeOptions(101, seed=3)))
+        assert len(tocs) == 101
+        assert tocs == list(generate_tocs(TreeOptions(101, seed=3)))
+        assert tocs != list(generate_tocs(TreeOptions(101, seed=4)))
+
+    def test_layouts_and_line_endings(self):
+        """Test that suffixed, single line multi and CRLF files are all generated."""
+        tocs = dict(generate_tocs(TreeOptions(500, crlf_share=0.5)))
+        assert any(path.endswith("_Vanilla.toc") for path in tocs)
+        assert any(path.endswith("-Classic.toc") for path in tocs)
+        assert any("## Interface: 11506, 50500, 110100" in c for c in tocs.values())
+        assert any("\r\n" in content for content in tocs.values())
+
+    def test_current_share(self, tmp_path):
+        """Test that current files are left alone and the others updated."""
+        previous_console = set_console(Console(QUIET))
+        try:
+            for share, expected in ((1.0, 0), (0.0, 200)):
+                files = write_tree(
+                    str(tmp_path / str(share)), TreeOptions(200, current_share=share)
+                )
+                results = process_files(
+                    "wow", False, False, dict(CURRENT_VERSIONS), files
+                )
+                assert sum(result.modified for result in results) == expected
+        finally:
+            set_console(previous_console)
+
+
+class TestCompare:
+    """Test comparing stored benchmark results."""
+
+    def test_regression(self, tmp_path):
+        """Test that throughput drops beyond the threshold are flagged."""
+        path = tmp_path / "base.json"
+        save_results(
+            [
+                make_result("process_files", 1000, 1000),
+                make_result("detect", 1000, 500),
+            ],
+            str(path),
+            "abc123",
+        )
+        baseline = load_results(str(path))
+        current = [
+            make_result("process_files", 1000, 850),
+            make_result("detect", 1000, 480),
+            make_result("detect", 10000, 480),
+        ]
+
+        comparisons = compare_results(baseline, current)
+        assert [c.is_regression(0.1) for c in comparisons] == [True, False]
@@ -0,0 +1,86 @@
+"""Unit tests for the BPSV parser."""
+
+import pytest
+
+from toc_interface_updater.bpsv import BpsvError, parse, parse_versions
+from toc_interface_updater.types import InterfaceVersion
+
+VERSIONS_DOCUMENT = """Region!STRING:0|BuildConfig!HEX:16|CDNConfig!HEX:16|KeyRing!HEX:16|BuildId!DEC:4|VersionsName!String:0|ProductConfig!HEX:16
+## seqn = 3020098
+us|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+eu|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+cn|0bd4ab5d5d4bbb9bde4e6dba8a7e1a9f|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61265|11.1.0.61265|53020d32e1a25648c8e1eafd5771935f
+"""
+
+
+class TestParse:
+    """Test generic BPSV document parsing."""
+
+    def test_header_and_seqn(self):
+        """Test that the header becomes typed fields and the seqn is read."""
+        document = parse(VERSIONS_DOCUMENT)
+        assert document.seqn == 3020098
+        assert [field.name for field in document.fields][:2] == [
+            "Region",
+            "BuildConfig",
+        ]
+        assert document.fields[4].type == "DEC"
+        assert document.fields[1].size == 16
+
+    def test_column_lookup_is_case_insensitive(self):
+        """Test looking up columns regardless of their casing."""
+        document = parse(VERSIONS_DOCUMENT)
+        assert document.column("versionsname") == 5
+        assert document.column("Missing") is None
+
+    def test_decimal_columns_are_integers(self):
+        """Test that DEC values are converted once while parsing."""
+        assert parse(VERSIONS_DOCUMENT).rows[0][4] == 61559
+
+    def test_column_order_follows_header(self):
+        """Test that columns are found by name rather than position."""
+        document = parse("VersionsName!String:0|Region!STRING:0\n1.15.7.61582|us\n")
+        assert document.rows[0][document.column("Region")] == "us"
+
+    def test_wrong_column_count(self):
+        """Test that rows that don't match the header are rejected."""
+        with pytest.raises(BpsvError):
+            parse("Region!STRING:0|BuildId!DEC:4\nus\n")
+
+    def test_missing_header(self):
+        """Test that a document without a header is rejected."""
+        with pytest.raises(BpsvError):
+            parse("## seqn = 1\n")
+
+
+class TestParseVersions:
+    """Test product version documents."""
+
+    def test_records_for_every_region(self):
+        """Test that a record is returned for each region."""
+        records = parse_versions(VERSIONS_DOCUMENT)
+        assert set(records) == {"us", "eu", "cn"}
+        assert records["cn"].build_id == 61265
+
+    def test_interface_version(self):
+        """Test converting build names to interface versions."""
+        records = parse_versions(VERSIONS_DOCUMENT)
+        assert records["us"].interface_version() == InterfaceVersion(110105)
+        assert records["cn"].interface_version() == InterfaceVersion(110100)
+
+    def test_interface_version_classic_era(self):
+        """Test that two-digit minor versions are kept as-is."""
+        records = parse_versions(
+            "Region!STRING:0|VersionsName!String:0\nus|1.15.7.61582\n"
+        )
+        assert records["us"].interface_version() == InterfaceVersion(11507)
+
+    def test_no_records(self):
+        """Test documents for products without any builds."""
+        assert parse_versions(VERSIONS_DOCUMENT.split("## seqn")[0]) == {}
+
+    def test_invalid_version_name(self):
+        """Test that malformed build names raise instead of crashing."""
+        records = parse_versions("Region!STRING:0|VersionsName!String:0\nus|dev\n")
+        with pytest.raises(BpsvError):
+            records["us"].interface_version()
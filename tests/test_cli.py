@@ -0,0 +1,569 @@
+"""Tests for the command line interface."""
+
+import io
+import json
+import os
+import time
+
+import pytest
+
+from toc_interface_updater import cli
+from toc_interface_updater.cli import EXIT_OUTDATED, EXIT_UNAVAILABLE, main
+from toc_interface_updater.constants import InterfaceDirective
+from toc_interface_updater.transport import HttpResponse, Transport, TransportError
+from toc_interface_updater.update import clear_update_cache
+from toc_interface_updater.version_resolver import clear_interface_cache
+from toc_interface_updater.version_server import load_fixtures
+from toc_interface_updater.version_store import CACHE_FILE_NAME
+
+VERSIONS_PAYLOAD = """Region!STRING:0|BuildConfig!HEX:16|CDNConfig!HEX:16|KeyRing!HEX:16|BuildId!DEC:4|VersionsName!String:0|ProductConfig!HEX:16
+## seqn = 3020098
+us|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+"""
+
+# Version manifest with every product the TOC file fixtures need
+MANIFEST = {
+    "format": 1,
+    "products": {
+        "wow": {"version": "110105"},
+        "wow_classic": {"version": "50500"},
+        "wow_classic_era": {"version": "11507"},
+    },
+}
+
+
+def fail(url, headers):
+    """Handler for tests that must not touch the network."""
+    raise AssertionError("unexpected request")
+
+
+class LocalTransport(Transport):
+    """Transport answering every request at once, keeping the deadline and retries."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.closed = False
+
+    def _send(self, url, headers, timeout):
+        return HttpResponse(200, VERSIONS_PAYLOAD, {}, "OK")
+
+    def close(self):
+        self.closed = True
+
+
+class TestVersionsCommand:
+    """Test the versions manifest command."""
+
+    def test_writes_manifest(self, tmp_path, use_transport):
+        """Test that every product is resolved into the manifest."""
+
+        def handler(url, headers):
+            if "wow_classic_era_beta" in url:
+                return HttpResponse(200, VERSIONS_PAYLOAD.split("## seqn")[0], {})
+            return HttpResponse(200, VERSIONS_PAYLOAD, {})
+
+        use_transport(handler)
+        path = tmp_path / "versions.json"
+        main(["versions", "-o", str(path)])
+
+        manifest = json.loads(path.read_text())
+        assert manifest["region"] == "us"
+        assert "wow_classic_era_beta" not in manifest["products"]
+        assert manifest["products"]["wow"]["version"] == "110105"
+        assert len(manifest["products"]) == 9
+
+
+class TestVersionsFrom:
+    """Test updating from a version manifest."""
+
+    def test_versions_from_skips_network(self, toc_files, use_transport, monkeypatch):
+        """Test that a manifest fully replaces fetching versions."""
+        use_transport(fail)
+        manifest = toc_files / "versions.json"
+        manifest.write_text(json.dumps(MANIFEST))
+        monkeypatch.chdir(toc_files)
+        main(["--versions-from", str(manifest)])
+
+        assert (toc_files / "default.toc").read_text() == (
+            f"{InterfaceDirective.BASE} 110105\n\nfile.lua\n"
+        )
+
+    def test_versions_from_env(self, toc_files, use_transport, monkeypatch):
+        """Test that the manifest can be given through the environment."""
+        use_transport(fail)
+        manifest = toc_files / "versions.json"
+        manifest.write_text(json.dumps(MANIFEST))
+        monkeypatch.chdir(toc_files)
+        monkeypatch.setenv("TOC_UPDATER_VERSIONS_FROM", str(manifest))
+        main([])
+
+        assert (toc_files / "multi-oneline.toc").read_text() == (
+            f"{InterfaceDirective.BASE} 11507, 50500, 110105\n\nfile.lua\n"
+        )
+
+    def test_partial_manifest_skips_network(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that products missing from the manifest are skipped, not fetched."""
+        clear_interface_cache()
+        clear_update_cache()
+        use_transport(fail)
+        manifest = toc_files / "versions.json"
+        manifest.write_text(
+            json.dumps({"format": 1, "products": {"wow": {"version": "110105"}}})
+        )
+        classic_toc = toc_files / "specific-Classic.toc"
+        original = classic_toc.read_text()
+        monkeypatch.chdir(toc_files)
+        main(["--versions-from", str(manifest)])
+
+        assert "Manifest has no version for: wow_classic" in capsys.readouterr().out
+        assert (toc_files / "default.toc").read_text() == (
+            f"{InterfaceDirective.BASE} 110105\n\nfile.lua\n"
+        )
+        assert classic_toc.read_text() == original
+
+
+class TestUnavailableVersions:
+    """Test that unresolved versions never end up in TOC files."""
+
+    def test_unavailable_version_leaves_file_untouched(
+        self, toc_files, use_transport, monkeypatch
+    ):
+        """Test that files are skipped when their version can't be fetched."""
+
+        def handler(url, headers):
+            if "/wow/" in url:
+                raise TransportError("timed out")
+            return HttpResponse(200, VERSIONS_PAYLOAD, {})
+
+        use_transport(handler)
+        monkeypatch.chdir(toc_files)
+        original = (toc_files / "default.toc").read_text()
+        main([])
+
+        assert (toc_files / "default.toc").read_text() == original
+
+
+class TestPlanning:
+    """Test that only the products the tree needs are fetched."""
+
+    def test_retail_only_tree_fetches_retail_products(
+        self, tmp_path, use_transport, monkeypatch
+    ):
+        """Test that a retail-only run with -p never touches classic products."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url.split("/")[-2])
+            return HttpResponse(200, VERSIONS_PAYLOAD, {})
+
+        use_transport(handler)
+        (tmp_path / "Addon.toc").write_text(
+            f"{InterfaceDirective.BASE} 110000\n\nfile.lua\n"
+        )
+        monkeypatch.chdir(tmp_path)
+        main(["-p"])
+
+        assert sorted(requested) == ["wow", "wowt", "wowxptr"]
+
+    def test_no_toc_files_fetches_nothing(self, tmp_path, use_transport, monkeypatch):
+        """Test that an empty tree makes no requests."""
+        use_transport(fail)
+        monkeypatch.chdir(tmp_path)
+        main(["-b", "-p"])
+
+
+class TestJobs:
+    """Test running with parallel jobs."""
+
+    def test_parallel_jobs(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that --jobs updates the same files as a serial run."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        main(["-v", "--jobs", "auto"])
+
+        assert (
+            (toc_files / "default.toc")
+            .read_text()
+            .startswith(f"{InterfaceDirective.BASE} 110105\n")
+        )
+        assert capsys.readouterr().out.count("Checking") == 6
+
+    @pytest.mark.parametrize("jobs", ["0", "-2", "many"])
+    def test_invalid_jobs(self, jobs, use_transport):
+        """Test that --jobs rejects values other than positive numbers and auto."""
+        use_transport(fail)
+        with pytest.raises(SystemExit):
+            main(["--jobs", jobs])
+
+
+class TestExcludes:
+    """Test skipping parts of the tree."""
+
+    def test_exclude(self, toc_files, use_transport, monkeypatch):
+        """Test that excluded files are neither planned nor updated."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url.split("/")[-2])
+            return HttpResponse(200, VERSIONS_PAYLOAD, {})
+
+        use_transport(handler)
+        monkeypatch.chdir(toc_files)
+        original = (toc_files / "default.toc").read_text()
+        main(["--exclude", "*.toc"])
+
+        assert requested == []
+        assert (toc_files / "default.toc").read_text() == original
+
+
+class TestIncremental:
+    """Test skipping unchanged files with --state."""
+
+    def test_rerun_skips_unchanged_files(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that only changed files are processed again."""
+        payload = {"value": VERSIONS_PAYLOAD}
+        use_transport(lambda url, headers: HttpResponse(200, payload["value"], {}))
+        monkeypatch.chdir(toc_files)
+        state = str(toc_files.parent / "state.json")
+
+        main(["-v", "--state", state])
+        assert capsys.readouterr().out.count("Checking") == 6
+
+        main(["-v", "--state", state])
+        out = capsys.readouterr().out
+        assert "Skipping 6 unchanged files" in out
+        assert "6 skipped as unchanged since the last run" in out
+        assert "Checking" not in out
+
+        (toc_files / "default.toc").write_text(
+            f"{InterfaceDirective.BASE} 100000\n\nfile.lua\n"
+        )
+        main(["-v", "--state", state])
+        out = capsys.readouterr().out
+        assert out.count("Checking") == 1
+        assert "default.toc" in out
+
+        # A new upstream version invalidates every file that uses it
+        payload["value"] = VERSIONS_PAYLOAD.replace("11.1.5.61559", "11.1.7.61967")
+        main(["-v", "--state", state])
+        assert capsys.readouterr().out.count("Checking") == 6
+
+    def test_single_path_run_keeps_other_files(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that updating one path doesn't forget the state of the rest of the tree."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        state = str(toc_files / "state.json")
+
+        main(["-v", "--state", state])
+        assert capsys.readouterr().out.count("Checking") == 6
+
+        main(["-v", "--state", state, "default.toc"])
+        assert "Skipping 1 unchanged files" in capsys.readouterr().out
+        assert len(json.loads((toc_files / "state.json").read_text())["files"]) == 6
+
+        main(["-v", "--state", state])
+        out = capsys.readouterr().out
+        assert "Skipping 6 unchanged files" in out
+        assert "Checking" not in out
+
+
+class TestVersionSources:
+    """Test setting up and releasing the version sources around a run."""
+
+    def use_local_transport(self, monkeypatch):
+        transports = []
+
+        def create(kind, **options):
+            transports.append(LocalTransport(**options))
+            return transports[-1]
+
+        monkeypatch.setattr(cli, "create_transport", create)
+        return transports
+
+    def test_deadline_excludes_planning(self, toc_files, monkeypatch):
+        """Test that time spent scanning the tree doesn't count against the deadline."""
+        clear_interface_cache()
+        clear_update_cache()
+        self.use_local_transport(monkeypatch)
+        original = cli.plan_files
+
+        def slow_plan_files(*args, **kwargs):
+            time.sleep(0.3)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(cli, "plan_files", slow_plan_files)
+        monkeypatch.chdir(toc_files)
+        main(["--network-deadline", "0.1"])
+
+        assert (toc_files / "default.toc").read_text() == (
+            f"{InterfaceDirective.BASE} 110105\n\nfile.lua\n"
+        )
+
+    def test_closed_when_processing_fails(self, toc_files, monkeypatch):
+        """Test that the transport is released and the store saved after an error."""
+        transports = self.use_local_transport(monkeypatch)
+
+        def failing_process_files(*args, **kwargs):
+            raise RuntimeError("processing failed")
+
+        monkeypatch.setattr(cli, "process_files", failing_process_files)
+        monkeypatch.chdir(toc_files)
+        cache_dir = toc_files / "cache"
+        with pytest.raises(RuntimeError):
+            main(["--cache-dir", str(cache_dir)])
+
+        assert transports[0].closed
+        assert (cache_dir / CACHE_FILE_NAME).exists()
+
+
+class TestPaths:
+    """Test updating only explicit paths."""
+
+    def test_positional_paths(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that only the given files are processed."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        main(["-v", "default.toc"])
+
+        out = capsys.readouterr().out
+        assert out.count("Checking") == 1
+        assert "default.toc" in out
+
+    def test_files_from_stdin(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that paths are read from stdin."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        monkeypatch.setattr("sys.stdin", io.StringIO("default.toc\0multi.toc\0"))
+        main(["-v", "--files-from", "-"])
+
+        assert capsys.readouterr().out.count("Checking") == 2
+
+    def test_empty_files_from(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that an empty list processes nothing rather than the whole tree."""
+        use_transport(fail)
+        monkeypatch.chdir(toc_files)
+        monkeypatch.setattr("sys.stdin", io.StringIO(""))
+        main(["-v", "--files-from", "-"])
+
+        assert "Checking" not in capsys.readouterr().out
+
+    @pytest.mark.parametrize("argv", [["./versions"], ["--", "versions"]])
+    def test_directory_named_versions(
+        self, tmp_path, use_transport, monkeypatch, capsys, argv
+    ):
+        """Test that a directory named like the versions command can still be updated."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        toc = tmp_path / "versions" / "Addon_Mainline.toc"
+        toc.parent.mkdir()
+        toc.write_text(f"{InterfaceDirective.BASE} 110000\n\nfile.lua\n")
+        monkeypatch.chdir(tmp_path)
+        main(["-f", "retail", *argv])
+
+        assert toc.read_text() == f"{InterfaceDirective.BASE} 110105\n\nfile.lua\n"
+
+    def test_missing_path(self, toc_files, use_transport, monkeypatch):
+        """Test that a missing path is an error."""
+        use_transport(fail)
+        monkeypatch.chdir(toc_files)
+        with pytest.raises(SystemExit):
+            main(["missing.toc"])
+
+
+class TestOutput:
+    """Test the output level flags."""
+
+    def test_default_lists_changed_files(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that only changed files are listed by default, with a summary."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        (toc_files / "default.toc").write_text(
+            f"{InterfaceDirective.BASE} 110105\n\nfile.lua\n"
+        )
+        main([])
+
+        out = capsys.readouterr().out
+        assert "default.toc" not in out
+        assert out.count("Checking") == 5
+        assert "Checked 6 files: 5 updated, 1 unchanged" in out
+
+    def test_quiet(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that -q prints nothing when there are no warnings."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        main(["-q"])
+
+        assert capsys.readouterr().out == ""
+        assert (
+            (toc_files / "default.toc")
+            .read_text()
+            .startswith(f"{InterfaceDirective.BASE} 110105\n")
+        )
+
+
+class TestReport:
+    """Test writing a run report with --report."""
+
+    def test_report_to_stdout(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that stdout only holds the report, with console output on stderr."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        main(["--report", "ndjson"])
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert [record["type"] for record in records] == ["file"] * 6 + ["summary"]
+        default = next(r for r in records if r.get("path") == "./default.toc")
+        assert default["action"] == "updated"
+        assert default["interfaces"]["Interface"]["new"] == "110105"
+        assert default["bytes_written"] > 0
+        assert records[-1]["files"] == 6
+        assert "Checked 6 files" in captured.err
+
+    def test_report_to_file(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that a report can be written to a file."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        report = toc_files.parent / "report.ndjson"
+        main(["--report", f"ndjson:{report}"])
+
+        lines = report.read_text().splitlines()
+        assert len(lines) == 7
+        assert "Checked 6 files" in capsys.readouterr().out
+
+    def test_invalid_format(self, use_transport):
+        """Test that unknown report formats are rejected."""
+        use_transport(fail)
+        with pytest.raises(SystemExit):
+            main(["--report", "xml"])
+
+
+class TestCheck:
+    """Test checking files without writing them."""
+
+    def snapshot(self, toc_files):
+        return {path.name: path.read_text() for path in toc_files.glob("*.toc")}
+
+    def test_dry_run(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that -n shows outdated files without writing them."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        before = self.snapshot(toc_files)
+        main(["-n"])
+
+        assert self.snapshot(toc_files) == before
+        out = capsys.readouterr().out
+        assert "Files outdated:" in out
+        assert "Outdated" in out
+
+    def test_check_outdated(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that --check exits with an error when a file is outdated."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        before = self.snapshot(toc_files)
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--check", "--state", str(toc_files / "state.json")])
+
+        assert exc_info.value.code == EXIT_OUTDATED
+        assert self.snapshot(toc_files) == before
+        assert not (toc_files / "state.json").exists()
+
+    def test_check_up_to_date(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that --check succeeds once every file has been updated."""
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        main([])
+        capsys.readouterr()
+        main(["--check"])
+
+        assert "All files are up to date." in capsys.readouterr().out
+
+    def test_check_versions_unavailable(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that --check fails when versions can't be fetched to check against."""
+
+        def handler(url, headers):
+            raise TransportError("timed out")
+
+        use_transport(handler)
+        clear_interface_cache()
+        clear_update_cache()
+        monkeypatch.chdir(toc_files)
+        before = self.snapshot(toc_files)
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--check"])
+
+        assert exc_info.value.code == EXIT_UNAVAILABLE
+        assert self.snapshot(toc_files) == before
+        assert "with unavailable versions" in capsys.readouterr().out
+
+    def test_beta_and_test_update_is_idempotent(
+        self, toc_files, use_transport, monkeypatch, capsys
+    ):
+        """Test that files just updated with -b -p pass --check with the same options."""
+        responses = load_fixtures(
+            os.path.join(os.path.dirname(__file__), "fixtures", "versions")
+        )
+        use_transport(
+            lambda url, headers: HttpResponse(
+                200, responses[url.split("/")[-2]].body, {}
+            )
+        )
+        clear_interface_cache()
+        clear_update_cache()
+        monkeypatch.chdir(toc_files)
+        main(["-b", "-p"])
+        capsys.readouterr()
+        main(["-b", "-p", "--check"])
+
+        assert "All files are up to date." in capsys.readouterr().out
+
+    def test_fail_fast(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that --fail-fast stops before planning files after an outdated one."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url.split("/")[-2])
+            return HttpResponse(200, VERSIONS_PAYLOAD, {})
+
+        use_transport(handler)
+        monkeypatch.chdir(toc_files)
+        monkeypatch.setattr("toc_interface_updater.cli.FAIL_FAST_BATCH_SIZE", 1)
+        before = self.snapshot(toc_files)
+        with pytest.raises(SystemExit) as exc_info:
+            main(["-v", "--fail-fast"])
+
+        assert exc_info.value.code == EXIT_OUTDATED
+        assert self.snapshot(toc_files) == before
+        # default.toc is first and only needs the retail version
+        assert requested == ["wow"]
+        assert capsys.readouterr().out.count("Checking") == 1
+
+
+class TestProfile:
+    """Test profiling a run with --profile."""
+
+    def test_profile_table(self, toc_files, use_transport, monkeypatch, capsys):
+        """Test that the phase table is printed, even with -q."""
+        # Start cold so earlier tests' memoized updates don't hide the phases
+        clear_interface_cache()
+        clear_update_cache()
+        use_transport(lambda url, headers: HttpResponse(200, VERSIONS_PAYLOAD, {}))
+        monkeypatch.chdir(toc_files)
+        stats = toc_files.parent / "run.prof"
+        main(["-q", "--profile-stats", str(stats)])
+
+        out = capsys.readouterr().out
+        for name in ("walk", "read", "detect", "resolve", "http wow", "write"):
+            assert f"\n{name} " in out
+        assert "version cache" in out
+        assert "Peak memory:" in out
+        assert stats.exists()
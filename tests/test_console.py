@@ -0,0 +1,97 @@
+"""Unit tests for console output."""
+
+import io
+
+from toc_interface_updater.console import (
+    BUFFER_LINES,
+    DEBUG,
+    NORMAL,
+    QUIET,
+    RESET,
+    VERBOSE,
+    YELLOW,
+    Console,
+    output_level,
+    supports_color,
+)
+
+
+class TestConsole:
+    """Test writing messages through a console."""
+
+    def test_levels(self):
+        """Test that only messages at or below the console's level are written."""
+        stream = io.StringIO()
+        console = Console(NORMAL, stream)
+        console.info("info")
+        console.verbose("verbose")
+        console.debug("debug")
+        console.flush()
+        assert stream.getvalue() == "info\n"
+
+    def test_quiet(self):
+        """Test that quiet mode still shows warnings and errors."""
+        stream = io.StringIO()
+        console = Console(QUIET, stream)
+        console.info("info")
+        console.warning("warning")
+        console.error("error")
+        assert stream.getvalue() == "warning\nerror\n"
+
+    def test_buffering(self):
+        """Test that lines are held until the buffer fills or is flushed."""
+        stream = io.StringIO()
+        console = Console(NORMAL, stream)
+        console.info("first")
+        assert stream.getvalue() == ""
+
+        for i in range(BUFFER_LINES - 1):
+            console.info(str(i))
+        assert stream.getvalue().count("\n") == BUFFER_LINES
+
+        console.info("last")
+        console.flush()
+        assert stream.getvalue().endswith("last\n")
+
+    def test_warning_flushes_buffer(self):
+        """Test that warnings are written after the lines buffered before them."""
+        stream = io.StringIO()
+        console = Console(NORMAL, stream)
+        console.info("info")
+        console.warning("warning")
+        assert stream.getvalue() == "info\nwarning\n"
+
+    def test_style(self):
+        """Test that styles are only applied when color is enabled."""
+        assert Console(color=True).style("text", YELLOW) == f"{YELLOW}text{RESET}"
+        assert Console(color=False).style("text", YELLOW) == "text"
+
+
+class TestColorSupport:
+    """Test detecting whether to use color."""
+
+    def test_not_a_terminal(self, monkeypatch):
+        """Test that color is disabled when not writing to a terminal."""
+        monkeypatch.delenv("NO_COLOR", raising=False)
+        assert not supports_color(io.StringIO())
+
+    def test_no_color(self, monkeypatch):
+        """Test that $NO_COLOR disables color on a terminal."""
+        stream = io.StringIO()
+        stream.isatty = lambda: True
+        monkeypatch.delenv("NO_COLOR", raising=False)
+        assert supports_color(stream)
+        monkeypatch.setenv("NO_COLOR", "1")
+        assert not supports_color(stream)
+
+
+class TestOutputLevel:
+    """Test mapping -v and -q flags to an output level."""
+
+    def test_output_level(self):
+        """Test that flags adjust the level from normal, within bounds."""
+        assert output_level(0, 0) == NORMAL
+        assert output_level(1, 0) == VERBOSE
+        assert output_level(5, 0) == DEBUG
+        assert output_level(0, 1) == QUIET
+        assert output_level(0, 3) == QUIET
@@ -1,9 +1,24 @@
 """Unit tests for file processor functions."""
 
+import os
 import re
 
-from toc_interface_updater.constants import TocSuffix
-from toc_interface_updater.file_processor import get_product_for_file
+from toc_interface_updater.console import VERBOSE, Console, set_console
+from toc_interface_updater.constants import InterfaceDirective, TocSuffix
+from toc_interface_updater.file_processor import (
+    HEADER_READ_SIZE,
+    UTF8_BOM,
+    find_toc_files,
+    get_file_passes,
+    get_product_for_file,
+    plan_files,
+    process_files,
+    read_toc_header,
+    resolve_jobs,
+    split_header,
+    write_toc_header,
+)
+from toc_interface_updater.types import ExecutorKind
 
 
 class TestFileProcessor:
@@ -52,3 +67,245 @@ class TestFileProcessor:
         product, multi = get_product_for_file("TestAddon-Mainline.toc", pattern, "wow")
         assert product == "wow"
         assert not multi
+
+    def test_get_file_passes_unsuffixed(self):
+        """Test that unsuffixed files also get the multi-line classic passes."""
+        pattern = TocSuffix.get_pattern()
+        assert get_file_passes("./TestAddon.toc", pattern, "wow") == [
+            ("wow", False),
+            ("wow_classic", True),
+            ("wow_classic_era", True),
+        ]
+
+    def test_get_file_passes_suffixed(self):
+        """Test that suffixed files get a single pass for their product."""
+        pattern = TocSuffix.get_pattern()
+        assert get_file_passes("./TestAddon_Vanilla.toc", pattern, "wow") == [
+            ("wow_classic_era", False)
+        ]
+
+
+class TestPlanFiles:
+    """Test planning which products a tree needs."""
+
+    def test_plan_files(self, toc_files):
+        """Test that only the products referenced by the files are planned."""
+        files = find_toc_files(str(toc_files))
+        file_products, _, headers = plan_files(files, "wow", False, True)
+        assert set().union(*file_products.values()) == {
+            "wow",
+            "wowt",
+            "wowxptr",
+            "wow_classic",
+            "wow_classic_ptr",
+            "wow_classic_era",
+            "wow_classic_era_ptr",
+        }
+        assert list(headers) == files
+
+    def test_plan_files_retail_only(self, tmp_path):
+        """Test that a retail-only tree never needs classic products."""
+        (tmp_path / "Addon.toc").write_text(
+            f"{InterfaceDirective.BASE} 110000\n\nfile.lua\n"
+        )
+        files = find_toc_files(str(tmp_path))
+        file_products, _, _ = plan_files(files, "wow", True, True)
+        assert file_products == {files[0]: {"wow", "wow_beta", "wowt", "wowxptr"}}
+
+
+class TestProcessFiles:
+    """Test processing files serially and in parallel."""
+
+    version_cache = {
+        "wow": "110105",
+        "wow_classic": "50500",
+        "wow_classic_era": "11507",
+    }
+
+    def run(self, tmp_path, capsys, jobs, executor=ExecutorKind.THREAD):
+        for i in range(12):
+            (tmp_path / f"Addon{i:02}.toc").write_text(
+                f"{InterfaceDirective.BASE} {110000 if i % 2 else 110105}\n\nfile.lua\n"
+            )
+        files = sorted(find_toc_files(str(tmp_path)))
+        previous_console = set_console(Console(VERBOSE))
+        try:
+            results = process_files(
+                "wow", False, False, dict(self.version_cache), files, jobs, executor
+            )
+        finally:
+            set_console(previous_console)
+        modified = [result.path for result in results if result.modified]
+        return files, modified, capsys.readouterr().out.replace(str(tmp_path), "")
+
+    def test_serial(self, tmp_path, capsys):
+        """Test that only changed files are reported as modified."""
+        files, modified, out = self.run(tmp_path, capsys, 1)
+        assert modified == files[1::2]
+        assert out.count("Updated") == 6
+        assert out.count("No change") == 6
+
+    def test_threads_match_serial(self, tmp_path, capsys):
+        """Test that a thread pool reports the same results in file order."""
+        (tmp_path / "serial").mkdir()
+        serial = self.run(tmp_path / "serial", capsys, 1)
+        (tmp_path / "threads").mkdir()
+        threads = self.run(tmp_path / "threads", capsys, 4)
+        assert threads[1] == threads[0][1::2]
+        assert threads[2] == serial[2]
+
+    def test_processes_match_serial(self, tmp_path, capsys):
+        """Test that a process pool reports the same results in file order."""
+        (tmp_path / "serial").mkdir()
+        serial = self.run(tmp_path / "serial", capsys, 1)
+        (tmp_path / "processes").mkdir()
+        processes = self.run(tmp_path / "processes", capsys, 2, ExecutorKind.PROCESS)
+        assert processes[1] == processes[0][1::2]
+        assert processes[2] == serial[2]
+        assert (
+            (tmp_path / "processes" / "Addon01.toc")
+            .read_text()
+            .startswith(f"{InterfaceDirective.BASE} 110105\n")
+        )
+
+    def test_planned_headers_are_reused(self, tmp_path, monkeypatch):
+        """Test that files are read once, unless they change after planning."""
+        from toc_interface_updater import file_processor, update
+
+        reads = []
+
+        def counting_read(file_path):
+            reads.append(os.path.basename(file_path))
+            return read_toc_header(file_path)
+
+        monkeypatch.setattr(file_processor, "read_toc_header", counting_read)
+        monkeypatch.setattr(update, "read_toc_header", counting_read)
+        for name in ["A.toc", "B.toc"]:
+            (tmp_path / name).write_text(f"{InterfaceDirective.BASE} 110000\n")
+        files = sorted(find_toc_files(str(tmp_path)))
+        _, _, headers = plan_files(files, "wow", False, False)
+        assert reads == ["A.toc", "B.toc"]
+
+        (tmp_path / "B.toc").write_text(f"{InterfaceDirective.BASE} 100000\n\n")
+        previous_console = set_console(Console(VERBOSE))
+        try:
+            results = process_files(
+                "wow", False, False, dict(self.version_cache), files, headers=headers
+            )
+        finally:
+            set_console(previous_console)
+
+        assert reads == ["A.toc", "B.toc", "B.toc"]
+        assert all(result.modified for result in results)
+        assert (
+            tmp_path / "B.toc"
+        ).read_text() == f"{InterfaceDirective.BASE} 110105\n\n"
+
+    def test_resolve_jobs(self, monkeypatch):
+        """Test that auto jobs are derived from the CPU count."""
+        monkeypatch.setattr("os.cpu_count", lambda: 4)
+        assert resolve_jobs(3, ExecutorKind.THREAD) == 3
+        assert resolve_jobs(0, ExecutorKind.PROCESS) == 4
+        assert resolve_jobs(0, ExecutorKind.THREAD) == 8
+
+
+class TestReadTocHeader:
+    """Test reading only the metadata header of TOC files."""
+
+    def test_split_header(self):
+        """Test that the header ends at the first line that isn't metadata."""
+        data = b"## Title: A\r\n# comment\r\n\r\n## Interface: 1\r\nfile.lua\r\n## X: y\r\n"
+        assert split_header(data, False) == [
+            b"## Title: A\r\n",
+            b"# comment\r\n",
+            b"\r\n",
+            b"## Interface: 1\r\n",
+        ]
+
+    def test_split_header_incomplete(self):
+        """Test that a header that may continue in the next read isn't split."""
+        assert split_header(b"## Title: A\n## Interface: 1", False) is None
+        assert split_header(b"## Title: A\r", False) is None
+        assert split_header(b"## Title: A\r", True) == [b"## Title: A\r"]
+
+    def test_small_file(self, tmp_path):
+        """Test that a small file is read completely in one go."""
+        path = tmp_path / "Addon.toc"
+        path.write_bytes(b"## Interface: 110000\r\n\r\nfile.lua\r\n")
+        header = read_toc_header(str(path))
+        assert header.text() == "## Interface: 110000\n\n"
+        assert header.rest == b"file.lua\r\n"
+        assert header.complete
+
+    def test_metadata_only(self, tmp_path):
+        """Test a file without any file entries."""
+        path = tmp_path / "Addon.toc"
+        path.write_text("## Interface: 110000")
+        header = read_toc_header(str(path))
+        assert header.text() == "## Interface: 110000"
+        assert header.rest == b""
+
+    def test_large_file(self, tmp_path):
+        """Test that reading stops after the header of a large file."""
+        path = tmp_path / "Addon.toc"
+        path.write_text("## Interface: 110000\n" + "file.lua\n" * HEADER_READ_SIZE)
+        header = read_toc_header(str(path))
+        assert header.text() == "## Interface: 110000\n"
+        assert not header.complete
+        assert len(header.rest) < HEADER_READ_SIZE
+
+    def test_large_header(self, tmp_path):
+        """Test that a header longer than one read is read in full."""
+        path = tmp_path / "Addon.toc"
+        metadata = "## Notes: x\n" * HEADER_READ_SIZE
+        path.write_text(metadata + "## Interface: 110000\nfile.lua\n")
+        header = read_toc_header(str(path))
+        assert header.text() == metadata + "## Interface: 110000\n"
+        assert header.rest == b"file.lua\n"
+        assert header.complete
+
+    def test_bom_and_encoding(self, tmp_path):
+        """Test that a BOM and non UTF-8 bytes survive decoding and splicing."""
+        path = tmp_path / "Addon.toc"
+        path.write_bytes(UTF8_BOM + b"## Title: Caf\xe9\r\n## Interface: 1\r\n")
+        header = read_toc_header(str(path))
+        assert header.bom == UTF8_BOM
+        assert header.text().startswith("## Title: Caf")
+
+        lines = header.splice(header.text().replace(": 1", ": 2"))
+        assert lines == [b"## Title: Caf\xe9\r\n", b"## Interface: 2\r\n"]
+
+
+class TestWriteTocHeader:
+    """Test splicing updated headers into TOC files."""
+
+    def test_same_size(self, tmp_path):
+        """Test that a header of the same size is written in place."""
+        path = tmp_path / "Addon.toc"
+        path.write_bytes(b"## Interface: 110000\r\n\r\nfile.lua\r\n")
+        header = read_toc_header(str(path))
+        assert write_toc_header(
+            str(path), header, header.splice("## Interface: 110105\n\n")
+        )
+        assert path.read_bytes() == b"## Interface: 110105\r\n\r\nfile.lua\r\n"
+
+    def test_different_size(self, tmp_path):
+        """Test that the rest of a large file is kept when the header grows."""
+        body = b"file.lua\n" * HEADER_READ_SIZE
+        path = tmp_path / "Addon.toc"
+        path.write_bytes(UTF8_BOM + b"## Interface: 110000\n" + body)
+        header = read_toc_header(str(path))
+        written = write_toc_header(
+            str(path), header, header.splice("## Interface: 110000, 110105\n")
+        )
+        assert path.read_bytes() == UTF8_BOM + b"## Interface: 110000, 110105\n" + body
+        assert written == len(b"## Interface: 110000, 110105\n" + body)
+        # The rest of the file was read once, after what was read with the header
+        assert header.read_size == len(UTF8_BOM + b"## Interface: 110000\n" + body)
+
+    def test_unchanged(self, tmp_path):
+        """Test that an unchanged header isn't written."""
+        path = tmp_path / "Addon.toc"
+        path.write_bytes(b"## Interface: 110000\n")
+        header = read_toc_header(str(path))
+        assert not write_toc_header(str(path), header, header.splice(header.text()))
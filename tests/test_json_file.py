@@ -0,0 +1,81 @@
+"""Unit tests for the JSON file helpers."""
+
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from toc_interface_updater.json_file import (
+    is_int,
+    is_str,
+    load_record,
+    optional,
+    read_json_object,
+    write_json_atomic,
+)
+
+
+@dataclass
+class Record:
+    name: str
+    count: int
+    note: Optional[str] = None
+
+
+CHECKS = {"name": is_str, "count": is_int, "note": optional(is_str)}
+
+
+class TestReadJsonObject:
+    """Test reading stored JSON objects."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that written objects are read back."""
+        path = str(tmp_path / "nested" / "data.json")
+        write_json_atomic(path, {"format": 1, "value": [1, 2]})
+        assert read_json_object(path, 1) == {"format": 1, "value": [1, 2]}
+
+    @pytest.mark.parametrize(
+        "content", ["{not json", "[]", "null", json.dumps({"format": 2})]
+    )
+    def test_rejected(self, tmp_path, content):
+        """Test that unreadable, non-object and other format files are ignored."""
+        path = tmp_path / "data.json"
+        path.write_text(content)
+        assert read_json_object(str(path), 1) is None
+
+    def test_missing(self, tmp_path):
+        """Test that a missing file is ignored."""
+        assert read_json_object(str(tmp_path / "data.json"), 1) is None
+
+    def test_failed_write_leaves_no_temporary_file(self, tmp_path):
+        """Test that a failed write cleans up and leaves the old file in place."""
+        path = tmp_path / "data.json"
+        path.write_text("old")
+        with pytest.raises(TypeError):
+            write_json_atomic(str(path), {"value": object()})
+        assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+        assert path.read_text() == "old"
+
+
+class TestLoadRecord:
+    """Test building dataclasses from stored JSON."""
+
+    def test_valid(self):
+        """Test that well-formed records are built, with defaults."""
+        assert load_record(Record, {"name": "a", "count": 1}, CHECKS) == Record("a", 1)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            ["a", 1],
+            {"name": "a"},
+            {"name": "a", "count": 1, "extra": True},
+            {"name": "a", "count": "1"},
+            {"name": "a", "count": True},
+            {"name": "a", "count": 1, "note": 5},
+        ],
+    )
+    def test_malformed(self, data):
+        """Test that records with missing, unknown or mistyped fields are rejected."""
+        assert load_record(Record, data, CHECKS) is None
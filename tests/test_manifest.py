@@ -0,0 +1,67 @@
+"""Unit tests for version manifests."""
+
+import json
+
+import pytest
+
+from toc_interface_updater.manifest import (
+    ManifestError,
+    build_manifest,
+    load_manifest,
+    write_manifest,
+)
+from toc_interface_updater.types import InterfaceVersion
+
+
+class TestManifest:
+    """Test building, writing and loading version manifests."""
+
+    def test_build_manifest(self):
+        """Test that versions, fetch times and the region are recorded."""
+        manifest = build_manifest(
+            {"wowt": "110107", "wow": "110105"}, {"wow": 0.0}, "us", 60.0
+        )
+        assert manifest == {
+            "format": 1,
+            "region": "us",
+            "generated_at": "1970-01-01T00:01:00Z",
+            "products": {
+                "wow": {"version": "110105", "fetched_at": "1970-01-01T00:00:00Z"},
+                "wowt": {"version": "110107", "fetched_at": "1970-01-01T00:01:00Z"},
+            },
+        }
+
+    def test_round_trip(self, tmp_path):
+        """Test that a written manifest loads back into a version cache."""
+        path = str(tmp_path / "versions.json")
+        write_manifest(build_manifest({"wow": "110105"}, {}, "us", 0.0), path)
+        assert load_manifest(path) == {"wow": InterfaceVersion(110105)}
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing manifest raises a ManifestError."""
+        with pytest.raises(ManifestError):
+            load_manifest(str(tmp_path / "missing.json"))
+
+    def test_unsupported_format(self, tmp_path):
+        """Test that unknown manifest formats are rejected."""
+        path = tmp_path / "versions.json"
+        path.write_text(json.dumps({"format": 2, "products": {}}))
+        with pytest.raises(ManifestError):
+            load_manifest(str(path))
+
+    @pytest.mark.parametrize("products", [[], "wow", None, 1])
+    def test_products_not_an_object(self, tmp_path, products):
+        """Test that a products value that isn't an object is rejected."""
+        path = tmp_path / "versions.json"
+        path.write_text(json.dumps({"format": 1, "products": products}))
+        with pytest.raises(ManifestError):
+            load_manifest(str(path))
+
+    def test_invalid_version(self, tmp_path):
+        """Test that non-numeric versions are rejected."""
+        path = tmp_path / "versions.json"
+        path.write_text(
+            json.dumps({"format": 1, "products": {"wow": {"version": "11.1.5"}}})
+        )
+        with pytest.raises(ManifestError):
+            load_manifest(str(path))
@@ -0,0 +1,35 @@
+"""Unit tests for bounded memoization."""
+
+from toc_interface_updater.memo import BoundedMemo, version_cache_fingerprint
+
+
+class TestBoundedMemo:
+    """Test storing and bounding memoized results."""
+
+    def test_get_and_put(self):
+        """Test that stored results are returned by key."""
+        memo = BoundedMemo()
+        memo.put(("wow", 1), "110105")
+        assert memo.get(("wow", 1)) == "110105"
+        assert memo.get(("wow", 2)) is None
+
+    def test_cleared_when_full(self):
+        """Test that the memo never grows past its bound."""
+        memo = BoundedMemo(max_size=2)
+        for i in range(5):
+            memo.put(i, str(i))
+            assert len(memo) <= 2
+        assert memo.get(4) == "4"
+
+
+class TestFingerprint:
+    """Test version cache fingerprints."""
+
+    def test_changes_with_content(self):
+        """Test that equal caches match and different ones don't."""
+        assert version_cache_fingerprint({"wow": 110105}) == version_cache_fingerprint(
+            {"wow": 110105}
+        )
+        assert version_cache_fingerprint({"wow": 110105}) != version_cache_fingerprint(
+            {"wow": 110105, "wowt": None}
+        )
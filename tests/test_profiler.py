@@ -0,0 +1,60 @@
+"""Unit tests for the phase profiler."""
+
+import pstats
+
+from toc_interface_updater.profiler import Profiler, ProfileSession
+
+
+class TestProfiler:
+    """Test recording phases and counters."""
+
+    def test_disabled(self):
+        """Test that a disabled profiler records nothing."""
+        profiler = Profiler()
+        with profiler.phase("read"):
+            pass
+        profiler.count("version cache hit")
+        assert profiler.phases == {}
+        assert profiler.counters == {}
+
+    def test_phases_and_counters(self):
+        """Test that calls, time and counts are accumulated."""
+        profiler = Profiler(enabled=True)
+        for _ in range(3):
+            with profiler.phase("read"):
+                pass
+        profiler.count("version cache hit")
+        profiler.count("version cache hit", 2)
+        assert profiler.phases["read"][0] == 3
+        assert profiler.phases["read"][1] >= 0
+        assert profiler.counters == {"version cache hit": 3}
+
+    def test_report_order(self):
+        """Test that phases are reported in pipeline order, then by name."""
+        profiler = Profiler(enabled=True)
+        for name in ("write", "http wow_classic", "walk", "http wow", "custom"):
+            profiler.add(name, 0.001)
+        lines = profiler.report()
+        assert [line.split("  ")[0].strip() for line in lines[1:]] == [
+            "walk",
+            "http wow",
+            "http wow_classic",
+            "write",
+            "custom",
+        ]
+
+
+class TestProfileSession:
+    """Test profiling a whole run."""
+
+    def test_memory_and_stats(self, tmp_path):
+        """Test that the report has the peak memory and stats are written."""
+        path = tmp_path / "run.prof"
+        session = ProfileSession(Profiler(enabled=True), str(path))
+        session.start()
+        sorted(range(1000))
+        lines = session.finish()
+
+        assert lines[-2].startswith("Total time:")
+        assert lines[-1].startswith("Peak memory:")
+        assert pstats.Stats(str(path)).total_calls > 0
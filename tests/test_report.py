@@ -0,0 +1,111 @@
+"""Unit tests for run reports."""
+
+import io
+import json
+
+import pytest
+
+from toc_interface_updater.report import (
+    NdjsonReport,
+    file_record,
+    parse_report_spec,
+    summary_record,
+)
+from toc_interface_updater.types import FileResult
+
+
+def make_result(path, modified=False, skipped=()):
+    return FileResult(
+        path,
+        ["wow"],
+        modified=modified,
+        skipped=list(skipped),
+        interfaces={"Interface": ("110000", "110105" if modified else "110000")},
+        bytes_read=40,
+        bytes_written=21 if modified else 0,
+        elapsed=0.5,
+    )
+
+
+class TestParseReportSpec:
+    """Test parsing --report values."""
+
+    def test_stdout(self):
+        """Test that a format without a path, or with -, writes to stdout."""
+        assert parse_report_spec("ndjson") == ("ndjson", None)
+        assert parse_report_spec("ndjson:-") == ("ndjson", None)
+
+    def test_path(self):
+        """Test that everything after the first colon is the path."""
+        assert parse_report_spec("ndjson:C:/report.ndjson") == (
+            "ndjson",
+            "C:/report.ndjson",
+        )
+
+    def test_invalid_format(self):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            parse_report_spec("xml")
+
+
+class TestRecords:
+    """Test building report records."""
+
+    def test_file_record(self):
+        """Test that a file record has the old and new interface values."""
+        record = file_record(make_result("Addon.toc", modified=True))
+        assert record == {
+            "type": "file",
+            "path": "Addon.toc",
+            "products": ["wow"],
+            "action": "updated",
+            "interfaces": {"Interface": {"old": "110000", "new": "110105"}},
+            "skipped": [],
+            "bytes_read": 40,
+            "bytes_written": 21,
+            "elapsed": 0.5,
+        }
+
+    def test_summary_record(self):
+        """Test that the summary counts each action."""
+        results = [
+            make_result("A.toc", modified=True),
+            make_result("B.toc"),
+            make_result("C.toc", skipped=["No version available for wow"]),
+        ]
+        record = summary_record(results, 2, 1.25)
+        assert record["files"] == 5
+        assert record["updated"] == 1
+        assert record["unchanged"] == 1
+        assert record["skipped"] == 1
+        assert record["unchanged_since_last_run"] == 2
+        assert record["bytes_read"] == 120
+        assert record["bytes_written"] == 21
+
+
+class TestNdjsonReport:
+    """Test writing NDJSON reports."""
+
+    def test_one_record_per_line(self):
+        """Test that each file and the summary are written as a line of JSON."""
+        stream = io.StringIO()
+        report = NdjsonReport(stream)
+        results = [make_result("A.toc", modified=True), make_result("B.toc")]
+        for result in results:
+            report.file(result)
+        report.summary(results, 0, 1.0)
+        report.close()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [record["type"] for record in records] == ["file", "file", "summary"]
+        assert [record.get("path") for record in records[:2]] == ["A.toc", "B.toc"]
+        assert not stream.closed
+
+    def test_file(self, tmp_path):
+        """Test that a report opened on a path is closed with it."""
+        path = tmp_path / "report.ndjson"
+        report = NdjsonReport.open(str(path))
+        report.summary([], 0, 0.0)
+        report.close()
+        assert report.stream.closed
+        assert json.loads(path.read_text())["type"] == "summary"
@@ -0,0 +1,141 @@
+"""Unit tests for the incremental state manifest."""
+
+import json
+import os
+
+from toc_interface_updater.state import (
+    STATE_FORMAT_VERSION,
+    FileState,
+    StateManifest,
+    options_fingerprint,
+)
+
+OPTIONS = options_fingerprint("wow", False, True)
+
+
+def saved_state(tmp_path, toc, versions):
+    state = StateManifest(str(tmp_path / "state.json"), OPTIONS)
+    state.record(str(toc), versions)
+    state.save()
+    return StateManifest.load(str(tmp_path / "state.json"), OPTIONS)
+
+
+class TestStateManifest:
+    """Test recording and checking file state."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that recorded files are unchanged after reloading."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, toc, {"wow": 110105})
+
+        previous = state.check(str(toc))
+        assert previous is not None
+        assert previous.versions == {"wow": 110105}
+
+    def test_modified_file(self, tmp_path):
+        """Test that a changed file is not reported as unchanged."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, toc, {"wow": 110105})
+
+        toc.write_text("## Interface: 110000\n")
+        assert state.check(str(toc)) is None
+
+    def test_touched_file(self, tmp_path):
+        """Test that a new mtime with the same content falls back to the hash."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, toc, {"wow": 110105})
+
+        stat = os.stat(toc)
+        os.utime(toc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert state.check(str(toc)) is not None
+        assert state.previous[str(toc)].mtime_ns == stat.st_mtime_ns + 10**9
+
+    def test_different_options(self, tmp_path):
+        """Test that state recorded with other options is discarded."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        saved_state(tmp_path, toc, {"wow": 110105})
+
+        state = StateManifest.load(
+            str(tmp_path / "state.json"), options_fingerprint("wow", True, True)
+        )
+        assert state.check(str(toc)) is None
+
+    def test_unknown_format(self, tmp_path):
+        """Test that state files in another format are ignored."""
+        path = tmp_path / "state.json"
+        path.write_text(
+            json.dumps({"format": STATE_FORMAT_VERSION + 1, "options": OPTIONS})
+        )
+        assert StateManifest.load(str(path), OPTIONS).previous == {}
+
+    def test_unvisited_files_are_kept(self, tmp_path):
+        """Test that files not visited by a run stay in the state while they exist."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, toc, {"wow": 110105})
+        state.save()
+
+        files = json.loads((tmp_path / "state.json").read_text())["files"]
+        assert list(files) == [str(toc)]
+
+    def test_deleted_files_are_dropped(self, tmp_path):
+        """Test that files that no longer exist are dropped from the state."""
+        toc = tmp_path / "Addon.toc"
+        toc.write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, toc, {"wow": 110105})
+        toc.unlink()
+        state.save()
+
+        assert json.loads((tmp_path / "state.json").read_text())["files"] == {}
+
+    def test_paths_are_normalized(self, tmp_path, monkeypatch):
+        """Test that a file walked from a directory matches the same file given directly."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "Addon").mkdir()
+        (tmp_path / "Addon" / "Addon.toc").write_text("## Interface: 110105\n")
+        state = saved_state(tmp_path, "./Addon/Addon.toc", {"wow": 110105})
+
+        assert state.check("Addon/Addon.toc") is not None
+
+    def test_non_object_document(self, tmp_path):
+        """Test that valid JSON that isn't a state object starts an empty state."""
+        path = tmp_path / "state.json"
+        path.write_text("[]")
+        assert StateManifest.load(str(path), OPTIONS).previous == {}
+
+    def test_malformed_entries_are_discarded(self, tmp_path):
+        """Test that entries with missing or invalid fields are dropped."""
+        valid = {"size": 1, "mtime_ns": 1, "sha256": "", "versions": {"wow": 110105}}
+        path = tmp_path / "state.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "format": STATE_FORMAT_VERSION,
+                    "options": OPTIONS,
+                    "files": {
+                        "valid.toc": valid,
+                        "list.toc": [1, 1, ""],
+                        "missing.toc": {"size": 1},
+                        "size.toc": {**valid, "size": "1"},
+                        "versions.toc": {**valid, "versions": ["wow"]},
+                        "version.toc": {**valid, "versions": {"wow": "11.1.5"}},
+                    },
+                }
+            )
+        )
+        assert list(StateManifest.load(str(path), OPTIONS).previous) == ["valid.toc"]
+
+
+class TestFileState:
+    """Test comparing recorded versions."""
+
+    def test_is_current(self):
+        """Test that a file is current only if all its versions are unchanged."""
+        entry = FileState(1, 1, "", {"wow": 110105, "wowt": None})
+        assert entry.is_current({"wow": 110105, "wowt": None})
+        assert not entry.is_current({"wow": 110107, "wowt": None})
+        assert not entry.is_current({"wow": 110105})
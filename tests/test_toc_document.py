@@ -0,0 +1,61 @@
+"""Unit tests for the TOC document model."""
+
+from toc_interface_updater.constants import InterfaceDirective
+from toc_interface_updater.toc_document import TocDocument, as_document
+
+CONTENT = (
+    f"## Title: Test Addon\n"
+    f"{InterfaceDirective.BASE} 110000, 110001\n"
+    f"{InterfaceDirective.VANILLA} 11507\n"
+    f"{InterfaceDirective.BASE} 110002\n"
+    f"## Interfaces: not a directive\n"
+    f"\nfile.lua\n"
+)
+
+
+class TestTocDocument:
+    """Test parsing and updating TOC documents."""
+
+    def test_index(self):
+        """Test that each directive is indexed by the lines it appears on."""
+        document = TocDocument(CONTENT)
+        assert document.directives == {
+            InterfaceDirective.BASE: [1, 3],
+            InterfaceDirective.VANILLA: [2],
+            "## Interfaces:": [4],
+        }
+        assert document.has(InterfaceDirective.VANILLA)
+        assert not document.has(InterfaceDirective.CLASSIC)
+
+    def test_values(self):
+        """Test reading the values of the first occurrence of a directive."""
+        document = TocDocument(CONTENT)
+        assert document.values(InterfaceDirective.BASE) == ["110000", "110001"]
+        assert document.values(InterfaceDirective.VANILLA) == ["11507"]
+        assert document.values(InterfaceDirective.CLASSIC) == []
+
+    def test_first_multi_value(self):
+        """Test finding the first occurrence with several values."""
+        document = TocDocument(
+            f"{InterfaceDirective.BASE} 1\n{InterfaceDirective.BASE} 2, 3"
+        )
+        assert document.first_multi_value(InterfaceDirective.BASE) == ["2", "3"]
+        assert document.first_multi_value(InterfaceDirective.VANILLA) == []
+
+    def test_set(self):
+        """Test that every occurrence of a directive is replaced."""
+        document = TocDocument(CONTENT)
+        document.set(InterfaceDirective.BASE, "110105")
+        assert document.text() == CONTENT.replace("110000, 110001", "110105").replace(
+            "110002", "110105"
+        )
+
+    def test_text_round_trip(self):
+        """Test that an unchanged document gives back its content."""
+        assert TocDocument(CONTENT).text() == CONTENT
+
+    def test_as_document(self):
+        """Test that documents are only parsed once."""
+        document = TocDocument(CONTENT)
+        assert as_document(document) is document
+        assert as_document(CONTENT).text() == CONTENT
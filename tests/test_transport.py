@@ -0,0 +1,328 @@
+"""Unit tests for the shared HTTP transport."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from toc_interface_updater.transport import (
+    HttpClientTransport,
+    HttpResponse,
+    RequestsTransport,
+    Transport,
+    TransportError,
+    create_transport,
+)
+
+PROXY_VARIABLES = [f"{scheme}_proxy" for scheme in ["http", "https", "all", "no"]] + [
+    "REQUESTS_CA_BUNDLE",
+    "CURL_CA_BUNDLE",
+]
+
+
+@pytest.fixture
+def clean_environment(monkeypatch):
+    """Remove proxy and CA bundle settings from the environment."""
+    for name in PROXY_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+
+
+class ScriptedTransport(Transport):
+    """Transport that replays a list of responses and errors."""
+
+    def __init__(self, outcomes, **kwargs):
+        super().__init__(backoff=0, **kwargs)
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def _send(self, url, headers, timeout):
+        self.calls.append(timeout)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def ok(text="ok"):
+    """Build a successful response."""
+    return HttpResponse(200, text, {}, "OK")
+
+
+def status(code):
+    """Build a response with the given status."""
+    return HttpResponse(code, "", {}, "Reason")
+
+
+class TestTransport:
+    """Test retries, timeouts and error handling."""
+
+    def test_passes_separate_connect_and_read_timeouts(self):
+        """Test that connect and read timeouts are sent as a pair."""
+        transport = ScriptedTransport([ok()], connect_timeout=1.5, read_timeout=7)
+        response = transport.get("https://example.invalid")
+        assert response.status == 200
+        assert response.text == "ok"
+        assert transport.calls == [(1.5, 7)]
+
+    def test_retries_transient_statuses(self):
+        """Test that a 5xx followed by a success returns the success."""
+        transport = ScriptedTransport([status(503), ok()])
+        assert transport.get("https://example.invalid").text == "ok"
+        assert len(transport.calls) == 2
+
+    def test_retries_connection_errors(self):
+        """Test that connection errors are retried."""
+        transport = ScriptedTransport([ConnectionResetError("reset"), ok()])
+        assert transport.get("https://example.invalid").text == "ok"
+        assert len(transport.calls) == 2
+
+    def test_gives_up_after_retries(self):
+        """Test that persistent failures raise after the configured retries."""
+        transport = ScriptedTransport([status(502)] * 3, retries=2)
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid")
+        assert len(transport.calls) == 3
+
+    def test_client_errors_are_not_retried(self):
+        """Test that 4xx responses fail immediately."""
+        transport = ScriptedTransport([status(404)])
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid")
+        assert len(transport.calls) == 1
+
+    def test_not_modified_is_returned(self):
+        """Test that 304 responses are passed back for revalidation."""
+        transport = ScriptedTransport([status(304)])
+        assert transport.get("https://example.invalid").status == 304
+
+    def test_backoff_delay_is_jittered_and_bounded(self):
+        """Test that backoff delays stay within the exponential bound."""
+        transport = HttpClientTransport(backoff=0.5)
+        for attempt in range(4):
+            assert 0 <= transport.backoff_delay(attempt) <= 0.5 * 2**attempt
+
+    def test_send_must_be_implemented(self):
+        """Test that a transport without _send can't be created."""
+
+        class Incomplete(Transport):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestFailureHandling:
+    """Test the circuit breaker and network deadline."""
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test that no requests are made once the failure threshold is hit."""
+        transport = ScriptedTransport(
+            [TimeoutError("timed out")] * 2, retries=5, failure_threshold=2
+        )
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid/wow")
+        assert transport.circuit_open
+
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid/wowt")
+        assert len(transport.calls) == 2
+
+    def test_success_resets_failure_count(self):
+        """Test that a successful response closes the circuit again."""
+        transport = ScriptedTransport(
+            [TimeoutError("timed out"), ok()], failure_threshold=2
+        )
+        transport.get("https://example.invalid")
+        assert not transport.circuit_open
+
+    def test_deadline_caps_timeouts(self):
+        """Test that timeouts never exceed the time left before the deadline."""
+        transport = ScriptedTransport([ok()], deadline=2)
+        transport.get("https://example.invalid")
+        connect_timeout, read_timeout = transport.calls[0]
+        assert connect_timeout <= 2
+        assert read_timeout <= 2
+
+    def test_expired_deadline_stops_requests(self):
+        """Test that no request is made after the deadline has passed."""
+        transport = ScriptedTransport([], deadline=0)
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid")
+        assert transport.calls == []
+
+    def test_deadline_starts_at_first_request(self):
+        """Test that time passed before the first request doesn't count."""
+        transport = ScriptedTransport([ok(), ok()], deadline=0.2)
+        time.sleep(0.3)
+        assert transport.get("https://example.invalid").text == "ok"
+        assert transport.remaining() <= 0.2
+
+        time.sleep(0.3)
+        with pytest.raises(TransportError):
+            transport.get("https://example.invalid")
+        assert len(transport.calls) == 1
+
+
+@pytest.fixture
+def local_server():
+    """Serve a fixed body over keep-alive HTTP/1.1 on localhost."""
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_GET(self):
+            if self.path == "/slow":
+                threading.Event().wait(1)
+            body = b"us|11.1.5.61559"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"abc"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", connections
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpClientTransport:
+    """Test the standard library transport against a local server."""
+
+    def test_reuses_connections(self, local_server):
+        """Test that sequential requests share one keep-alive connection."""
+        base_url, connections = local_server
+        transport = HttpClientTransport()
+        for product in ["wow", "wowt", "wowxptr"]:
+            response = transport.get(f"{base_url}/{product}")
+            assert response.status == 200
+            assert response.text == "us|11.1.5.61559"
+            assert response.headers.get("etag") == '"abc"'
+        transport.close()
+        assert len(connections) == 1
+
+    def test_read_timeout(self, local_server):
+        """Test that slow responses fail with the read timeout."""
+        base_url, _ = local_server
+        transport = HttpClientTransport(read_timeout=0.1, retries=0)
+        with pytest.raises(TransportError):
+            transport.get(f"{base_url}/slow")
+        transport.close()
+
+
+class TestRequestsTransport:
+    """Test the optional requests based transport."""
+
+    def test_connection_errors_are_retried(self, monkeypatch):
+        """Test that requests errors are translated into retryable failures."""
+        requests = pytest.importorskip("requests")
+
+        class Response:
+            status_code = 200
+            reason = "OK"
+            text = "ok"
+            headers = {}
+
+        outcomes = [requests.ConnectionError("reset"), Response()]
+
+        def fake_get(url, headers=None, timeout=None):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        transport = RequestsTransport(backoff=0)
+        monkeypatch.setattr(transport.session, "get", fake_get)
+        assert transport.get("https://example.invalid").text == "ok"
+        assert outcomes == []
+
+
+class TestCreateTransport:
+    """Test picking a transport for the environment."""
+
+    def test_stdlib_by_default(self, clean_environment):
+        """Test that direct connections use the stdlib transport."""
+        assert isinstance(create_transport(), HttpClientTransport)
+
+    @pytest.mark.parametrize("name", ["HTTPS_PROXY", "http_proxy", "ALL_PROXY"])
+    def test_requests_with_proxy(self, clean_environment, monkeypatch, name):
+        """Test that proxies switch to requests, which honours them."""
+        pytest.importorskip("requests")
+        monkeypatch.setenv(name, "http://proxy.invalid:3128")
+        assert isinstance(create_transport(), RequestsTransport)
+
+    def test_stdlib_with_proxy_without_requests(self, clean_environment, monkeypatch):
+        """Test that the stdlib transport is still used when requests is missing."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.invalid:3128")
+        monkeypatch.setitem(sys.modules, "requests", None)
+        assert isinstance(create_transport(), HttpClientTransport)
+
+    def test_stdlib_uses_ca_bundle(self, clean_environment, monkeypatch, tmp_path):
+        """Test that the stdlib transport verifies against $REQUESTS_CA_BUNDLE."""
+        import ssl
+
+        cafiles = []
+
+        def create_default_context(cafile=None):
+            cafiles.append(cafile)
+            return ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+        monkeypatch.setattr(ssl, "create_default_context", create_default_context)
+        monkeypatch.setenv("REQUESTS_CA_BUNDLE", str(tmp_path / "ca.pem"))
+        transport = create_transport()
+        assert isinstance(transport, HttpClientTransport)
+        transport._create_ssl_context()
+        assert cafiles == [str(tmp_path / "ca.pem")]
+
+    def test_requests_through_proxy(self, clean_environment, monkeypatch, local_server):
+        """Test that requests are sent through the configured proxy."""
+        pytest.importorskip("requests")
+        base_url, connections = local_server
+        monkeypatch.setenv("HTTP_PROXY", base_url)
+        transport = create_transport(retries=0)
+        assert transport.get("http://version.invalid/wow").text == "us|11.1.5.61559"
+        transport.close()
+        assert len(connections) == 1
+
+
+class TestImportTime:
+    """Test that starting the CLI doesn't pull in heavy dependencies."""
+
+    # Imported by requests, none of them are needed unless --transport requests
+    HEAVY_MODULES = {"requests", "urllib3", "idna", "charset_normalizer", "certifi"}
+
+    def test_cli_import_avoids_heavy_modules(self):
+        """Test the import-time budget: no HTTP stack is loaded up front."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "import sys; before = set(sys.modules); "
+            "import toc_interface_updater.cli; "
+            "print('\\n'.join(sorted(set(sys.modules) - before)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = set(result.stdout.split())
+
+        assert not {name.split(".")[0] for name in imported} & self.HEAVY_MODULES
+        assert "ssl" not in imported
+        assert "http.client" not in imported
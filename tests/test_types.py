@@ -0,0 +1,36 @@
+"""Unit tests for shared types."""
+
+import pytest
+
+from toc_interface_updater.types import InterfaceVersion
+
+
+class TestInterfaceVersion:
+    """Test the interface version value type."""
+
+    def test_parse(self):
+        """Test parsing versions from strings."""
+        version = InterfaceVersion.parse(" 110105 ")
+        assert version == 110105
+        assert InterfaceVersion.parse(version) is version
+        with pytest.raises(ValueError):
+            InterfaceVersion.parse("11.1.5")
+
+    def test_parts(self):
+        """Test the major, minor and patch accessors."""
+        version = InterfaceVersion.from_parts(11, 1, 5)
+        assert version == 110105
+        assert (version.major, version.minor, version.patch) == (11, 1, 5)
+        assert InterfaceVersion(11507).dotted() == "1.15.7"
+
+    def test_formatting(self):
+        """Test that versions format as their number."""
+        version = InterfaceVersion(50500)
+        assert str(version) == "50500"
+        assert f"{version}" == "50500"
+        assert repr(version) == "InterfaceVersion(50500)"
+
+    def test_numeric_ordering(self):
+        """Test that versions with different digit counts sort numerically."""
+        versions = [InterfaceVersion.parse(v) for v in ["110000", "90207", "11507"]]
+        assert sorted(versions) == [11507, 90207, 110000]
@@ -171,3 +171,138 @@ def test_update_toc_files_with_beta_flag(toc_files, product_versions, monkeypatc
             )
             print(f"\nDifference in {filename}:\n{diff}")
         assert actual == expected, f"File: {filename}"
+
+
+def test_update_file_applies_all_products_in_one_pass(toc_files, monkeypatch):
+    from toc_interface_updater import update
+
+    reads = []
+    original_read = update.read_toc_header
+
+    def counting_read(file_path):
+        reads.append(file_path)
+        return original_read(file_path)
+
+    monkeypatch.setattr(update, "read_toc_header", counting_read)
+    version_cache = {
+        "wow": "110105",
+        "wow_classic": "50500",
+        "wow_classic_era": "11507",
+    }
+    file_path = str(toc_files / "multi.toc")
+
+    result = update.update_file(
+        file_path,
+        [("wow", False), ("wow_classic", True), ("wow_classic_era", True)],
+        False,
+        False,
+        version_cache,
+    )
+
+    assert reads == [file_path]
+    assert result.path == file_path
+    assert result.modified
+    assert result.skipped == []
+    assert (toc_files / "multi.toc").read_text() == (
+        f"{InterfaceDirective.BASE} 110105\n{InterfaceDirective.VANILLA} 11507\n"
+        f"{InterfaceDirective.CLASSIC} 50500\n{InterfaceDirective.CURRENT_CLASSIC} 50500\n"
+        "\nfile.lua\n"
+    )
+
+
+def test_update_file_skips_unavailable_products(toc_files):
+    from toc_interface_updater.update import update_file
+
+    version_cache = {"wow": "110105", "wow_classic": None, "wow_classic_era": "11507"}
+    result = update_file(
+        str(toc_files / "multi.toc"),
+        [("wow", False), ("wow_classic", True), ("wow_classic_era", True)],
+        False,
+        False,
+        version_cache,
+    )
+
+    assert result.skipped == ["No version available for wow_classic"]
+
+    # Classic directives keep their original values
+    assert (toc_files / "multi.toc").read_text() == (
+        f"{InterfaceDirective.BASE} 110105\n{InterfaceDirective.VANILLA} 11507\n"
+        f"{InterfaceDirective.CLASSIC} 40401\n{InterfaceDirective.CURRENT_CLASSIC} 40400\n"
+        "\nfile.lua\n"
+    )
+
+
+def test_update_file_without_directive(tmp_path):
+    from toc_interface_updater.update import update_file
+
+    path = tmp_path / "Addon.toc"
+    path.write_text("## Title: Addon\n\nfile.lua\n" * 5000)
+
+    result = update_file(str(path), [("wow", False)], False, False, {})
+    assert not result.modified
+
+
+def test_update_file_preserves_line_endings(tmp_path):
+    from toc_interface_updater.update import update_file
+
+    path = tmp_path / "Addon.toc"
+    path.write_bytes(
+        f"{InterfaceDirective.BASE} 110000\r\n## Title: Caf\xe9\r\n\r\nfile.lua".encode()
+    )
+
+    result = update_file(str(path), [("wow", False)], False, False, {"wow": "110105"})
+    assert result.modified
+    assert path.read_bytes() == (
+        f"{InterfaceDirective.BASE} 110105\r\n## Title: Caf\xe9\r\n\r\nfile.lua".encode()
+    )
+
+
+def test_update_file_large_file(tmp_path):
+    from toc_interface_updater.update import update_file
+
+    body = "file.lua\n" * 5000
+    path = tmp_path / "Addon.toc"
+    path.write_text(f"{InterfaceDirective.BASE} 110000\n{body}")
+
+    result = update_file(str(path), [("wow", False)], False, False, {"wow": "110105"})
+    assert result.modified
+    assert path.read_text() == f"{InterfaceDirective.BASE} 110105\n{body}"
+
+
+def test_update_file_deduplicates_identical_headers(tmp_path, monkeypatch):
+    from toc_interface_updater import update
+
+    calls = []
+    original_update = update.update_content
+
+    def counting_update(*args):
+        calls.append(args[1])
+        return original_update(*args)
+
+    monkeypatch.setattr(update, "update_content", counting_update)
+    update.clear_update_cache()
+    version_cache = {"wow": "110105"}
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"Addon{i}.toc"
+        path.write_text(f"{InterfaceDirective.BASE} 110000\n\nfile{i}.lua\n")
+        paths.append(path)
+
+    results = [
+        update.update_file(str(path), [("wow", False)], False, False, version_cache)
+        for path in paths
+    ]
+
+    assert calls == ["wow"]
+    assert all(result.modified for result in results)
+    for i, path in enumerate(paths):
+        assert path.read_text() == f"{InterfaceDirective.BASE} 110105\n\nfile{i}.lua\n"
+
+    # Now current, the "no change" decision is shared too
+    calls.clear()
+    results = [
+        update.update_file(str(path), [("wow", False)], False, False, version_cache)
+        for path in paths
+    ]
+    assert calls == ["wow"]
+    assert not any(result.modified for result in results)
@@ -0,0 +1,209 @@
+"""Unit tests for the Battle.net version client."""
+
+import threading
+import time
+
+import pytest
+
+from toc_interface_updater.transport import HttpResponse, TransportError
+from toc_interface_updater.types import InterfaceVersion
+from toc_interface_updater.version_client import (
+    BASE_URL_ENV,
+    DEFAULT_BASE_URL,
+    VersionUnavailable,
+    prefetch_versions,
+    product_version,
+    set_base_url,
+    versions_url,
+)
+from toc_interface_updater.version_store import StoreEntry, VersionStore
+
+VERSIONS_PAYLOAD = """Region!STRING:0|BuildConfig!HEX:16|CDNConfig!HEX:16|KeyRing!HEX:16|BuildId!DEC:4|VersionsName!String:0|ProductConfig!HEX:16
+## seqn = 3020098
+us|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+eu|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+"""
+
+
+def respond(text="", status=200, headers=None):
+    """Build a canned response."""
+    return HttpResponse(status, text, headers or {})
+
+
+def fail(url, headers):
+    """Handler for tests that must not touch the network."""
+    raise AssertionError("unexpected request")
+
+
+class TestProductVersion:
+    """Test single product lookups."""
+
+    def test_product_version_parses_us_region(self, use_transport):
+        """Test that the US build is converted to an interface version."""
+        use_transport(lambda url, headers: respond(VERSIONS_PAYLOAD))
+        cache = {}
+        assert product_version("wow", cache) == InterfaceVersion(110105)
+        assert cache == {"wow": InterfaceVersion(110105)}
+
+    def test_product_version_caches_failures(self, use_transport):
+        """Test that a failed lookup raises and is not repeated."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url)
+            raise TransportError("timed out")
+
+        use_transport(handler)
+        cache = {}
+        for _ in range(2):
+            with pytest.raises(VersionUnavailable):
+                product_version("wow", cache)
+        assert requested == ["https://us.version.battle.net/v2/products/wow/versions"]
+
+    def test_product_version_uses_cache(self, use_transport):
+        """Test that cached products never hit the network."""
+        use_transport(fail)
+        assert product_version("wow", {"wow": "110000"}) == InterfaceVersion(110000)
+
+
+class TestPrefetchVersions:
+    """Test batch prefetching of product versions."""
+
+    def test_prefetch_fetches_concurrently(self, use_transport):
+        """Test that all missing products are in flight at the same time."""
+        products = ["wow", "wowt", "wow_beta", "wow_classic"]
+        barrier = threading.Barrier(len(products), timeout=5)
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url)
+            # Only passes if every request is waiting at once
+            barrier.wait()
+            return respond(VERSIONS_PAYLOAD)
+
+        use_transport(handler)
+        cache = {}
+        prefetch_versions(products, cache)
+
+        assert len(requested) == len(products)
+        assert cache == {product: InterfaceVersion(110105) for product in products}
+
+    def test_prefetch_skips_cached_and_duplicate_products(self, use_transport):
+        """Test that cached products and duplicates are fetched at most once."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url)
+            return respond(VERSIONS_PAYLOAD)
+
+        use_transport(handler)
+        cache = {"wow": "110000"}
+        prefetch_versions(["wow", "wowt", "wowt"], cache)
+
+        assert requested == ["https://us.version.battle.net/v2/products/wowt/versions"]
+        assert cache == {"wow": "110000", "wowt": InterfaceVersion(110105)}
+
+    def test_prefetch_caches_failures(self, use_transport):
+        """Test that failed products are remembered and never retried."""
+        requested = []
+
+        def handler(url, headers):
+            requested.append(url)
+            raise TransportError("503 Service Unavailable")
+
+        use_transport(handler)
+        cache = {}
+        prefetch_versions(["wow"], cache)
+        assert cache == {"wow": None}
+
+        with pytest.raises(VersionUnavailable):
+            product_version("wow", cache)
+        assert len(requested) == 1
+
+
+class TestPersistentStore:
+    """Test prefetching through the on-disk version store."""
+
+    def test_fresh_entry_skips_network(self, tmp_path, use_transport):
+        """Test that fresh stored versions are used without any request."""
+        use_transport(fail)
+        store = VersionStore.load(str(tmp_path), ttl=60)
+        store.put("wow", StoreEntry("110105", VERSIONS_PAYLOAD, time.time()))
+
+        cache = {}
+        prefetch_versions(["wow"], cache, store=store)
+        assert cache == {"wow": InterfaceVersion(110105)}
+
+    def test_stale_entry_is_served_and_revalidated(self, tmp_path, use_transport):
+        """Test that stale entries are used immediately and refreshed with a 304."""
+        seen_headers = []
+
+        def handler(url, headers):
+            seen_headers.append(headers)
+            return respond(status=304)
+
+        use_transport(handler)
+        store = VersionStore.load(str(tmp_path), ttl=60, stale_while_revalidate=600)
+        store.put(
+            "wow",
+            StoreEntry("110105", VERSIONS_PAYLOAD, time.time() - 120, etag='"abc"'),
+        )
+
+        cache = {}
+        prefetch_versions(["wow"], cache, store=store)
+        assert cache == {"wow": InterfaceVersion(110105)}
+
+        store.save()
+        assert seen_headers == [{"If-None-Match": '"abc"'}]
+        assert store.is_fresh(store.get("wow"), time.time())
+
+    def test_expired_entry_blocks_on_revalidation(self, tmp_path, use_transport):
+        """Test that entries past the stale window are refetched before use."""
+        use_transport(
+            lambda url, headers: respond(
+                VERSIONS_PAYLOAD.replace("11.1.5", "11.2.0"), headers={"ETag": '"def"'}
+            )
+        )
+        store = VersionStore.load(str(tmp_path), ttl=60, stale_while_revalidate=60)
+        store.put("wow", StoreEntry("110105", VERSIONS_PAYLOAD, time.time() - 600))
+
+        cache = {}
+        prefetch_versions(["wow"], cache, store=store)
+        assert cache == {"wow": InterfaceVersion(110200)}
+        assert store.get("wow").etag == '"def"'
+
+    def test_failed_revalidation_falls_back_to_stored_entry(
+        self, tmp_path, use_transport
+    ):
+        """Test that an unreachable server doesn't discard a stored version."""
+
+        def handler(url, headers):
+            raise TransportError("503 Service Unavailable")
+
+        use_transport(handler)
+        store = VersionStore.load(str(tmp_path), ttl=60, stale_while_revalidate=60)
+        store.put("wow", StoreEntry("110105", VERSIONS_PAYLOAD, time.time() - 600))
+
+        cache = {}
+        prefetch_versions(["wow"], cache, store=store)
+        assert cache == {"wow": InterfaceVersion(110105)}
+
+
+class TestBaseUrl:
+    """Test pointing lookups at another version server."""
+
+    def test_default(self, monkeypatch):
+        """Test that Battle.net is used by default."""
+        monkeypatch.delenv(BASE_URL_ENV, raising=False)
+        assert versions_url("wow") == f"{DEFAULT_BASE_URL}/v2/products/wow/versions"
+
+    def test_override(self, monkeypatch):
+        """Test that a set base URL takes precedence over the environment."""
+        monkeypatch.setenv(BASE_URL_ENV, "http://127.0.0.1:8080/")
+        assert versions_url("wow") == "http://127.0.0.1:8080/v2/products/wow/versions"
+
+        previous = set_base_url("http://localhost:9000")
+        try:
+            assert versions_url("wow").startswith("http://localhost:9000/v2/")
+        finally:
+            set_base_url(previous)
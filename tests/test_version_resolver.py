@@ -1,10 +1,21 @@
 """Unit tests for version resolver functions."""
 
+import itertools
+
+import pytest
+
+from toc_interface_updater import version_resolver
 from toc_interface_updater.constants import InterfaceDirective
 from toc_interface_updater.version_resolver import (
+    collect_all_versions,
     detect_existing_versions,
     get_beta_products,
+    get_lookup_products,
+    get_needed_products,
+    get_product_for_version,
     get_test_products,
+    get_versions_from_detected,
+    resolve_interface,
 )
 
 
@@ -96,3 +107,143 @@ class TestVersionDetection:
         versions, is_single_multi = detect_existing_versions(content, "wow", False)
         assert versions == set()
         assert not is_single_multi
+
+
+class TestNeededProducts:
+    """Test working out the products a file needs before fetching."""
+
+    def test_get_lookup_products(self):
+        """Test that beta and test products are added when requested."""
+        assert get_lookup_products("wow", False, False) == ["wow"]
+        assert get_lookup_products("wow", True, True) == [
+            "wow",
+            "wow_beta",
+            "wowt",
+            "wowxptr",
+        ]
+        assert get_lookup_products("wow_classic_era", True, False) == [
+            "wow_classic_era"
+        ]
+
+    def test_get_product_for_version(self):
+        """Test mapping interface versions to products by major version."""
+        assert get_product_for_version("11507") == "wow_classic_era"
+        assert get_product_for_version("50500") == "wow_classic"
+        assert get_product_for_version("110105") == "wow"
+
+    def test_needed_products_plain_interface(self):
+        """Test that a plain interface line needs the file's product."""
+        content = f"{InterfaceDirective.BASE} 110000\n## Title: Test Addon"
+        assert get_needed_products(content, "wow", False, False, True) == {
+            "wow",
+            "wowt",
+            "wowxptr",
+        }
+
+    def test_needed_products_single_line_multi(self):
+        """Test that detected versions decide the products, not the flavor."""
+        content = f"{InterfaceDirective.BASE} 11507, 110000\n## Title: Test Addon"
+        assert get_needed_products(content, "wow_classic", False, False, False) == {
+            "wow_classic_era",
+            "wow",
+        }
+
+    def test_needed_products_without_directive(self):
+        """Test that multi-line passes without their directive need nothing."""
+        content = f"{InterfaceDirective.BASE} 110000\n## Title: Test Addon"
+        assert (
+            get_needed_products(content, "wow_classic_era", True, True, True) == set()
+        )
+
+
+class TestResolveInterface:
+    """Test memoized interface resolution."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        version_resolver.clear_interface_cache()
+        yield
+        version_resolver.clear_interface_cache()
+
+    def test_detected_versions(self):
+        """Test that detected versions resolve to their products' versions."""
+        version_cache = {"wow": "110105", "wow_classic_era": "11507"}
+        assert (
+            resolve_interface(
+                "wow", frozenset({"11506", "110100"}), False, False, version_cache
+            )
+            == "11507, 110105"
+        )
+
+    def test_versions_compare_numerically(self):
+        """Test that a test version with more digits counts as newer."""
+        version_cache = {"wow": "90207", "wowt": "100000", "wowxptr": "90207"}
+        assert collect_all_versions("wow", False, True, version_cache) == {
+            90207,
+            100000,
+        }
+        assert resolve_interface("wow", frozenset(), False, True, version_cache) == (
+            "90207, 100000"
+        )
+
+    def test_detected_order_independent(self):
+        """Test that the order detected versions are seen in doesn't change the result."""
+        version_cache = {
+            "wow": "110205",
+            "wowt": "110207",
+            "wowxptr": "110207",
+            "wow_beta": "120000",
+        }
+        results = {
+            frozenset(get_versions_from_detected(order, True, True, version_cache))
+            for order in itertools.permutations(["110205", "110207", "120000"])
+        }
+        assert results == {frozenset({110205, 110207, 120000})}
+
+    def test_memoized(self, monkeypatch):
+        """Test that the same versions are only resolved once."""
+        calls = []
+        original = version_resolver.get_versions_from_detected
+
+        def counting(*args):
+            calls.append(args)
+            return original(*args)
+
+        monkeypatch.setattr(version_resolver, "get_versions_from_detected", counting)
+        version_cache = {"wow": "110105"}
+        for _ in range(3):
+            assert (
+                resolve_interface(
+                    "wow", frozenset({"110000"}), False, False, version_cache
+                )
+                == "110105"
+            )
+        assert len(calls) == 1
+
+    def test_invalidated_by_version_cache(self):
+        """Test that a different version cache gives a fresh resolution."""
+        detected = frozenset({"110000"})
+        assert resolve_interface("wow", detected, False, False, {"wow": "110105"}) == (
+            "110105"
+        )
+        assert resolve_interface("wow", detected, False, False, {"wow": "110107"}) == (
+            "110107"
+        )
+
+    def test_not_memoized_when_versions_fetched(self, monkeypatch):
+        """Test that a resolution that fetched versions isn't reused for an empty cache."""
+        from toc_interface_updater import version_client
+
+        monkeypatch.setattr(version_client, "fetch_product_version", lambda p: 110105)
+        assert resolve_interface("wow", frozenset(), False, False, {}) == "110105"
+
+        monkeypatch.setattr(version_client, "fetch_product_version", lambda p: 110107)
+        assert resolve_interface("wow", frozenset(), False, False, {}) == "110107"
+
+    def test_unavailable_not_memoized(self):
+        """Test that failures are raised every time rather than cached."""
+        from toc_interface_updater.version_client import VersionUnavailable
+
+        for _ in range(2):
+            with pytest.raises(VersionUnavailable):
+                resolve_interface("wow", frozenset(), False, False, {"wow": None})
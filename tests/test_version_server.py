@@ -0,0 +1,152 @@
+"""Tests for the local version server."""
+
+import json
+import time
+
+import pytest
+
+from toc_interface_updater.cli import main
+from toc_interface_updater.constants import InterfaceDirective
+from toc_interface_updater.transport import HttpClientTransport, TransportError
+from toc_interface_updater.types import InterfaceVersion
+from toc_interface_updater.version_client import (
+    BASE_URL_ENV,
+    fetch_product_entry,
+    fetch_product_version,
+    versions_url,
+)
+from toc_interface_updater.version_server import (
+    Faults,
+    RecordedResponse,
+    VersionServer,
+    load_cassette,
+)
+
+PAYLOAD = """Region!STRING:0|BuildConfig!HEX:16|CDNConfig!HEX:16|KeyRing!HEX:16|BuildId!DEC:4|VersionsName!String:0|ProductConfig!HEX:16
+## seqn = 1
+us|be2bb98dc28aee05bbee519393696cdb|fac77b9ca52c84ac28ad83a7dbe1c829|3ca57fe7319a297346440e4d2a03a0cd|61559|11.1.5.61559|53020d32e1a25648c8e1eafd5771935f
+"""
+
+
+@pytest.fixture
+def transport():
+    transport = HttpClientTransport(retries=0, read_timeout=2)
+    yield transport
+    transport.close()
+
+
+def serve(monkeypatch, **kwargs):
+    """Start a server with a wow response and point lookups at it."""
+    server = VersionServer({"wow": RecordedResponse(200, PAYLOAD)}, **kwargs).start()
+    monkeypatch.setenv(BASE_URL_ENV, server.url)
+    return server
+
+
+class TestVersionServer:
+    """Test serving versions documents."""
+
+    def test_fixtures(self, version_server, transport):
+        """Test that the bundled fixtures are served for every product."""
+        assert fetch_product_version("wow", transport) == InterfaceVersion(110205)
+        assert fetch_product_version("wow_classic_era", transport) == InterfaceVersion(
+            11507
+        )
+        assert fetch_product_version("wow_classic_era_beta", transport) is None
+        assert version_server.requests == [
+            "wow",
+            "wow_classic_era",
+            "wow_classic_era_beta",
+        ]
+
+    def test_revalidation(self, version_server, transport):
+        """Test that unchanged documents are answered with 304 Not Modified."""
+        entry = fetch_product_entry("wow", transport=transport)
+        assert entry.etag
+        revalidated = fetch_product_entry("wow", entry, transport)
+        assert revalidated.payload == entry.payload
+        assert revalidated.fetched_at >= entry.fetched_at
+
+    def test_unknown_product(self, version_server, transport):
+        """Test that products without a response are not found."""
+        with pytest.raises(TransportError, match="404"):
+            transport.get(versions_url("wow_unknown"))
+
+    def test_version_server_flag(
+        self, version_server_session, toc_files, monkeypatch, capsys
+    ):
+        """Test that --version-server points the CLI at another server."""
+        monkeypatch.delenv(BASE_URL_ENV, raising=False)
+        monkeypatch.chdir(toc_files)
+        main(["--version-server", version_server_session.url])
+
+        assert (
+            (toc_files / "default.toc")
+            .read_text()
+            .startswith(f"{InterfaceDirective.BASE} 110205\n")
+        )
+
+
+class TestFaults:
+    """Test injecting latency and failures."""
+
+    def test_latency(self, monkeypatch, transport):
+        """Test that responses are delayed."""
+        with serve(monkeypatch, faults=Faults(latency=0.2)):
+            start = time.monotonic()
+            assert fetch_product_version("wow", transport) == InterfaceVersion(110105)
+            assert time.monotonic() - start >= 0.2
+
+    def test_errors(self, monkeypatch, transport):
+        """Test that injected errors are reported by the transport."""
+        with serve(monkeypatch, faults=Faults(error_rate=1.0, error_status=503)):
+            with pytest.raises(TransportError, match="503"):
+                transport.get(versions_url("wow"))
+
+    def test_timeouts(self, monkeypatch):
+        """Test that dropped requests time out on the client."""
+        transport = HttpClientTransport(retries=0, read_timeout=0.2)
+        with serve(monkeypatch, faults=Faults(timeout_rate=1.0, hang=5)):
+            start = time.monotonic()
+            with pytest.raises(TransportError):
+                transport.get(versions_url("wow"))
+            assert time.monotonic() - start < 2
+        transport.close()
+
+
+class TestRecordReplay:
+    """Test recording responses to a cassette and replaying them."""
+
+    def test_record_then_replay(self, monkeypatch, tmp_path, transport):
+        """Test that recorded responses are replayed without the upstream server."""
+        cassette = str(tmp_path / "versions.json")
+        with serve(monkeypatch) as upstream:
+            with VersionServer(upstream=upstream.url, cassette=cassette) as recorder:
+                monkeypatch.setenv(BASE_URL_ENV, recorder.url)
+                assert fetch_product_version("wow", transport) == InterfaceVersion(
+                    110105
+                )
+        assert upstream.requests == ["wow"]
+
+        transport.close()
+        with VersionServer(load_cassette(cassette)) as replay:
+            monkeypatch.setenv(BASE_URL_ENV, replay.url)
+            assert fetch_product_version("wow", transport) == InterfaceVersion(110105)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            [],
+            {"format": 2, "responses": {}},
+            {"format": 1},
+            {"format": 1, "responses": []},
+            {"format": 1, "responses": {"wow": "110105"}},
+            {"format": 1, "responses": {"wow": {"status": "200", "body": ""}}},
+            {"format": 1, "responses": {"wow": {"status": 200}}},
+        ],
+    )
+    def test_invalid_cassette(self, tmp_path, data):
+        """Test that malformed cassettes raise ValueError."""
+        path = tmp_path / "versions.json"
+        path.write_text(json.dumps(data))
+        with pytest.raises(ValueError):
+            load_cassette(str(path))
@@ -0,0 +1,88 @@
+"""Unit tests for the persistent version store."""
+
+import json
+import os
+
+from toc_interface_updater.version_store import (
+    CACHE_FILE_NAME,
+    CACHE_FORMAT_VERSION,
+    StoreEntry,
+    VersionStore,
+    default_cache_dir,
+)
+
+
+class TestVersionStore:
+    """Test loading, saving and expiry of stored versions."""
+
+    def test_default_cache_dir_uses_xdg(self, monkeypatch, tmp_path):
+        """Test that $XDG_CACHE_HOME is honoured."""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert default_cache_dir() == os.path.join(
+            str(tmp_path), "toc-interface-updater"
+        )
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test that entries survive a save and reload."""
+        store = VersionStore.load(str(tmp_path))
+        entry = StoreEntry("110105", "payload", 1000.0, '"etag"', "yesterday")
+        store.put("wow", entry)
+        store.save()
+
+        assert VersionStore.load(str(tmp_path)).get("wow") == entry
+
+    def test_load_ignores_corrupt_file(self, tmp_path):
+        """Test that an unreadable cache file starts an empty store."""
+        (tmp_path / CACHE_FILE_NAME).write_text("{not json")
+        assert VersionStore.load(str(tmp_path)).get("wow") is None
+
+    def test_load_ignores_unknown_format(self, tmp_path):
+        """Test that cache files from another format version are discarded."""
+        (tmp_path / CACHE_FILE_NAME).write_text(
+            json.dumps({"format": 999, "products": {}})
+        )
+        assert VersionStore.load(str(tmp_path)).get("wow") is None
+
+    def test_load_ignores_non_object_document(self, tmp_path):
+        """Test that valid JSON that isn't a cache object starts an empty store."""
+        (tmp_path / CACHE_FILE_NAME).write_text("[]")
+        assert VersionStore.load(str(tmp_path)).get("wow") is None
+
+    def test_load_discards_malformed_entries(self, tmp_path):
+        """Test that entries with missing or invalid fields are dropped."""
+        valid = {"version": "110105", "payload": "", "fetched_at": 1000.0}
+        (tmp_path / CACHE_FILE_NAME).write_text(
+            json.dumps(
+                {
+                    "format": CACHE_FORMAT_VERSION,
+                    "products": {
+                        "wow": valid,
+                        "wowt": {**valid, "version": None},
+                        "wowxptr": {**valid, "version": "11.1.5"},
+                        "wow_beta": {**valid, "fetched_at": "yesterday"},
+                        "wow_classic": ["110105"],
+                        "wow_classic_era": {"version": "11507"},
+                    },
+                }
+            )
+        )
+        store = VersionStore.load(str(tmp_path))
+        assert store.get("wow") == StoreEntry("110105", "", 1000.0)
+        for product in [
+            "wowt",
+            "wowxptr",
+            "wow_beta",
+            "wow_classic",
+            "wow_classic_era",
+        ]:
+            assert store.get(product) is None
+
+    def test_freshness_windows(self, tmp_path):
+        """Test the TTL and stale-while-revalidate windows."""
+        store = VersionStore.load(str(tmp_path), ttl=10, stale_while_revalidate=20)
+        entry = StoreEntry("110105", "payload", 100.0)
+
+        assert store.is_fresh(entry, 105.0)
+        assert not store.is_fresh(entry, 115.0)
+        assert store.is_revalidatable(entry, 125.0)
+        assert not store.is_revalidatable(entry, 135.0)
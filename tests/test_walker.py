@@ -0,0 +1,145 @@
+"""Unit tests for the TOC file walker."""
+
+import io
+import os
+
+import pytest
+
+from toc_interface_updater.walker import (
+    IGNORE_FILE,
+    ExcludeRules,
+    build_exclude_rules,
+    collect_toc_files,
+    read_file_list,
+    walk_toc_files,
+)
+
+
+def make_tree(root, paths):
+    for path in paths:
+        file_path = root / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("## Interface: 110000\n")
+
+
+def relative(root, files):
+    return [os.path.relpath(f, root).replace(os.sep, "/") for f in files]
+
+
+class TestWalkTocFiles:
+    """Test finding TOC files."""
+
+    def test_sorted_toc_files_only(self, tmp_path):
+        """Test that only .toc files are found, in sorted order."""
+        make_tree(tmp_path, ["b/B.toc", "a/A.toc", "a/A.lua", "Root.toc"])
+        assert relative(tmp_path, walk_toc_files(str(tmp_path))) == [
+            "Root.toc",
+            "a/A.toc",
+            "b/B.toc",
+        ]
+
+    def test_default_excludes(self, tmp_path):
+        """Test that VCS, build output and library directories are pruned."""
+        make_tree(
+            tmp_path,
+            [
+                "Addon/Addon.toc",
+                "Addon/Libs/LibStub/LibStub.toc",
+                ".git/x.toc",
+                ".release/Addon/Addon.toc",
+                "node_modules/pkg/pkg.toc",
+            ],
+        )
+        assert relative(tmp_path, walk_toc_files(str(tmp_path))) == ["Addon/Addon.toc"]
+
+    def test_without_default_excludes(self, tmp_path):
+        """Test that the default excludes can be disabled."""
+        make_tree(tmp_path, ["Addon/Addon.toc", "Addon/Libs/Lib/Lib.toc"])
+        rules = build_exclude_rules(str(tmp_path), default_excludes=False)
+        assert relative(tmp_path, walk_toc_files(str(tmp_path), rules)) == [
+            "Addon/Addon.toc",
+            "Addon/Libs/Lib/Lib.toc",
+        ]
+
+    def test_extra_excludes(self, tmp_path):
+        """Test that extra patterns match names and root-relative paths."""
+        make_tree(
+            tmp_path,
+            [
+                "Addon/Addon.toc",
+                "Addon/Addon_Vanilla.toc",
+                "Old/Old.toc",
+                "x/Old/A.toc",
+            ],
+        )
+        rules = build_exclude_rules(str(tmp_path), ["*_Vanilla.toc", "/Old/"])
+        assert relative(tmp_path, walk_toc_files(str(tmp_path), rules)) == [
+            "Addon/Addon.toc",
+            "x/Old/A.toc",
+        ]
+
+    def test_ignore_file(self, tmp_path):
+        """Test that patterns are read from the ignore file in the root."""
+        make_tree(tmp_path, ["Addon/Addon.toc", "Vendor/Lib/Lib.toc"])
+        (tmp_path / IGNORE_FILE).write_text("# vendored code\n\nVendor/\n")
+        assert relative(tmp_path, walk_toc_files(str(tmp_path))) == ["Addon/Addon.toc"]
+
+
+class TestExcludeRules:
+    """Test matching exclude patterns."""
+
+    def test_directory_only_pattern(self):
+        """Test that a trailing slash only matches directories."""
+        rules = ExcludeRules(["build/"])
+        assert rules.excludes("build", "build", True)
+        assert not rules.excludes("build", "build", False)
+
+    def test_comments_and_blank_lines(self):
+        """Test that comments and blank lines are ignored."""
+        rules = ExcludeRules(["# *", "", "   "])
+        assert not rules.excludes("Addon", "Addon", True)
+
+
+class TestExplicitPaths:
+    """Test collecting TOC files from explicit paths."""
+
+    def test_files_and_directories(self, tmp_path):
+        """Test that directories are walked and files are used as given."""
+        make_tree(tmp_path, ["A/A.toc", "B/B.toc", "B/Libs/Lib/Lib.toc", "C/C.lua"])
+        rules = build_exclude_rules(str(tmp_path))
+        paths = [
+            str(tmp_path / "B"),
+            str(tmp_path / "A" / "A.toc"),
+            str(tmp_path / "C" / "C.lua"),
+            str(tmp_path / "A" / "A.toc"),
+        ]
+        assert relative(tmp_path, collect_toc_files(paths, rules)) == [
+            "B/B.toc",
+            "A/A.toc",
+        ]
+
+    def test_path_excludes_relative_to_current_directory(self, tmp_path, monkeypatch):
+        """Test that path patterns apply to directories given explicitly."""
+        make_tree(tmp_path, ["Addons/New/New.toc", "Addons/Old/Old.toc"])
+        monkeypatch.chdir(tmp_path)
+        rules = ExcludeRules(["Addons/Old"])
+        for path in ["Addons", "./Addons/", str(tmp_path / "Addons"), "."]:
+            assert relative(
+                tmp_path, [os.path.abspath(p) for p in collect_toc_files([path], rules)]
+            ) == ["Addons/New/New.toc"]
+
+    def test_missing_path(self, tmp_path):
+        """Test that paths that don't exist are reported."""
+        with pytest.raises(FileNotFoundError):
+            collect_toc_files([str(tmp_path / "missing.toc")], ExcludeRules([]))
+
+    def test_read_file_list_lines(self, tmp_path):
+        """Test reading a newline separated list, ignoring blank lines."""
+        path = tmp_path / "files.txt"
+        path.write_bytes(b"A/A.toc\r\n\nB/B B.toc\n")
+        assert read_file_list(str(path)) == ["A/A.toc", "B/B B.toc"]
+
+    def test_read_file_list_nul(self, monkeypatch):
+        """Test reading a NUL separated list from stdin."""
+        monkeypatch.setattr("sys.stdin", io.StringIO("A/A.toc\0B/new\nline.toc\0"))
+        assert read_file_list("-") == ["A/A.toc", "B/new\nline.toc"]
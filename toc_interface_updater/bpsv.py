@@ -0,0 +1,154 @@
+"""Parser for the pipe-separated (BPSV) documents served by Battle.net."""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from .types import InterfaceVersion
+
+# "## seqn = 3020098"
+SEQN_PATTERN = re.compile(r"^##\s*seqn\s*=\s*(\d+)\s*$", re.IGNORECASE)
+
+Value = Union[str, int]
+
+
+class BpsvError(ValueError):
+    """Raised when a document doesn't follow the BPSV format."""
+
+
+class Field(NamedTuple):
+    """A column declared in the header as Name!TYPE:size."""
+
+    name: str
+    type: str
+    size: int
+
+
+class BpsvDocument:
+    """A parsed BPSV document with a column index built from its header."""
+
+    __slots__ = ("fields", "columns", "rows", "seqn")
+
+    def __init__(
+        self, fields: List[Field], rows: List[tuple], seqn: Optional[int] = None
+    ):
+        self.fields = fields
+        # Column names are matched case-insensitively, their casing varies
+        self.columns = {field.name.lower(): i for i, field in enumerate(fields)}
+        self.rows = rows
+        self.seqn = seqn
+
+    def column(self, name: str) -> Optional[int]:
+        """Get the index of a column, or None if the document doesn't have it."""
+        return self.columns.get(name.lower())
+
+
+def _parse_header(line: str) -> List[Field]:
+    """Parse the Name!TYPE:size header line."""
+    fields = []
+    for column in line.split("|"):
+        name, separator, spec = column.partition("!")
+        field_type, _, size = spec.partition(":")
+        if not separator or not name or not field_type:
+            raise BpsvError(f"Invalid BPSV header column: {column!r}")
+        fields.append(
+            Field(name, field_type.upper(), int(size) if size.isdigit() else 0)
+        )
+    return fields
+
+
+def parse(text: str) -> BpsvDocument:
+    """Parse a BPSV document, converting DEC columns to integers."""
+    fields: Optional[List[Field]] = None
+    decimal_columns: List[int] = []
+    rows: List[tuple] = []
+    seqn = None
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith("##"):
+            match = SEQN_PATTERN.match(line)
+            if match:
+                seqn = int(match.group(1))
+            continue
+
+        if fields is None:
+            fields = _parse_header(line)
+            decimal_columns = [i for i, f in enumerate(fields) if f.type == "DEC"]
+            continue
+
+        values: List[Value] = line.split("|")
+        if len(values) != len(fields):
+            raise BpsvError(
+                f"Expected {len(fields)} columns but found {len(values)}: {line!r}"
+            )
+        for i in decimal_columns:
+            try:
+                values[i] = int(values[i])
+            except ValueError:
+                raise BpsvError(
+                    f"Invalid {fields[i].name} value: {values[i]!r}"
+                ) from None
+        rows.append(tuple(values))
+
+    if fields is None:
+        raise BpsvError("Missing BPSV header")
+
+    return BpsvDocument(fields, rows, seqn)
+
+
+class VersionRecord:
+    """A region's row from a product versions document."""
+
+    __slots__ = ("region", "build_config", "cdn_config", "build_id", "versions_name")
+
+    def __init__(
+        self,
+        region: str,
+        build_config: str,
+        cdn_config: str,
+        build_id: int,
+        versions_name: str,
+    ):
+        self.region = region
+        self.build_config = build_config
+        self.cdn_config = cdn_config
+        self.build_id = build_id
+        self.versions_name = versions_name
+
+    def __repr__(self) -> str:
+        return f"VersionRecord({self.region!r}, {self.versions_name!r})"
+
+    def interface_version(self) -> InterfaceVersion:
+        """Convert the build name (e.g. 11.1.5.61559) into an interface version."""
+        parts = self.versions_name.split(".")
+        if len(parts) < 3 or not all(part.isdigit() for part in parts[:3]):
+            raise BpsvError(f"Invalid version name: {self.versions_name!r}")
+        major, minor, patch = parts[:3]
+        return InterfaceVersion.from_parts(int(major), int(minor), int(patch))
+
+
+def parse_versions(text: str) -> Dict[str, VersionRecord]:
+    """Parse a product versions document into records keyed by region."""
+    document = parse(text)
+
+    region = document.column("Region")
+    versions_name = document.column("VersionsName")
+    if region is None or versions_name is None:
+        raise BpsvError(
+            "Versions document is missing the Region or VersionsName column"
+        )
+    build_config = document.column("BuildConfig")
+    cdn_config = document.column("CDNConfig")
+    build_id = document.column("BuildId")
+
+    return {
+        row[region]: VersionRecord(
+            row[region],
+            row[build_config] if build_config is not None else "",
+            row[cdn_config] if cdn_config is not None else "",
+            row[build_id] if build_id is not None else 0,
+            row[versions_name],
+        )
+        for row in document.rows
+    }
@@ -1,15 +1,70 @@
 """Command line interface for the TOC interface updater."""
 
 import argparse
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
 
+from .console import GREEN, QUIET, YELLOW, Console, output_level, set_console
 from .constants import TocSuffix
-from .file_processor import process_files
-from .types import GameFlavor, VersionCache
+from .file_processor import find_toc_files, plan_files, process_files
+from .manifest import (
+    VERSIONS_FROM_ENV,
+    ManifestError,
+    build_manifest,
+    load_manifest,
+    write_manifest,
+)
+from .profiler import Profiler, ProfileSession, phase, set_profiler
+from .report import REPORT_FORMATS, NdjsonReport, parse_report_spec
+from .state import StateManifest, options_fingerprint
+from .transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    TRANSPORT_STDLIB,
+    TRANSPORTS,
+    Transport,
+    create_transport,
+    set_transport,
+)
+from .types import ExecutorKind, FileResult, GameFlavor, VersionCache
+from .version_client import (
+    BASE_URL_ENV,
+    DEFAULT_BASE_URL,
+    REGION,
+    get_base_url,
+    prefetch_versions,
+    set_base_url,
+)
+from .version_resolver import get_all_products
+from .version_store import (
+    DEFAULT_STALE_WHILE_REVALIDATE,
+    DEFAULT_TTL,
+    VersionStore,
+    default_cache_dir,
+)
+from .walker import (
+    DEFAULT_EXCLUDES,
+    IGNORE_FILE,
+    build_exclude_rules,
+    collect_toc_files,
+    read_file_list,
+)
 
-# ANSI escape sequences for colors and formatting
-RESET = "\033[0m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
+# Exit status of --check when any file is outdated
+EXIT_OUTDATED = 1
+# Exit status of --check when none is outdated but some versions couldn't be fetched
+EXIT_UNAVAILABLE = 2
+
+# First argument that runs the version manifest command instead of updating files.
+# A directory with this name is updated by passing it as ./versions or after --
+VERSIONS_COMMAND = "versions"
+
+# Files planned and processed at a time with --fail-fast
+FAIL_FAST_BATCH_SIZE = 64
 
 
 def flavor_type(value):
@@ -32,12 +87,237 @@ def flavor_type(value):
     return flavor_map[value.lower()]
 
 
-def main():
+def jobs_type(value):
+    """Convert a --jobs value to a worker count, where 0 means auto."""
+    if value.lower() == "auto":
+        return 0
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = -1
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(
+            f"Invalid jobs: {value}. Use a positive number or auto"
+        )
+    return jobs
+
+
+def report_type(value):
+    """Convert a --report value to a (format, path) pair."""
+    try:
+        return parse_report_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options controlling how much is printed."""
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Print more, -v lists every file checked and -vv version lookups",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="count",
+        default=0,
+        help="Only print errors and warnings",
+    )
+
+
+def print_summary(
+    console: Console,
+    results: List[FileResult],
+    unchanged_count: int,
+    dry_run: bool = False,
+) -> None:
+    """Print the modified, or outdated when nothing was written, files and counts for the run."""
+    modified_files = [result.path for result in results if result.modified]
+    console.info("")
+    if modified_files:
+        heading = "Files outdated:" if dry_run else "Files modified:"
+        color = YELLOW if dry_run else GREEN
+        console.info(console.style(heading, color))
+        for modified_file in modified_files:
+            console.info(console.style(modified_file, color))
+    elif dry_run:
+        console.info(console.style("All files are up to date.", GREEN))
+    else:
+        console.info(console.style("No files were modified.", YELLOW))
+
+    counts = [
+        f"{len(modified_files)} {'outdated' if dry_run else 'updated'}",
+        f"{len(results) - len(modified_files)} unchanged",
+    ]
+    if unchanged_count:
+        counts.append(f"{unchanged_count} skipped as unchanged since the last run")
+    skipped = sum(1 for result in results if result.skipped)
+    if skipped:
+        counts.append(f"{skipped} with unavailable versions")
+    console.info(f"Checked {len(results) + unchanged_count} files: {', '.join(counts)}")
+
+
+def add_network_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options controlling how versions are fetched and cached."""
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Persist fetched versions on disk between runs",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help=f"Directory for the persistent version cache (default: {default_cache_dir()})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help=f"Seconds a cached version is used without revalidation (default: {DEFAULT_TTL})",
+    )
+    parser.add_argument(
+        "--cache-stale",
+        type=float,
+        default=DEFAULT_STALE_WHILE_REVALIDATE,
+        help=f"Seconds an expired version is still used while it is revalidated (default: {DEFAULT_STALE_WHILE_REVALIDATE})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"Retries for failed version requests (default: {DEFAULT_RETRIES})",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help=f"Seconds to wait for a connection to the version server (default: {DEFAULT_CONNECT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help=f"Seconds to wait for a version server response (default: {DEFAULT_READ_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=TRANSPORT_STDLIB,
+        help=f"HTTP client used to fetch versions (default: {TRANSPORT_STDLIB})",
+    )
+    parser.add_argument(
+        "--network-deadline",
+        type=float,
+        default=None,
+        help="Maximum seconds spent fetching versions for the whole run",
+    )
+    parser.add_argument(
+        "--version-server",
+        metavar="URL",
+        default=None,
+        help=f"Base URL of the version server (default: {DEFAULT_BASE_URL}, env: {BASE_URL_ENV})",
+    )
+
+
+def open_version_sources(
+    args: argparse.Namespace,
+) -> tuple[Transport, Optional[VersionStore]]:
+    """Set up the shared transport and, if enabled, the persistent version store."""
+    transport = create_transport(
+        args.transport,
+        retries=args.retries,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        deadline=args.network_deadline,
+    )
+    set_transport(transport)
+    if args.version_server:
+        set_base_url(args.version_server)
+
+    store = None
+    if args.cache or args.cache_dir:
+        cache_dir = args.cache_dir
+        base_url = get_base_url()
+        if cache_dir is None and base_url != DEFAULT_BASE_URL:
+            # Keep versions from other servers out of the default cache
+            cache_dir = os.path.join(
+                default_cache_dir(), quote(urlsplit(base_url).netloc, safe="")
+            )
+        store = VersionStore.load(cache_dir, args.cache_ttl, args.cache_stale)
+
+    return transport, store
+
+
+def close_version_sources(transport: Transport, store: Optional[VersionStore]) -> None:
+    """Persist the version store and release pooled connections."""
+    if store is not None:
+        store.save()
+
+    set_transport(None)
+    set_base_url(None)
+    transport.close()
+
+
+def versions_main(argv: List[str]) -> None:
+    """Resolve every product once and write a version manifest."""
+    parser = argparse.ArgumentParser(
+        prog=VERSIONS_COMMAND,
+        description="Resolve all product versions and write them to a JSON manifest",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="Manifest path, or - for stdout (default: -)",
+    )
+    add_output_arguments(parser)
+    add_network_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # The manifest may go to stdout, so messages go to stderr
+    console = Console(output_level(args.verbose, args.quiet), sys.stderr)
+    previous_console = set_console(console)
+
+    transport, store = open_version_sources(args)
+    version_cache: VersionCache = {}
+    generated_at = time.time()
+    fetched_at = prefetch_versions(get_all_products(), version_cache, store=store)
+    close_version_sources(transport, store)
+
+    missing = [
+        product for product in get_all_products() if version_cache.get(product) is None
+    ]
+    if missing:
+        console.warning(f"No version available for: {', '.join(missing)}")
+    console.flush()
+    set_console(previous_console)
+
+    write_manifest(
+        build_manifest(version_cache, fetched_at, REGION, generated_at), args.output
+    )
+
+
+def main(argv: Optional[List[str]] = None):
     """Main CLI entry point."""
+    if argv is None:
+        argv = sys.argv[1:]
+    # Only a bare first argument is the command, so "./versions" or "-- versions" are paths
+    if argv and argv[0] == VERSIONS_COMMAND:
+        versions_main(argv[1:])
+        return
+
     # Get the current classic expansion name for help text
     current_classic_name = TocSuffix.CURRENT_CLASSIC.lower()
 
-    parser = argparse.ArgumentParser(description="WoW TOC Updater")
+    parser = argparse.ArgumentParser(
+        description="WoW TOC Updater",
+        epilog=f"Run '{VERSIONS_COMMAND} --help' for the version manifest command."
+        f" To update a directory named {VERSIONS_COMMAND}, pass it as"
+        f" ./{VERSIONS_COMMAND} or after --.",
+    )
     parser.add_argument(
         "-b", "--beta", action="store_true", help="Include beta versions"
     )
@@ -51,19 +331,286 @@ def main():
         default=GameFlavor.WOW,
         help=f"Game flavor (retail, mainline, classic, {current_classic_name}, classic_era, vanilla)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="TOC files or directories to update (default: the current directory)",
+    )
+    parser.add_argument(
+        "--files-from",
+        metavar="FILE",
+        help="Read more paths to update from FILE, or stdin for -, one per line or NUL separated",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=jobs_type,
+        default=1,
+        help="Number of files to process in parallel, or auto (default: 1)",
+    )
+    parser.add_argument(
+        "--executor",
+        type=ExecutorKind,
+        choices=list(ExecutorKind),
+        default=ExecutorKind.THREAD,
+        metavar="{" + ",".join(kind.value for kind in ExecutorKind) + "}",
+        help="Worker pool used with --jobs: threads for I/O bound trees, processes for CPU bound ones (default: thread)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=f"Glob of directories or files to skip, may be repeated (also read from {IGNORE_FILE})",
+    )
+    parser.add_argument(
+        "--no-default-excludes",
+        action="store_false",
+        dest="default_excludes",
+        help=f"Also search {', '.join(DEFAULT_EXCLUDES)}",
+    )
+    parser.add_argument(
+        "--versions-from",
+        default=os.environ.get(VERSIONS_FROM_ENV) or None,
+        help=f"Read versions from a manifest written by the versions command instead of fetching them (env: {VERSIONS_FROM_ENV})",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="FILE",
+        help="Remember processed files in FILE and skip those unchanged since the last run with the same versions",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Show which files would be updated without writing them",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=f"Don't write any files, and exit with status {EXIT_OUTDATED} if any is outdated"
+        f" or {EXIT_UNAVAILABLE} if versions were unavailable",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first outdated file, implies --check",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent and calls made in each phase, cache hits and peak memory (slows the run down)",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        metavar="FILE",
+        help="Also write cProfile stats of the main thread to FILE, implies --profile",
+    )
+    parser.add_argument(
+        "--report",
+        type=report_type,
+        metavar="FORMAT[:PATH]",
+        help=f"Write a record for each file as it is processed to PATH, or stdout (formats: {', '.join(REPORT_FORMATS)})",
+    )
+    add_output_arguments(parser)
+    add_network_arguments(parser)
+    args = parser.parse_args(argv)
+    args.check = args.check or args.fail_fast
+    args.dry_run = args.dry_run or args.check
 
-    version_cache: VersionCache = {}
-    modified_files = process_files(
-        args.flavor.value, args.beta, args.ptr, version_cache
+    # Keep stdout for the report alone when it's written there
+    report_to_stdout = args.report is not None and args.report[1] is None
+    console = Console(
+        output_level(args.verbose, args.quiet),
+        sys.stderr if report_to_stdout else None,
     )
+    previous_console = set_console(console)
+    profiler = Profiler(enabled=args.profile or bool(args.profile_stats))
+    previous_profiler = set_profiler(profiler)
+    session = None
+    if profiler.enabled:
+        session = ProfileSession(profiler, args.profile_stats)
+        session.start()
+    try:
+        results = run(args, parser, console)
+        if session is not None:
+            console.write("", QUIET)
+            for line in session.finish():
+                console.write(line, QUIET)
+    finally:
+        console.flush()
+        set_console(previous_console)
+        set_profiler(previous_profiler)
 
-    if modified_files:
-        print(f"\n{GREEN}Files modified:")
-        for modified_file in modified_files:
-            print(f"{GREEN}{modified_file}{RESET}")
+    if args.check:
+        if any(result.modified for result in results):
+            sys.exit(EXIT_OUTDATED)
+        # Files with skipped products weren't fully checked, so can't pass
+        if any(result.skipped for result in results):
+            sys.exit(EXIT_UNAVAILABLE)
+
+
+def update_batch(
+    args: argparse.Namespace,
+    files: List[str],
+    state: Optional[StateManifest],
+    version_cache: VersionCache,
+    store: Optional[VersionStore],
+    console: Console,
+    on_result: Optional[Callable[[FileResult], None]],
+) -> Tuple[List[FileResult], int]:
+    """
+    Plan, fetch the versions for and update a batch of files.
+    Returns the results and the number of files skipped as unchanged since the last run.
+    """
+    write = not args.dry_run
+    file_products, unchanged, headers = plan_files(
+        files, args.flavor.value, args.beta, args.ptr, state
+    )
+    required_products = set().union(*file_products.values())
+
+    if args.versions_from:
+        missing = sorted(
+            product for product in required_products if product not in version_cache
+        )
+        if missing:
+            console.warning(f"Manifest has no version for: {', '.join(missing)}")
+        # Never fall back to fetching, those products are skipped like failed fetches
+        for product in missing:
+            version_cache.setdefault(product, None)
     else:
-        print(f"\n{YELLOW}No files were modified.{RESET}")
+        prefetch_versions(required_products, version_cache, store=store)
+
+    skipped_count = 0
+    if state is not None:
+        # Unchanged files only need updating if a version they use has changed
+        pending = []
+        for file_path in files:
+            previous = unchanged.get(file_path)
+            if previous is not None and previous.is_current(version_cache):
+                state.keep(file_path, previous)
+            else:
+                pending.append(file_path)
+        skipped_count = len(files) - len(pending)
+        console.verbose(f"Skipping {skipped_count} unchanged files")
+        files = pending
+
+    file_results = process_files(
+        args.flavor.value,
+        args.beta,
+        args.ptr,
+        version_cache,
+        files,
+        jobs=args.jobs,
+        executor=args.executor,
+        on_result=on_result,
+        write=write,
+        fail_fast=args.fail_fast,
+        headers=headers,
+    )
+
+    # Checked files are left as they were, so there's nothing new to record
+    if state is not None and write:
+        for file_path in files:
+            state.record(
+                file_path,
+                {
+                    product: version_cache.get(product)
+                    for product in file_products[file_path]
+                },
+            )
+
+    return file_results, skipped_count
+
+
+def run(
+    args: argparse.Namespace, parser: argparse.ArgumentParser, console: Console
+) -> List[FileResult]:
+    """Update, or check, the TOC files selected by the parsed arguments."""
+    start = time.perf_counter()
+
+    state = None
+    if args.state:
+        state = StateManifest.load(
+            args.state, options_fingerprint(args.flavor.value, args.beta, args.ptr)
+        )
+
+    rules = build_exclude_rules(
+        excludes=args.exclude, default_excludes=args.default_excludes
+    )
+    paths = list(args.paths)
+    if args.files_from:
+        try:
+            paths.extend(read_file_list(args.files_from))
+        except OSError as e:
+            parser.error(f"Unable to read {args.files_from}: {e}")
+
+    with phase("walk"):
+        if paths:
+            try:
+                files = collect_toc_files(paths, rules)
+            except FileNotFoundError as e:
+                parser.error(f"No such file or directory: {e}")
+        elif args.files_from:
+            # An empty list means nothing changed, not the whole tree
+            files = []
+        else:
+            files = find_toc_files(rules=rules)
+
+    version_cache: VersionCache = {}
+    if args.versions_from:
+        try:
+            version_cache.update(load_manifest(args.versions_from))
+        except ManifestError as e:
+            parser.error(str(e))
+
+    report = None
+    if args.report is not None:
+        try:
+            report = NdjsonReport.open(args.report[1])
+        except OSError as e:
+            parser.error(f"Unable to write report {args.report[1]}: {e}")
+
+    transport, store = None, None
+    if not args.versions_from:
+        transport, store = open_version_sources(args)
+
+    # Scan first so only the products the files actually need are fetched.
+    # When failing fast that is done in batches, so an outdated file found
+    # early saves scanning the rest of the tree.
+    batch_size = FAIL_FAST_BATCH_SIZE if args.fail_fast else max(len(files), 1)
+    file_results: List[FileResult] = []
+    skipped_count = 0
+    try:
+        for offset in range(0, max(len(files), 1), batch_size):
+            batch_results, batch_skipped = update_batch(
+                args,
+                files[offset : offset + batch_size],
+                state,
+                version_cache,
+                store,
+                console,
+                report.file if report is not None else None,
+            )
+            file_results.extend(batch_results)
+            skipped_count += batch_skipped
+            if args.fail_fast and any(result.modified for result in batch_results):
+                break
+        if report is not None:
+            report.summary(file_results, skipped_count, time.perf_counter() - start)
+    finally:
+        if report is not None:
+            report.close()
+        # Keep the versions fetched so far and release connections, even on errors
+        if transport is not None:
+            close_version_sources(transport, store)
+
+    if state is not None and not args.dry_run:
+        state.save()
+
+    print_summary(console, file_results, skipped_count, args.dry_run)
+
+    return file_results
 
 
 if __name__ == "__main__":
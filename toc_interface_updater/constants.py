@@ -7,6 +7,9 @@ from typing import Dict
 class InterfaceDirective:
     """Interface directive definitions for TOC files."""
 
+    # Prefix shared by every interface directive, for cheap checks
+    PREFIX = "## Interface"
+
     # Base interface directive (used for retail/mainline)
     BASE = "## Interface:"
 
@@ -0,0 +1,74 @@
+"""JSON files kept between runs, read defensively and written atomically."""
+
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+# Checks the type of a stored field's value
+Check = Callable[[Any], bool]
+
+
+def is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value: Any) -> bool:
+    return is_int(value) or isinstance(value, float)
+
+
+def is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def is_digits(value: Any) -> bool:
+    return isinstance(value, str) and value.isdigit()
+
+
+def optional(check: Check) -> Check:
+    """Allow None as well as the values the check accepts."""
+    return lambda value: value is None or check(value)
+
+
+def read_json_object(path: str, format_version: int) -> Optional[Dict[str, Any]]:
+    """Read a JSON object in the given format, or None if it is missing, unreadable or in another format."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != format_version:
+        return None
+    return data
+
+
+def load_record(cls: Type[T], data: Any, checks: Dict[str, Check]) -> Optional[T]:
+    """Build a dataclass from its stored JSON, or None if it is malformed."""
+    if not isinstance(data, dict):
+        return None
+    try:
+        record = cls(**data)
+    except TypeError:
+        return None
+    if not all(check(getattr(record, name)) for name, check in checks.items()):
+        return None
+    return record
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """
+    Write JSON to a temporary file and move it over path, so readers never see
+    a partial file. Raises OSError if it can't be written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -0,0 +1,101 @@
+"""Machine-readable run reports, written one JSON record per file as soon as it is processed."""
+
+import json
+import sys
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from .types import FileResult
+
+REPORT_NDJSON = "ndjson"
+REPORT_FORMATS = (REPORT_NDJSON,)
+
+# (format, path) where a None path means stdout
+ReportSpec = Tuple[str, Optional[str]]
+
+
+def parse_report_spec(value: str) -> ReportSpec:
+    """
+    Parse a "format[:path]" report option, e.g. "ndjson" or "ndjson:report.ndjson".
+    Raises ValueError for unknown formats.
+    """
+    report_format, _, path = value.partition(":")
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(
+            f"Invalid report format: {report_format}. Allowed values are: {', '.join(REPORT_FORMATS)}"
+        )
+    return report_format, path if path and path != "-" else None
+
+
+def file_record(result: FileResult) -> Dict[str, Any]:
+    """Build the report record for a processed file."""
+    return {
+        "type": "file",
+        "path": result.path,
+        "products": list(result.products),
+        "action": result.action,
+        "interfaces": {
+            name: {"old": old, "new": new}
+            for name, (old, new) in result.interfaces.items()
+        },
+        "skipped": list(result.skipped),
+        "bytes_read": result.bytes_read,
+        "bytes_written": result.bytes_written,
+        "elapsed": round(result.elapsed, 6),
+    }
+
+
+def summary_record(
+    results: List[FileResult], unchanged_count: int, elapsed: float
+) -> Dict[str, Any]:
+    """Build the final report record for a run."""
+    actions = [result.action for result in results]
+    return {
+        "type": "summary",
+        "files": len(results) + unchanged_count,
+        "updated": actions.count("updated"),
+        "outdated": actions.count("outdated"),
+        "unchanged": actions.count("unchanged"),
+        "skipped": actions.count("skipped"),
+        "unchanged_since_last_run": unchanged_count,
+        "bytes_read": sum(result.bytes_read for result in results),
+        "bytes_written": sum(result.bytes_written for result in results),
+        "elapsed": round(elapsed, 6),
+    }
+
+
+class NdjsonReport:
+    """
+    Writes newline-delimited JSON records, flushing each one so consumers can
+    follow the run while it is in progress.
+    """
+
+    def __init__(self, stream: TextIO, owned: bool = False):
+        self.stream = stream
+        # Whether the stream was opened by the report and should be closed with it
+        self.owned = owned
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> "NdjsonReport":
+        """Open a report writing to a file, or to stdout if path is None."""
+        if path is None:
+            return cls(sys.stdout)
+        return cls(open(path, "w", encoding="utf-8"), owned=True)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write a single record."""
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def file(self, result: FileResult) -> None:
+        """Write the record for a processed file."""
+        self.write(file_record(result))
+
+    def summary(
+        self, results: List[FileResult], unchanged_count: int, elapsed: float
+    ) -> None:
+        """Write the final record for the run."""
+        self.write(summary_record(results, unchanged_count, elapsed))
+
+    def close(self) -> None:
+        if self.owned:
+            self.stream.close()
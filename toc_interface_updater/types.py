@@ -1,14 +1,61 @@
 """Type definitions and enums for the TOC interface updater."""
 
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, Literal
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 # Product type definitions
 TestProduct = Literal["wowt", "wowxptr", "wow_classic_ptr", "wow_classic_era_ptr"]
 BetaProduct = Literal["wow_beta", "wow_classic_beta", "wow_classic_era_beta"]
 FullProduct = Literal["wow", "wow_classic", "wow_classic_era"]
 Product = TestProduct | BetaProduct | FullProduct
-VersionCache = Dict[Product, str]
+
+
+class InterfaceVersion(int):
+    """
+    Interface version such as 110105 for 11.1.5.
+    Stored as its integer value so versions compare, sort and hash numerically.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, value: Union[str, int]) -> "InterfaceVersion":
+        """Parse a version, e.g. "110105". Raises ValueError if it isn't a number."""
+        if isinstance(value, cls):
+            return value
+        return cls(value)
+
+    @classmethod
+    def from_parts(cls, major: int, minor: int, patch: int) -> "InterfaceVersion":
+        """Build a version from its parts, e.g. (11, 1, 5)."""
+        return cls(major * 10000 + minor * 100 + patch)
+
+    @property
+    def major(self) -> int:
+        return self // 10000
+
+    @property
+    def minor(self) -> int:
+        return self // 100 % 100
+
+    @property
+    def patch(self) -> int:
+        return self % 100
+
+    def dotted(self) -> str:
+        """Format the version as major.minor.patch."""
+        return f"{self.major}.{self.minor}.{self.patch}"
+
+    def __str__(self) -> str:
+        return int.__repr__(self)
+
+    def __repr__(self) -> str:
+        return f"InterfaceVersion({int.__repr__(self)})"
+
+
+# Products that couldn't be resolved are cached as None
+VersionCache = Dict[Product, Optional[InterfaceVersion]]
 
 
 class GameFlavor(Enum):
@@ -17,3 +64,40 @@ class GameFlavor(Enum):
     WOW = "wow"
     WOW_CLASSIC = "wow_classic"
     WOW_CLASSIC_ERA = "wow_classic_era"
+
+
+class ExecutorKind(Enum):
+    """Enumeration of worker pools used to process files in parallel."""
+
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass
+class FileResult:
+    """Outcome of updating a single TOC file."""
+
+    path: str
+    products: List[FullProduct]
+    # Whether the file's interface versions are, or would be when not writing, updated
+    modified: bool = False
+    # Reasons why passes were skipped, e.g. unavailable versions
+    skipped: List[str] = field(default_factory=list)
+    # Directive name -> (old value, new value), e.g. "Interface" -> ("110000", "110105")
+    interfaces: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    bytes_read: int = 0
+    bytes_written: int = 0
+    # Seconds spent reading, updating and writing the file
+    elapsed: float = 0.0
+
+    @property
+    def action(self) -> str:
+        """
+        Get what was done to the file: "updated", "outdated" when an update
+        wasn't written, "skipped" or "unchanged".
+        """
+        if self.modified:
+            return "updated" if self.bytes_written else "outdated"
+        if self.skipped:
+            return "skipped"
+        return "unchanged"
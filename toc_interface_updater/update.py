@@ -1,70 +1,195 @@
-from typing import List
+import hashlib
+import time
+from typing import Dict, List, Optional, Tuple
 
 from .cli import main
-from .content_updater import update_interface_content
-from .file_processor import write_file_if_changed
+from .console import BOLD, GREEN, LIGHT_BLUE, RED, YELLOW, Console
+from .constants import InterfaceDirective
+from .content_updater import update_document
+from .file_processor import TocHeader, read_toc_header, write_toc_header
+from .memo import BoundedMemo, version_cache_fingerprint
+from .profiler import count, phase
+from .toc_document import TocDocument
 from .types import (
+    FileResult,
     FullProduct,
     VersionCache,
 )
+from .version_client import VersionUnavailable
 from .version_resolver import (
-    collect_all_versions,
     detect_existing_versions,
-    get_versions_from_detected,
+    has_interface_directive,
+    resolve_interface,
 )
 
-# ANSI escape sequences for colors and formatting
-RESET = "\033[0m"
-BOLD = "\033[1m"
-LIGHT_BLUE = "\033[94m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
 
-
-def update_versions(
-    file: str,
+def update_content(
+    document: TocDocument,
     product: FullProduct,
     multi: bool,
     beta: bool,
     test: bool,
     version_cache: VersionCache,
-    modified_files: List[str],
-):
-    print(
-        f"{LIGHT_BLUE}Checking {RESET}{BOLD}{file}{RESET}{LIGHT_BLUE} ({product})...{RESET} ",
-        end="",
-    )
+) -> None:
+    """
+    Apply the interface versions for a product to a TOC document.
+    Raises VersionUnavailable if a needed version couldn't be fetched.
+    """
+    with phase("detect"):
+        # Detect existing versions and determine format
+        detected_versions, single_line_multi = detect_existing_versions(
+            document, product, multi
+        )
+        needed = detected_versions or has_interface_directive(
+            document, product, multi, single_line_multi
+        )
+    if not needed:
+        # Nothing to update, don't look up any versions
+        return
 
-    # Read and normalize file content
-    with open(file, "r") as f:
-        original_content = f.read()
-    original_content_normalized = original_content.replace("\r\n", "\n").replace(
-        "\r", "\n"
+    interface = resolve_interface(
+        product, frozenset(detected_versions), beta, test, version_cache
     )
 
-    # Get all versions for this product
-    versions = collect_all_versions(product, beta, test, version_cache)
-    interface = ", ".join(sorted(versions, key=lambda x: int(x)))
+    with phase("render"):
+        # Update the document with new interface versions
+        update_document(document, product, interface, multi, single_line_multi)
 
-    # Detect existing versions and determine format
-    detected_versions, single_line_multi = detect_existing_versions(
-        original_content_normalized, product, multi
-    )
 
-    if detected_versions:
-        versions = get_versions_from_detected(
-            detected_versions, beta, test, version_cache
+# Interface directive name -> (old value, new value)
+InterfaceChanges = Dict[str, Tuple[str, str]]
+HeaderUpdate = Tuple[Optional[List[bytes]], Tuple[str, ...], InterfaceChanges]
+
+# Updated header lines by (header digest, passes, beta, test, version cache)
+_update_cache: BoundedMemo[HeaderUpdate] = BoundedMemo()
+
+
+def update_header(
+    header: TocHeader,
+    passes: List[tuple[FullProduct, bool]],
+    beta: bool,
+    test: bool,
+    version_cache: VersionCache,
+) -> HeaderUpdate:
+    """
+    Apply every (product, multi) pass to a header.
+    Returns the updated raw lines, or None if nothing changed, why any products
+    were skipped, and the old and new value of each interface directive.
+    Results are memoized by the header's content, so identical files are only
+    updated once.
+    """
+    digest = hashlib.blake2b(b"".join(header.lines), digest_size=16).digest()
+    known_products = len(version_cache)
+    key = (digest, tuple(passes), beta, test, version_cache_fingerprint(version_cache))
+    cached = _update_cache.get(key)
+    if cached is not None:
+        count("update cache hit")
+        return cached
+    count("update cache miss")
+
+    lines = None
+    skipped: List[str] = []
+    interfaces: InterfaceChanges = {}
+    with phase("normalize"):
+        original_header = header.text()
+        # The header is parsed once and every pass works on the same document
+        document = (
+            TocDocument(original_header)
+            if InterfaceDirective.PREFIX in original_header
+            else None
         )
-        interface = ", ".join(sorted(versions, key=lambda x: int(x)))
+    if document is not None:
+        original_values = directive_values(document)
+        for product, multi in passes:
+            try:
+                update_content(document, product, multi, beta, test, version_cache)
+            except VersionUnavailable as e:
+                # Leave this product's directives untouched rather than writing placeholders
+                skipped.append(str(e))
+
+        updated_values = directive_values(document)
+        interfaces = {
+            name: (value, updated_values[name])
+            for name, value in original_values.items()
+        }
 
-    # Update the content with new interface versions
-    updated_content = update_interface_content(
-        original_content_normalized, product, interface, multi, single_line_multi
+        with phase("render"):
+            updated_header = document.text()
+            if updated_header != original_header:
+                lines = header.splice(updated_header)
+
+    result = (lines, tuple(skipped), interfaces)
+    # Versions are only ever added, so if none were fetched the key still holds
+    if len(version_cache) == known_products:
+        _update_cache.put(key, result)
+    return result
+
+
+def directive_values(document: TocDocument) -> Dict[str, str]:
+    """Get the value of the first occurrence of each interface directive, by name."""
+    return {
+        # "## Interface-Classic:" -> "Interface-Classic"
+        directive[3:-1]: document.value(directive, indexes[0]).strip()
+        for directive, indexes in document.directives.items()
+    }
+
+
+def clear_update_cache() -> None:
+    """Forget all memoized header updates."""
+    _update_cache.clear()
+
+
+def update_file(
+    file: str,
+    passes: List[tuple[FullProduct, bool]],
+    beta: bool,
+    test: bool,
+    version_cache: VersionCache,
+    header: Optional[TocHeader] = None,
+    write: bool = True,
+) -> FileResult:
+    """
+    Apply every (product, multi) pass to a file, reading and writing it at most once.
+    A header already read while planning is used unless the file changed since.
+    When write is False the file is only checked, never written.
+    """
+    start = time.perf_counter()
+    result = FileResult(file, [product for product, _ in passes])
+
+    if header is None or not header.is_current(file):
+        # Interface directives are part of the metadata header, so only read that
+        with phase("read"):
+            header = read_toc_header(file)
+    lines, skipped, interfaces = update_header(
+        header, passes, beta, test, version_cache
     )
+    result.skipped.extend(skipped)
+    result.interfaces.update(interfaces)
+    if lines is not None:
+        result.modified = True
+        if write:
+            # Only the changed lines are replaced, keeping the file's bytes otherwise
+            with phase("write"):
+                result.bytes_written = write_toc_header(file, header, lines)
+    result.bytes_read = header.read_size
+    result.elapsed = time.perf_counter() - start
+    return result
+
 
-    # Write file if changed
-    write_file_if_changed(
-        file, original_content_normalized, updated_content, modified_files
+def format_file_result(result: FileResult, console: Console) -> str:
+    """Format the status line printed for a processed file."""
+    if result.action == "outdated":
+        status = console.style("Outdated", RED)
+    elif result.modified:
+        status = console.style("Updated", GREEN)
+    else:
+        status = console.style("No change", YELLOW)
+    if result.skipped:
+        status += console.style(f" (skipped: {'; '.join(result.skipped)})", YELLOW)
+    products = f"({', '.join(result.products)})..."
+    return (
+        f"{console.style('Checking', LIGHT_BLUE)} {console.style(result.path, BOLD)}"
+        f" {console.style(products, LIGHT_BLUE)} {status}"
     )
 
 
@@ -1,37 +1,239 @@
 """Battle.net API client for fetching version information."""
 
-import requests
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
 
-from .types import Product, VersionCache
+from .bpsv import BpsvError, parse_versions
+from .console import get_console
+from .profiler import count, phase
+from .transport import Transport, TransportError, get_transport
+from .types import InterfaceVersion, Product, VersionCache
+from .version_store import StoreEntry, VersionStore
 
+DEFAULT_BASE_URL = "https://us.version.battle.net"
+# Environment variable pointing lookups at another server, e.g. a local version_server
+BASE_URL_ENV = "TOC_UPDATER_VERSION_SERVER"
+VERSIONS_PATH = "/v2/products/{product}/versions"
 
-def product_version(product: Product, version_cache: VersionCache) -> str:
+# Region whose build is used for interface versions
+REGION = "us"
+
+# Upper bound on concurrent requests made while prefetching versions
+MAX_PREFETCH_WORKERS = 8
+
+# Serializes lookups of products missing from a shared version cache
+_fetch_lock = threading.Lock()
+
+# Base URL set for this process, overriding the environment
+_base_url: Optional[str] = None
+
+
+def get_base_url() -> str:
+    """Get the base URL of the version server, from set_base_url() or $TOC_UPDATER_VERSION_SERVER."""
+    return (_base_url or os.environ.get(BASE_URL_ENV) or DEFAULT_BASE_URL).rstrip("/")
+
+
+def set_base_url(base_url: Optional[str]) -> Optional[str]:
+    """Replace the base URL of the version server, returning the previous one."""
+    global _base_url
+    previous, _base_url = _base_url, base_url
+    return previous
+
+
+def versions_url(product: Product) -> str:
+    """Get the URL of a product's versions document."""
+    return get_base_url() + VERSIONS_PATH.format(product=product)
+
+
+def parse_version(payload: str, region: str = REGION) -> InterfaceVersion:
+    """Convert a versions payload into the interface version for a region."""
+    record = parse_versions(payload).get(region)
+    if record is None:
+        raise BpsvError(f"No {region} record in versions document")
+    return record.interface_version()
+
+
+def fetch_product_entry(
+    product: Product,
+    previous: Optional[StoreEntry] = None,
+    transport: Optional[Transport] = None,
+) -> Optional[StoreEntry]:
+    """
+    Fetch a product, revalidating against a previously stored entry if given.
+    Returns None on failure.
+    """
+    headers: Dict[str, str] = {}
+    if previous is not None:
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+    transport = transport or get_transport()
+    try:
+        with phase(f"http {product}"):
+            response = transport.get(versions_url(product), headers)
+    except TransportError as e:
+        get_console().warning(f"Error communicating with server: {e}")
+        return None
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+
+    if response.status == 304 and previous is not None:
+        # Not modified, keep the stored payload and version
+        return replace(
+            previous,
+            fetched_at=time.time(),
+            etag=etag or previous.etag,
+            last_modified=last_modified or previous.last_modified,
+        )
+
+    try:
+        version = parse_version(response.text)
+    except BpsvError as e:
+        get_console().warning(f"No version information available for {product}: {e}")
+        return None
+
+    return StoreEntry(
+        version=str(version),
+        payload=response.text,
+        fetched_at=time.time(),
+        etag=etag,
+        last_modified=last_modified,
+    )
+
+
+def fetch_product_version(
+    product: Product, transport: Optional[Transport] = None
+) -> Optional[InterfaceVersion]:
+    """Fetch version information for a product, returning None on failure."""
+    entry = fetch_product_entry(product, transport=transport)
+    return InterfaceVersion.parse(entry.version) if entry is not None else None
+
+
+class VersionUnavailable(Exception):
+    """Raised when no version could be determined for a product."""
+
+    def __init__(self, product: Product):
+        super().__init__(f"No version available for {product}")
+        self.product = product
+
+
+def product_version(product: Product, version_cache: VersionCache) -> InterfaceVersion:
     """Fetch version information for a product from Battle.net API."""
     if product in version_cache:
-        return version_cache[product]
+        count("version cache hit")
+        version = version_cache[product]
     else:
-        url = f"https://us.version.battle.net/v2/products/{product}/versions"
-
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            response_data = response.text
-        except requests.RequestException as e:
-            print(f"Error communicating with server: {e}")
-            return "00000"
-
-        version = ""
-        for line in response_data.splitlines():
-            if line.startswith("us"):
-                version = line.split("|")[5]
-                break
-        version = version.rsplit(".", 1)[0]
-
-        [major, minor, patch] = version.split(".")
-        # Pad minor and patch to ensure they are two digits
-        minor = minor.zfill(2)  # Ensure minor is 2 digits
-        patch = patch.zfill(2)  # Ensure patch is 2 digits
-
-        version = f"{major}{minor}{patch}"
-        version_cache[product] = version
-        return version
+        count("version cache miss")
+        # Workers share the cache, make sure each product is only fetched once
+        with _fetch_lock:
+            if product in version_cache:
+                version = version_cache[product]
+            else:
+                version = fetch_product_version(product)
+                # Failures are cached too so they're only waited on once per run
+                version_cache[product] = version
+
+    if version is None:
+        raise VersionUnavailable(product)
+    # Caches filled by hand may still hold version strings
+    return InterfaceVersion.parse(version)
+
+
+def _refresh_entry(
+    product: Product,
+    previous: Optional[StoreEntry],
+    store: Optional[VersionStore],
+    transport: Transport,
+) -> Optional[StoreEntry]:
+    """Fetch or revalidate a product and record the result in the store."""
+    entry = fetch_product_entry(product, previous, transport)
+    if entry is None:
+        # Fall back to whatever was stored if the server can't be reached
+        return previous
+    if store is not None:
+        store.put(product, entry)
+    return entry
+
+
+def prefetch_versions(
+    products: Iterable[Product],
+    version_cache: VersionCache,
+    max_workers: int = MAX_PREFETCH_WORKERS,
+    store: Optional[VersionStore] = None,
+    transport: Optional[Transport] = None,
+) -> Dict[Product, float]:
+    """
+    Fetch all products missing from the cache concurrently.
+    When a store is given, fresh entries are used without network access and
+    recently expired ones are served while being revalidated in the background.
+    Returns when each newly cached version was fetched.
+    """
+    missing = [
+        product for product in dict.fromkeys(products) if product not in version_cache
+    ]
+
+    console = get_console()
+    fetched_at: Dict[Product, float] = {}
+    now = time.time()
+    blocking: List[Product] = []
+    revalidate: List[Product] = []
+    for product in missing:
+        entry = store.get(product) if store is not None else None
+        if entry is not None and store.is_fresh(entry, now):
+            version_cache[product] = InterfaceVersion.parse(entry.version)
+            fetched_at[product] = entry.fetched_at
+            console.debug(f"Using cached version {entry.version} for {product}")
+        elif entry is not None and store.is_revalidatable(entry, now):
+            # Serve the stale version now and refresh it for the next run
+            version_cache[product] = InterfaceVersion.parse(entry.version)
+            fetched_at[product] = entry.fetched_at
+            revalidate.append(product)
+            console.debug(f"Using stale version {entry.version} for {product}")
+        else:
+            blocking.append(product)
+
+    if not blocking and not revalidate:
+        return fetched_at
+
+    # All lookups share one pooled transport so connections are reused
+    transport = transport or get_transport()
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(blocking) + len(revalidate))
+    )
+    for product in revalidate:
+        store.track(
+            executor.submit(
+                _refresh_entry, product, store.get(product), store, transport
+            )
+        )
+    futures = {
+        product: executor.submit(
+            _refresh_entry,
+            product,
+            store.get(product) if store is not None else None,
+            store,
+            transport,
+        )
+        for product in blocking
+    }
+    # Only wait for the blocking fetches, revalidations finish in the background
+    executor.shutdown(wait=False)
+
+    for product, future in futures.items():
+        entry = future.result()
+        if entry is None:
+            # Remember the failure so it isn't retried later in the run
+            version_cache[product] = None
+        else:
+            version_cache[product] = InterfaceVersion.parse(entry.version)
+            fetched_at[product] = entry.fetched_at
+            console.debug(f"Fetched version {entry.version} for {product}")
+
+    return fetched_at
@@ -0,0 +1,364 @@
+"""
+Local stand-in for the Battle.net version server, for offline tests and for
+measuring how lookups behave under latency and failures.
+
+Versions are served from BPSV fixture files or from a cassette of recorded
+responses. Missing products can be fetched from a real server and recorded.
+Run it with `python -m toc_interface_updater.version_server` and point the
+updater at it with $TOC_UPDATER_VERSION_SERVER or --version-server.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .json_file import is_int, is_str, load_record
+from .transport import Transport, TransportError, create_transport
+from .version_client import BASE_URL_ENV, DEFAULT_BASE_URL, VERSIONS_PATH
+
+CASSETTE_FORMAT_VERSION = 1
+
+# Fixture files are named after their product, e.g. wow_classic.bpsv
+FIXTURE_SUFFIX = ".bpsv"
+
+VERSIONS_PATH_PATTERN = re.compile(
+    "^" + re.escape(VERSIONS_PATH).replace(re.escape("{product}"), "([^/]+)") + "$"
+)
+
+
+@dataclass
+class RecordedResponse:
+    """A versions document served for a product."""
+
+    status: int
+    body: str
+
+
+RESPONSE_CHECKS = {"status": is_int, "body": is_str}
+
+
+def load_fixtures(directory: str) -> Dict[str, RecordedResponse]:
+    """Load every <product>.bpsv file in a directory."""
+    responses = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(FIXTURE_SUFFIX):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                responses[name[: -len(FIXTURE_SUFFIX)]] = RecordedResponse(
+                    200, f.read()
+                )
+    return responses
+
+
+def load_cassette(path: str) -> Dict[str, RecordedResponse]:
+    """Load recorded responses. Raises ValueError for files that aren't cassettes."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if (
+        not isinstance(data, dict)
+        or data.get("format") != CASSETTE_FORMAT_VERSION
+        or not isinstance(data.get("responses"), dict)
+    ):
+        raise ValueError(f"Unsupported cassette format in {path}")
+    responses = {}
+    for product, entry in data["responses"].items():
+        response = load_record(RecordedResponse, entry, RESPONSE_CHECKS)
+        if response is None:
+            raise ValueError(f"Invalid response for {product} in {path}")
+        responses[product] = response
+    return responses
+
+
+def save_cassette(path: str, responses: Dict[str, RecordedResponse]) -> None:
+    """Write recorded responses so they can be replayed later."""
+    data = {
+        "format": CASSETTE_FORMAT_VERSION,
+        "responses": {
+            product: asdict(response) for product, response in sorted(responses.items())
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+@dataclass
+class Faults:
+    """Delays and failures injected into responses."""
+
+    # Seconds added to every response, plus up to jitter more at random
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with error_status
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Share of requests held for hang seconds and then dropped without a response
+    timeout_rate: float = 0.0
+    hang: float = 30.0
+    seed: Optional[int] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections alive like the real server, so pooling is exercised
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        response = self.server.version_server.respond(self.path, self.headers)
+        if response is None:
+            # Simulated timeout, drop the connection without answering
+            self.close_connection = True
+            return
+
+        status, body, headers = response
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    version_server: "VersionServer"
+
+
+class VersionServer:
+    """
+    HTTP server answering versions requests from recorded responses, on a
+    background thread. Use it as a context manager, or call start() and stop().
+    When an upstream URL is given, products without a response are fetched
+    from it and recorded, and saved to the cassette when the server stops.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, RecordedResponse]] = None,
+        faults: Optional[Faults] = None,
+        upstream: Optional[str] = None,
+        cassette: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.responses: Dict[str, RecordedResponse] = dict(responses or {})
+        self.faults = faults or Faults()
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.cassette = cassette
+        self.host = host
+        self.port = port
+        # Products requested, in order, for tests to check
+        self.requests: List[str] = []
+        self.recorded = False
+
+        self._random = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._upstream_transport: Optional[Transport] = None
+
+    @property
+    def url(self) -> str:
+        """Get the base URL to use as the version server."""
+        if self._server is None:
+            raise RuntimeError("Version server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "VersionServer":
+        self._stopped.clear()
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.version_server = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            # Poll often so stop() returns quickly
+            kwargs={"poll_interval": 0.05},
+            name="version-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving, releasing hanging requests and saving any recordings."""
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._upstream_transport is not None:
+            self._upstream_transport.close()
+            self._upstream_transport = None
+        if self.recorded and self.cassette:
+            save_cassette(self.cassette, self.responses)
+
+    def __enter__(self) -> "VersionServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _pick(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def _delay(self) -> None:
+        delay = self.faults.latency
+        if self.faults.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.faults.jitter)
+        if delay:
+            self._stopped.wait(delay)
+
+    def _record(self, product: str) -> Optional[RecordedResponse]:
+        """Fetch a product from upstream and record it."""
+        with self._lock:
+            if self._upstream_transport is None:
+                self._upstream_transport = create_transport()
+            transport = self._upstream_transport
+        try:
+            response = transport.get(
+                self.upstream + VERSIONS_PATH.format(product=product)
+            )
+        except TransportError:
+            return None
+        recorded = RecordedResponse(response.status, response.text)
+        with self._lock:
+            self.responses[product] = recorded
+            self.recorded = True
+        return recorded
+
+    def respond(self, path: str, headers) -> Optional[Tuple[int, str, Dict[str, str]]]:
+        """
+        Get the (status, body, headers) answering a request, or None to drop it
+        as a timeout.
+        """
+        match = VERSIONS_PATH_PATTERN.match(path.split("?")[0])
+        if match is None:
+            return 404, "Not Found\n", {}
+        product = match.group(1)
+        with self._lock:
+            self.requests.append(product)
+
+        self._delay()
+        if self._pick(self.faults.timeout_rate):
+            self._stopped.wait(self.faults.hang)
+            return None
+        if self._pick(self.faults.error_rate):
+            return self.faults.error_status, "Injected error\n", {}
+
+        response = self.responses.get(product)
+        if response is None and self.upstream:
+            response = self._record(product)
+            if response is None:
+                return 502, "Upstream request failed\n", {}
+        if response is None:
+            return 404, "Not Found\n", {}
+
+        digest = hashlib.blake2b(response.body.encode("utf-8"), digest_size=16)
+        etag = f'"{digest.hexdigest()}"'
+        if response.status == 200 and headers.get("If-None-Match") == etag:
+            return 304, "", {"ETag": etag}
+        return response.status, response.body, {"ETag": etag}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Serve versions until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog="python -m toc_interface_updater.version_server",
+        description="Local version server for offline runs and network experiments",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--fixtures",
+        metavar="DIR",
+        help=f"Serve the <product>{FIXTURE_SUFFIX} files in DIR",
+    )
+    parser.add_argument(
+        "--cassette", metavar="FILE", help="Replay responses recorded in FILE"
+    )
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const=DEFAULT_BASE_URL,
+        metavar="UPSTREAM",
+        help=f"Fetch missing products from UPSTREAM (default: {DEFAULT_BASE_URL}) and record them to the cassette",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Up to this many more seconds at random",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failed with --error-status",
+    )
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--timeout-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests dropped after --hang seconds",
+    )
+    parser.add_argument("--hang", type=float, default=30.0)
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed for repeatable faults"
+    )
+    args = parser.parse_args(argv)
+
+    if args.record and not args.cassette:
+        parser.error("--record needs a --cassette to record to")
+
+    responses: Dict[str, RecordedResponse] = {}
+    try:
+        if args.fixtures:
+            responses.update(load_fixtures(args.fixtures))
+        if args.cassette and os.path.exists(args.cassette):
+            responses.update(load_cassette(args.cassette))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    faults = Faults(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.error_status,
+        args.timeout_rate,
+        args.hang,
+        args.seed,
+    )
+    server = VersionServer(
+        responses, faults, args.record, args.cassette, args.host, args.port
+    )
+    with server:
+        print(f"Serving {len(responses)} products on {server.url}")
+        print(
+            f"Use it with {BASE_URL_ENV}={server.url} or --version-server {server.url}"
+        )
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()